@@ -0,0 +1,143 @@
+# Benchmark dos índices do banco de aprendizado
+#
+# Gera um banco sintético (500 mil títulos por padrão) só com o esquema inicial, mede as
+# consultas de aprendizado e mostra o EXPLAIN QUERY PLAN; depois aplica as migrações
+# pendentes e repete as medições, para confirmar que os planos passam a usar os índices.
+#
+# Uso: python benchmarks/bench_db_indices.py [--titulos 500000] [--repeticoes 20]
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db_handler import aplicar_migracoes
+
+TEMAS = ["Cinema", "Séries", "Games", "Tecnologia", "Música", "Esportes", "Lifestyle", "Cultura Pop", "Geral"]
+PALAVRAS = [f"palavra {i}" for i in range(2000)]
+
+
+def criar_banco(caminho: str, total: int, semente: int = 42) -> None:
+    rnd = random.Random(semente)
+    conn = sqlite3.connect(caminho)
+    aplicar_migracoes(conn, ate_versao=1)
+    conn.commit()
+
+    lote = 50000
+    for inicio in range(0, total, lote):
+        titulos = []
+        for i in range(inicio, min(total, inicio + lote)):
+            titulos.append((
+                f"Título sintético número {i} sobre {rnd.choice(PALAVRAS)}",
+                rnd.choice(PALAVRAS),
+                rnd.choice(TEMAS),
+                "PALAVRA PALAVRA: PALAVRA",
+                rnd.random(),
+                rnd.random(),
+                rnd.random() > 0.8,
+            ))
+        conn.executemany("""
+            INSERT INTO titles (title, anchor_word, main_theme, structure_type, performance_score, feedback_score, is_approved)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, titulos)
+        conn.executemany(
+            "INSERT INTO themes (title_id, theme) VALUES (?, ?)",
+            [(i + 1, rnd.choice(TEMAS)) for i in range(inicio, min(total, inicio + lote))]
+        )
+    conn.executemany(
+        "INSERT INTO successful_structures (structure_pattern, theme, success_count) VALUES (?, ?, ?)",
+        [(f"PADRAO {rnd.randint(0, 5000)}", rnd.choice(TEMAS), rnd.randint(1, 50)) for _ in range(20000)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def consultas(rnd: random.Random):
+    """Consultas equivalentes às do DBHandler, com parâmetros sorteados."""
+    return {
+        "get_similar_successful_titles": ("""
+            SELECT t.title, t.performance_score, t.feedback_score
+            FROM titles t
+            WHERE t.anchor_word = ?
+                AND t.main_theme = ?
+                AND (t.performance_score > 0.7 OR t.feedback_score > 0.7)
+            ORDER BY (t.performance_score + COALESCE(t.feedback_score, 0))/2 DESC
+            LIMIT ?
+        """, (rnd.choice(PALAVRAS), rnd.choice(TEMAS), 5)),
+        "get_title_id": (
+            "SELECT id FROM titles WHERE title = ?",
+            (f"Título sintético número {rnd.randint(0, 1000)} sobre {rnd.choice(PALAVRAS)}",)
+        ),
+        "get_theme_statistics": ("""
+            SELECT
+                COUNT(*) as total_titles,
+                AVG(performance_score) as avg_performance,
+                AVG(feedback_score) as avg_feedback,
+                COUNT(CASE WHEN is_approved = 1 THEN 1 END) as approved_count
+            FROM titles
+            WHERE main_theme = ?
+        """, (rnd.choice(TEMAS),)),
+        "get_successful_patterns": ("""
+            SELECT structure_pattern, success_count
+            FROM successful_structures
+            WHERE theme = ?
+            ORDER BY success_count DESC, last_used DESC
+            LIMIT ?
+        """, (rnd.choice(TEMAS), 5)),
+    }
+
+
+def medir(caminho: str, repeticoes: int, rotulo: str) -> dict:
+    conn = sqlite3.connect(caminho)
+    print(f"\n=== {rotulo} ===")
+    tempos = {}
+    for nome, (sql, params) in consultas(random.Random(0)).items():
+        plano = [linha[-1] for linha in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+        rnd = random.Random(1)
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            sql_rep, params_rep = consultas(rnd)[nome]
+            conn.execute(sql_rep, params_rep).fetchall()
+        tempos[nome] = (time.perf_counter() - inicio) / repeticoes
+        print(f"{nome}: {tempos[nome] * 1000:.2f} ms")
+        for linha in plano:
+            print(f"    {linha}")
+    conn.close()
+    return tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos índices do banco de aprendizado")
+    parser.add_argument("--titulos", type=int, default=500000)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, "titles_learning_bench.db")
+        inicio = time.perf_counter()
+        criar_banco(caminho, args.titulos)
+        print(f"Banco sintético com {args.titulos} títulos criado em {time.perf_counter() - inicio:.1f}s")
+
+        antes = medir(caminho, args.repeticoes, "Sem índices (versão 1 do esquema)")
+
+        conn = sqlite3.connect(caminho)
+        inicio = time.perf_counter()
+        aplicadas = aplicar_migracoes(conn)
+        conn.execute("ANALYZE")
+        conn.commit()
+        conn.close()
+        print(f"\nMigrações {aplicadas} aplicadas em {time.perf_counter() - inicio:.1f}s")
+
+        depois = medir(caminho, args.repeticoes, "Com as migrações aplicadas")
+
+        print("\n=== Resumo ===")
+        for nome in antes:
+            print(f"{nome}: {antes[nome] * 1000:.2f} ms -> {depois[nome] * 1000:.2f} ms ({antes[nome] / depois[nome]:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
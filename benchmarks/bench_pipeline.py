@@ -0,0 +1,303 @@
+# Benchmark de ponta a ponta do processamento (títulos -> conteúdos -> documentos -> planilha)
+#
+# Roda o ContentProcessor com os handlers reais ligados aos serviços falsos de src/fakes.py
+# (sem rede nem credenciais) para 10, 1.000 e 10.000 linhas e mede:
+#   - linhas por minuto e latência por linha (p50/p95, do início da linha até o link na planilha)
+#   - chamadas às APIs por linha (Sheets, Drive, Docs e Gemini)
+#   - tempo de CPU no processamento local: verificar_e_corrigir_titulo, converter_markdown_para_docs,
+#     substituir_links_markdown e as verificações de similaridade de títulos
+# O resultado é gravado em JSON e comparado com a linha de base em benchmarks/baseline_pipeline.json;
+# uma piora acima da tolerância em qualquer métrica faz o processo terminar com código 1.
+#
+# Uso: python benchmarks/bench_pipeline.py [--linhas 10,1000,10000] [--saida resultado.json]
+#                                          [--salvar-baseline] [--tolerancia 0.25] [--sem-pipeline]
+import argparse
+import contextlib
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+BASELINE_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline_pipeline.json')
+
+# Métricas comparadas com a linha de base: (caminho no resultado, True se maior é melhor)
+METRICAS_COMPARADAS = {
+    'linhas_por_minuto': ('linhas_por_minuto', True),
+    'latencia_p50_s': ('latencia_linha_s.p50', False),
+    'latencia_p95_s': ('latencia_linha_s.p95', False),
+    'chamadas_por_linha': ('chamadas_por_linha.total', False),
+    'cpu_local_ms_por_linha': ('cpu_local_ms_por_linha', False),
+}
+
+
+def preparar_ambiente(diretorio: str, rpm: int) -> None:
+    """Isola o benchmark (diário, spool, cache e banco em diretório temporário) antes de importar src."""
+    os.environ['RUNS_DIR'] = os.path.join(diretorio, 'runs')
+    os.environ['SPOOL_DIR'] = os.path.join(diretorio, 'spool')
+    os.environ['GEMINI_CACHE_ATIVO'] = 'false'
+    # Sem limite de taxa por padrão: o que se mede é o processamento, não a cota da conta
+    os.environ['GEMINI_RPM_LIMIT'] = str(rpm or 10 ** 9)
+    os.environ['GEMINI_TPM_LIMIT'] = str(10 ** 12)
+
+
+class MedidorCPU:
+    """Acumula o tempo de CPU (da thread que chama) gasto em cada função medida."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tempos: Dict[str, float] = {}
+        self.chamadas: Dict[str, int] = {}
+
+    def zerar(self) -> None:
+        with self._lock:
+            self.tempos = {}
+            self.chamadas = {}
+
+    def envolver(self, nome: str, funcao: Callable) -> Callable:
+        def medida(*args, **kwargs):
+            inicio = time.thread_time()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                decorrido = time.thread_time() - inicio
+                with self._lock:
+                    self.tempos[nome] = self.tempos.get(nome, 0.0) + decorrido
+                    self.chamadas[nome] = self.chamadas.get(nome, 0) + 1
+        return medida
+
+
+def instrumentar(medidor: MedidorCPU) -> None:
+    """Substitui as funções de processamento local pelas versões medidas, nos módulos que as usam."""
+    import src.docs_handler as docs_handler
+    import src.gemini_handler as gemini_handler
+
+    gemini_handler.verificar_e_corrigir_titulo = medidor.envolver(
+        'verificar_e_corrigir_titulo', gemini_handler.verificar_e_corrigir_titulo)
+    gemini_handler.substituir_links_markdown = medidor.envolver(
+        'substituir_links_markdown', gemini_handler.substituir_links_markdown)
+    docs_handler.converter_markdown_para_docs = medidor.envolver(
+        'converter_markdown_para_docs', docs_handler.converter_markdown_para_docs)
+    gemini_handler.GeminiHandler._titulo_similar_existente = medidor.envolver(
+        'similaridade_titulos', gemini_handler.GeminiHandler._titulo_similar_existente)
+
+
+def percentil(valores: List[float], p: float) -> Optional[float]:
+    """Percentil pelo método do posto mais próximo."""
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+def executar_cenario(linhas: int, args: argparse.Namespace, diretorio: str, medidor: MedidorCPU) -> Dict:
+    from src.db_handler import DBHandler
+    from src.docs_handler import DocsHandler
+    from src.fakes import AmbienteFake, PerfilServico, gerar_linhas_planilha
+    from src.instrumentacao import obter_instrumentacao
+    from src.gemini_handler import GeminiHandler
+    from src.processor import ContentProcessor
+    from src.run_journal import RunJournal, INICIO
+    from src.sheets_handler import SheetsHandler
+
+    inicio_linha: Dict[int, float] = {}
+    fim_linha: Dict[int, float] = {}
+
+    class ProcessadorMedido(ContentProcessor):
+        """Marca a entrada de cada linha no pipeline e o momento em que o link chega à planilha."""
+
+        def _etapa_titulos(self, itens, *a, **k):
+            agora = time.perf_counter()
+            for item in itens:
+                inicio_linha.setdefault(item['linha'], agora)
+            return super()._etapa_titulos(itens, *a, **k)
+
+        def _gravar_link_documento(self, c, *a, **k):
+            resultado = super()._gravar_link_documento(c, *a, **k)
+            fim_linha[c['linha']] = time.perf_counter()
+            return resultado
+
+    def perfil_google(semente: int) -> PerfilServico:
+        return PerfilServico(latencia=args.latencia_google, variacao_latencia=args.latencia_google / 2,
+                             taxa_erro=args.taxa_erro, semente=semente)
+
+    ambiente = AmbienteFake(
+        perfil_sheets=perfil_google(1), perfil_drive=perfil_google(2), perfil_docs=perfil_google(3),
+        perfil_gemini=PerfilServico(latencia=args.latencia_gemini, variacao_latencia=args.latencia_gemini / 2,
+                                    taxa_erro=args.taxa_erro, taxa_429=args.taxa_429, semente=4),
+        palavras_artigo=args.palavras, guardar_texto=False
+    )
+    ambiente.sheets.criar_planilha('bench', {'Links': gerar_linhas_planilha(linhas, semente=5)})
+    pasta = ambiente.drive.criar_pasta('bench')
+
+    sheets = SheetsHandler(service=ambiente.sheets, service_drive=ambiente.drive)
+    docs = DocsHandler(service_docs=ambiente.docs, service_drive=ambiente.drive)
+    gemini = GeminiHandler(model=ambiente.gemini, db=DBHandler(os.path.join(diretorio, f'titulos_{linhas}.db')))
+    df = sheets.carregar_dados_planilha('bench', 'Links')
+
+    processador = ProcessadorMedido(sheets, gemini, docs, max_workers=args.workers, politica_commit='auto',
+                                    pasta_destino=pasta, usar_pipeline=not args.sem_pipeline)
+    # Diário da execução, como em main_duas_etapas.py (o modo em duas etapas depende dele no modo 3)
+    journal = RunJournal()
+    journal.registrar(INICIO, parametros={'linhas': linhas})
+    # Importa antes da medição as bibliotecas que o programa só carrega no primeiro uso: a
+    # métrica de CPU por linha é a do processamento contínuo, sem o custo único da importação
+    from src.gemini_handler import _levenshtein_ratio, _unidecode
+    _levenshtein_ratio()
+    _unidecode()
+    medidor.zerar()
+    obter_instrumentacao().zerar()
+    cpu_inicio = time.process_time()
+    inicio = time.perf_counter()
+    # A saída por linha (prints e barras de progresso) distorceria a medição
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo), contextlib.redirect_stderr(nulo):
+        resumo = processador.processar_linhas(df, sheets.dynamic_column_map, modo_processamento='3',
+                                              spreadsheet_id='bench', sheet_name='Links', journal=journal)
+    duracao = time.perf_counter() - inicio
+    cpu_processo = time.process_time() - cpu_inicio
+
+    latencias = [fim - inicio_linha.get(linha, inicio) for linha, fim in fim_linha.items()]
+    concluidas = resumo['documentos_criados']
+    estatisticas_api = ambiente.estatisticas()
+    chamadas = {servico: dados['chamadas'] for servico, dados in estatisticas_api.items()}
+    chamadas['total'] = sum(chamadas.values())
+    cpu_local = sum(medidor.tempos.values())
+    endpoints = obter_instrumentacao().relatorio()['endpoints']
+
+    return {
+        'linhas': linhas,
+        'documentos_criados': concluidas,
+        'titulos_falhos': resumo['titulos_falhos'],
+        'conteudos_falhos': resumo['conteudos_falhos'],
+        'duracao_s': round(duracao, 3),
+        'linhas_por_minuto': round(concluidas / duracao * 60, 1) if duracao else None,
+        'latencia_linha_s': {
+            'p50': round(percentil(latencias, 50) or 0.0, 4),
+            'p95': round(percentil(latencias, 95) or 0.0, 4),
+            'max': round(max(latencias), 4) if latencias else 0.0,
+        },
+        'chamadas_por_linha': {k: round(v / max(1, concluidas), 3) for k, v in chamadas.items()},
+        'erros_api': {servico: dados['erros'] + dados['erros_429'] for servico, dados in estatisticas_api.items()},
+        'cpu_local_s': {nome: round(tempo, 4) for nome, tempo in sorted(medidor.tempos.items())},
+        'cpu_local_ms_por_linha': round(cpu_local * 1000 / max(1, linhas), 3),
+        'cpu_processo_s': round(cpu_processo, 3),
+        'etapas': resumo.get('etapas'),
+        'apis': {nome: {'chamadas': dados['chamadas'], 'p95_ms': dados['latencia_ms']['p95'],
+                        'tempo_total_s': dados['tempo_total_s']} for nome, dados in endpoints.items()},
+    }
+
+
+def _valor(resultado: Dict, caminho: str) -> Optional[float]:
+    for parte in caminho.split('.'):
+        if not isinstance(resultado, dict) or parte not in resultado:
+            return None
+        resultado = resultado[parte]
+    return resultado
+
+
+def comparar(resultado: Dict, baseline: Dict, tolerancia: float) -> List[str]:
+    """Compara os cenários em comum com a linha de base e retorna as regressões encontradas."""
+    if baseline.get('parametros') != resultado['parametros']:
+        print(f"Aviso: parâmetros diferentes da linha de base ({baseline.get('parametros')}); "
+              "a comparação pode não ser significativa")
+    regressoes = []
+    print(f"\n=== Comparação com a linha de base ({baseline.get('gerado_em', '?')}, tolerância {tolerancia:.0%}) ===")
+    for linhas, cenario in resultado['cenarios'].items():
+        base = baseline.get('cenarios', {}).get(linhas)
+        if not base:
+            print(f"{linhas} linha(s): sem linha de base")
+            continue
+        for nome, (caminho, maior_melhor) in METRICAS_COMPARADAS.items():
+            atual, anterior = _valor(cenario, caminho), _valor(base, caminho)
+            if atual is None or not anterior:
+                continue
+            variacao = (atual - anterior) / anterior
+            piora = -variacao if maior_melhor else variacao
+            marca = 'REGRESSÃO' if piora > tolerancia else 'ok'
+            print(f"{linhas:>6} linha(s) {nome:<24} {anterior:>12.3f} -> {atual:>12.3f} ({variacao:+.1%}) {marca}")
+            if piora > tolerancia:
+                regressoes.append(f"{linhas} linha(s): {nome} {anterior} -> {atual} ({variacao:+.1%})")
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de ponta a ponta do processamento com serviços falsos")
+    parser.add_argument("--linhas", default="10,1000,10000", help="Tamanhos da planilha, separados por vírgula")
+    parser.add_argument("--workers", type=int, default=4, help="Workers de geração de conteúdo")
+    parser.add_argument("--latencia-gemini", type=float, default=0.05, help="Latência média do Gemini falso (s)")
+    parser.add_argument("--latencia-google", type=float, default=0.005, help="Latência média de Sheets/Drive/Docs (s)")
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="Fração das chamadas que falham com erro 503")
+    parser.add_argument("--taxa-429", type=float, default=0.0, help="Fração das chamadas ao Gemini que recebem 429")
+    parser.add_argument("--palavras", type=int, default=600, help="Palavras por artigo gerado")
+    parser.add_argument("--rpm", type=int, default=0, help="Limite de requisições/min do Gemini (0 = sem limite)")
+    parser.add_argument("--sem-pipeline", action="store_true", help="Usa o processamento em duas etapas")
+    parser.add_argument("--saida", help="Arquivo JSON com os resultados (padrão: apenas a saída padrão)")
+    parser.add_argument("--baseline", default=BASELINE_PADRAO, help="Linha de base para comparação")
+    parser.add_argument("--salvar-baseline", action="store_true", help="Grava os resultados como nova linha de base")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Piora relativa aceita antes de acusar regressão")
+    args = parser.parse_args()
+
+    tamanhos = [int(t) for t in args.linhas.split(',') if t.strip()]
+    with tempfile.TemporaryDirectory() as diretorio:
+        preparar_ambiente(diretorio, args.rpm)
+        import logging
+        logging.getLogger('seo_linkbuilder').setLevel(logging.CRITICAL)
+        medidor = MedidorCPU()
+        instrumentar(medidor)
+
+        resultado = {
+            'gerado_em': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'maquina': platform.machine(),
+            'parametros': {
+                'workers': args.workers, 'latencia_gemini': args.latencia_gemini,
+                'latencia_google': args.latencia_google, 'taxa_erro': args.taxa_erro, 'taxa_429': args.taxa_429,
+                'palavras': args.palavras, 'rpm': args.rpm, 'pipeline': not args.sem_pipeline,
+            },
+            'cenarios': {},
+        }
+        for linhas in tamanhos:
+            cenario = executar_cenario(linhas, args, diretorio, medidor)
+            resultado['cenarios'][str(linhas)] = cenario
+            print(f"{linhas:>6} linha(s): {cenario['duracao_s']:.1f}s, {cenario['linhas_por_minuto']} linhas/min, "
+                  f"p50 {cenario['latencia_linha_s']['p50']:.3f}s, p95 {cenario['latencia_linha_s']['p95']:.3f}s, "
+                  f"{cenario['chamadas_por_linha']['total']} chamadas/linha, "
+                  f"CPU local {cenario['cpu_local_ms_por_linha']:.2f} ms/linha")
+
+    texto = json.dumps(resultado, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(texto + '\n')
+        print(f"Resultados gravados em {args.saida}")
+    else:
+        print(texto)
+
+    if args.salvar_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            f.write(texto + '\n')
+        print(f"Linha de base gravada em {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"Linha de base {args.baseline} não encontrada; use --salvar-baseline para criá-la")
+        return 0
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        regressoes = comparar(resultado, json.load(f), args.tolerancia)
+    if regressoes:
+        print(f"\n{len(regressoes)} regressão(ões) de desempenho:")
+        for regressao in regressoes:
+            print(f"  - {regressao}")
+        return 1
+    print("\nNenhuma regressão em relação à linha de base")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+# Benchmark e verificação do reescritor de termos proibidos
+#
+# Compara `verificar_conteudo_proibido` (alternância compilada, uma passada) com a
+# implementação anterior (um re.sub por padrão) num corpus de referência e mede o
+# tempo médio por artigo de ~2.000 palavras.
+#
+# Uso: python benchmarks/bench_termos_proibidos.py [--repeticoes 50]
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.gemini_handler import TERMOS_PROIBIDOS, verificar_conteudo_proibido
+
+
+def verificar_conteudo_proibido_sequencial(texto: str):
+    """Implementação anterior: aplica cada padrão em sequência sobre o texto inteiro."""
+    texto_modificado = texto
+    termos_substituidos = []
+    for padrao, substituto in TERMOS_PROIBIDOS.items():
+        ocorrencias = re.findall(padrao, texto_modificado, re.IGNORECASE)
+        if ocorrencias:
+            termos_substituidos.extend(ocorrencias)
+            texto_modificado = re.sub(padrao, substituto, texto_modificado, flags=re.IGNORECASE)
+    return texto_modificado, termos_substituidos
+
+
+PALAVRAS_COMUNS = (
+    "o jogo de futebol tem muitas estratégias e a torcida acompanha cada rodada com atenção "
+    "enquanto os jogadores buscam diversão responsável no fim de semana com amigos e família "
+    "a plataforma oferece partidas rápidas regras simples e uma comunidade animada"
+).split()
+
+
+def _variacoes_caixa(termo: str):
+    return [termo, termo.upper(), termo.capitalize(), termo.title()]
+
+
+def gerar_corpus(semente: int = 42, quantidade: int = 200):
+    """Gera textos com todos os termos (em várias caixas e pontuações) misturados a texto comum."""
+    rnd = random.Random(semente)
+    termos = [padrao.replace(r'\b', '') for padrao in TERMOS_PROIBIDOS]
+    # Casos de borda: termos dentro de outras palavras, sobreposições e termos combinados
+    corpus = [
+        "",
+        "Fique rico jogando? Não: fique RICO apenas de experiência.",
+        "ganhar dinheiro fácil e ganhar dinheiro real são promessas vazias",
+        "Ganhos, lucros e rentabilidade; investimento, investidor ou investir.",
+        "apostar tudo, apostar alto e apostas altas não são para o menor de idade",
+        "ricochete, ganharam, lucratividade, politicamente, criançada, aplicações",
+        "política/político (partido) — eleição: votar!",
+    ]
+    for _ in range(quantidade):
+        partes = []
+        for _ in range(rnd.randint(20, 120)):
+            if rnd.random() < 0.15:
+                partes.append(rnd.choice(_variacoes_caixa(rnd.choice(termos))))
+            else:
+                partes.append(rnd.choice(PALAVRAS_COMUNS))
+            if rnd.random() < 0.1:
+                partes[-1] += rnd.choice([",", ".", "!", "?", ":", ";"])
+        corpus.append(" ".join(partes))
+    return corpus
+
+
+def gerar_artigo(palavras: int = 2000, semente: int = 7) -> str:
+    rnd = random.Random(semente)
+    termos = [padrao.replace(r'\b', '') for padrao in TERMOS_PROIBIDOS]
+    partes = []
+    for i in range(palavras):
+        partes.append(rnd.choice(termos) if rnd.random() < 0.02 else rnd.choice(PALAVRAS_COMUNS))
+        if i % 60 == 59:
+            partes.append("\n\n")
+    return " ".join(partes)
+
+
+def medir(funcao, texto: str, repeticoes: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao(texto)
+    return (time.perf_counter() - inicio) / repeticoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeticoes", type=int, default=50)
+    args = parser.parse_args()
+
+    corpus = gerar_corpus()
+    divergencias = 0
+    for texto in corpus:
+        if verificar_conteudo_proibido(texto) != verificar_conteudo_proibido_sequencial(texto):
+            divergencias += 1
+            print(f"DIVERGÊNCIA: {texto[:80]!r}")
+    print(f"Corpus de referência: {len(corpus)} textos, {divergencias} divergência(s)")
+
+    artigo = gerar_artigo()
+    tempo_antigo = medir(verificar_conteudo_proibido_sequencial, artigo, args.repeticoes)
+    tempo_novo = medir(verificar_conteudo_proibido, artigo, args.repeticoes)
+    print(f"Artigo de {len(artigo.split())} palavras:")
+    print(f"  sequencial (re.sub por padrão): {tempo_antigo * 1000:.3f} ms")
+    print(f"  passada única (compilado):      {tempo_novo * 1000:.3f} ms")
+    print(f"  aceleração: {tempo_antigo / tempo_novo:.1f}x")
+    return 1 if divergencias else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
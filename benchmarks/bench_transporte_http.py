@@ -0,0 +1,303 @@
+# Benchmark do transporte HTTP dos serviços do Google na criação de documentos
+#
+# Sobe um servidor HTTP/1.1 local na frente dos serviços falsos do Drive e do Docs (src/fakes.py)
+# e cria documentos com o DocsHandler real, usando os clientes reais do googleapiclient apontados
+# para ele. Compara três transportes:
+#   - sequencial: uma thread e um httplib2.Http por serviço (o transporte padrão do googleapiclient)
+#   - paralelo_sem_pool: várias threads, cada requisição com um httplib2.Http novo (seguro entre
+#     threads, mas sem keep-alive: uma conexão nova por requisição)
+#   - paralelo_com_pool: várias threads com o PoolHttp de src/transporte_http.py (keep-alive e
+#     conexões limitadas)
+# Cada conexão nova espera --latencia-conexao segundos no servidor, simulando o handshake TLS.
+#
+# Uso: python benchmarks/bench_transporte_http.py [--documentos 100] [--workers 8] [--conexoes 8]
+#                                                 [--latencia 0.1] [--latencia-conexao 0.15] [--saida resultado.json]
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+from urllib.parse import parse_qs, urljoin, urlparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bench_pipeline import percentil  # noqa: E402
+
+PALAVRAS = ("apostas", "rodada", "estratégia", "bônus", "cassino", "mesa", "odds", "campeonato",
+            "jogadores", "probabilidade", "sessão", "banca", "partida", "resultado", "regras")
+
+
+class ServidorFake(ThreadingHTTPServer):
+    """Servidor HTTP local que responde como o Drive e o Docs, contando as conexões abertas."""
+
+    daemon_threads = True
+
+    def __init__(self, ambiente, latencia_conexao: float):
+        super().__init__(('127.0.0.1', 0), ManipuladorFake)
+        self.ambiente = ambiente
+        self.latencia_conexao = latencia_conexao
+        self._lock = threading.Lock()
+        self.conexoes = 0
+        self.abertas = 0
+        self.pico_abertas = 0
+        self.requisicoes = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/"
+
+    def zerar(self) -> None:
+        with self._lock:
+            self.conexoes = self.requisicoes = 0
+            self.pico_abertas = self.abertas
+
+    def conexao_aberta(self) -> None:
+        with self._lock:
+            self.conexoes += 1
+            self.abertas += 1
+            self.pico_abertas = max(self.pico_abertas, self.abertas)
+
+    def conexao_fechada(self) -> None:
+        with self._lock:
+            self.abertas -= 1
+
+
+class ManipuladorFake(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        self.server.conexao_aberta()
+        if self.server.latencia_conexao:
+            time.sleep(self.server.latencia_conexao)
+
+    def finish(self):
+        try:
+            super().finish()
+        finally:
+            self.server.conexao_fechada()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self._responder('GET')
+
+    def do_POST(self):
+        self._responder('POST')
+
+    def _responder(self, metodo: str) -> None:
+        from googleapiclient.errors import HttpError
+
+        with self.server._lock:
+            self.server.requisicoes += 1
+        url = urlparse(self.path)
+        consulta = {chave: valores[0] for chave, valores in parse_qs(url.query).items()}
+        tamanho = int(self.headers.get('Content-Length') or 0)
+        corpo = json.loads(self.rfile.read(tamanho) or b'{}') if tamanho else {}
+        partes = [parte for parte in url.path.split('/') if parte]
+        drive, docs = self.server.ambiente.drive, self.server.ambiente.docs
+        try:
+            if partes[:3] == ['drive', 'v3', 'files']:
+                if metodo == 'POST' and len(partes) == 3:
+                    resposta = drive.files().create(body=corpo, fields=consulta.get('fields', 'id')).execute()
+                elif metodo == 'GET' and len(partes) == 4:
+                    resposta = drive.files().get(fileId=partes[3], fields=consulta.get('fields', '')).execute()
+                elif metodo == 'POST' and len(partes) == 5 and partes[4] == 'permissions':
+                    resposta = drive.permissions().create(fileId=partes[3], body=corpo).execute()
+                else:
+                    return self._enviar(404, {'error': {'message': url.path}})
+            elif partes[:2] == ['v1', 'documents'] and metodo == 'POST' and partes[-1].endswith(':batchUpdate'):
+                documento = partes[2].split(':')[0]
+                resposta = docs.documents().batchUpdate(documentId=documento, body=corpo).execute()
+            else:
+                return self._enviar(404, {'error': {'message': url.path}})
+        except HttpError as e:
+            return self._enviar(e.resp.status, {'error': {'code': e.resp.status, 'message': str(e)}})
+        self._enviar(200, resposta)
+
+    def _enviar(self, status: int, dados: Dict[str, Any]) -> None:
+        conteudo = json.dumps(dados).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(conteudo)))
+        self.end_headers()
+        self.wfile.write(conteudo)
+
+
+class HttpPorRequisicao:
+    """Transporte seguro entre threads sem pool: um httplib2.Http (e uma conexão) novo por requisição."""
+
+    credentials = None
+
+    def request(self, *args, **kwargs):
+        from googleapiclient.http import build_http
+
+        http = build_http()
+        try:
+            return http.request(*args, **kwargs)
+        finally:
+            http.close()
+
+    def close(self) -> None:
+        pass
+
+
+def construir_servicos(url_servidor: str, http_docs, http_drive):
+    """Clientes reais do Docs e do Drive (documentos de discovery em cache) apontados para o servidor local."""
+    from googleapiclient.discovery import build_from_document
+    from src.auth_handler import obter_documento_discovery
+    from src.instrumentacao_http import HttpRequestInstrumentada
+
+    servicos = []
+    for (api, versao), http in ((('docs', 'v1'), http_docs), (('drive', 'v3'), http_drive)):
+        documento = obter_documento_discovery(api, versao)
+        servicos.append(build_from_document(
+            documento, http=http, requestBuilder=HttpRequestInstrumentada,
+            client_options={'api_endpoint': urljoin(url_servidor, documento['servicePath'])}
+        ))
+    return servicos
+
+
+def gerar_artigo(aleatorio: random.Random, titulo: str, palavras: int) -> str:
+    paragrafos = []
+    while palavras > 0:
+        tamanho = min(palavras, aleatorio.randint(40, 90))
+        paragrafos.append(" ".join(aleatorio.choice(PALAVRAS) for _ in range(tamanho)).capitalize() + ".")
+        palavras -= tamanho
+    return f"# {titulo}\n\n" + "\n\n".join(paragrafos)
+
+
+def executar_cenario(nome: str, servidor: ServidorFake, pasta: str, args: argparse.Namespace) -> Dict:
+    from google.auth.credentials import AnonymousCredentials
+    from googleapiclient.http import build_http
+    from src.docs_handler import DocsHandler
+    from src.transporte_http import PoolHttp
+
+    pool = None
+    workers = args.workers
+    if nome == 'sequencial':
+        workers = 1
+        http_docs, http_drive = build_http(), build_http()
+    elif nome == 'paralelo_sem_pool':
+        http_docs = http_drive = HttpPorRequisicao()
+    else:
+        # AnonymousCredentials: passa pelo AuthorizedHttp como em produção, sem cabeçalho de autorização
+        http_docs = http_drive = pool = PoolHttp(AnonymousCredentials(), tamanho=args.conexoes)
+    service_docs, service_drive = construir_servicos(servidor.url, http_docs, http_drive)
+    docs = DocsHandler(service_docs=service_docs, service_drive=service_drive)
+
+    aleatorio = random.Random(7)
+    artigos = [gerar_artigo(aleatorio, f"Documento {i} do benchmark", args.palavras) for i in range(args.documentos)]
+    latencias: List[float] = []
+    falhas = 0
+    lock = threading.Lock()
+
+    def criar(indice: int) -> None:
+        nonlocal falhas
+        inicio = time.perf_counter()
+        try:
+            docs.criar_documento(f"Documento {indice}", artigos[indice], f"bench_{nome}_{indice}",
+                                 {'palavra': 'apostas', 'url': 'https://exemplo.com.br'}, target_folder_id=pasta)
+        except Exception:
+            with lock:
+                falhas += 1
+            return
+        with lock:
+            latencias.append(time.perf_counter() - inicio)
+
+    servidor.zerar()
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(criar, range(args.documentos)))
+    duracao = time.perf_counter() - inicio
+    for http in {id(h): h for h in (http_docs, http_drive)}.values():
+        http.close()
+
+    resultado = {
+        'workers': workers,
+        'duracao_s': round(duracao, 3),
+        'documentos_por_minuto': round(len(latencias) / duracao * 60, 1) if duracao else None,
+        'falhas': falhas,
+        'latencia_documento_s': {
+            'p50': round(percentil(latencias, 50) or 0, 4),
+            'p95': round(percentil(latencias, 95) or 0, 4),
+        },
+        'requisicoes': servidor.requisicoes,
+        'conexoes_abertas': servidor.conexoes,
+        'pico_conexoes_simultaneas': servidor.pico_abertas,
+    }
+    if pool is not None:
+        resultado['pool'] = pool.estatisticas()
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do transporte HTTP na criação de documentos com serviços falsos")
+    parser.add_argument("--documentos", type=int, default=100, help="Documentos criados em cada cenário")
+    parser.add_argument("--workers", type=int, default=8, help="Threads dos cenários paralelos")
+    parser.add_argument("--conexoes", type=int, default=8, help="Tamanho do PoolHttp (requisições simultâneas)")
+    parser.add_argument("--latencia", type=float, default=0.1, help="Latência média de cada chamada ao Drive/Docs falso (s)")
+    parser.add_argument("--latencia-conexao", type=float, default=0.15,
+                        help="Espera do servidor a cada conexão nova, simulando o handshake TLS (s)")
+    parser.add_argument("--palavras", type=int, default=600, help="Palavras por documento")
+    parser.add_argument("--saida", help="Arquivo JSON com os resultados (padrão: apenas a saída padrão)")
+    args = parser.parse_args()
+
+    import logging
+    logging.getLogger('seo_linkbuilder').setLevel(logging.CRITICAL)
+    from src.fakes import AmbienteFake, PerfilServico
+
+    perfil = dict(latencia=args.latencia, variacao_latencia=args.latencia / 2)
+    ambiente = AmbienteFake(perfil_drive=PerfilServico(semente=1, **perfil), perfil_docs=PerfilServico(semente=2, **perfil),
+                            guardar_texto=False)
+    pasta = ambiente.drive.criar_pasta('bench')
+    servidor = ServidorFake(ambiente, args.latencia_conexao)
+    threading.Thread(target=servidor.serve_forever, name="servidor-fake", daemon=True).start()
+
+    resultado = {
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'maquina': platform.machine(),
+        'parametros': {
+            'documentos': args.documentos, 'workers': args.workers, 'conexoes': args.conexoes,
+            'latencia': args.latencia, 'latencia_conexao': args.latencia_conexao, 'palavras': args.palavras,
+        },
+        'cenarios': {},
+    }
+    try:
+        for nome in ('sequencial', 'paralelo_sem_pool', 'paralelo_com_pool'):
+            cenario = executar_cenario(nome, servidor, pasta, args)
+            resultado['cenarios'][nome] = cenario
+            print(f"{nome:<18} {cenario['duracao_s']:7.2f}s, {cenario['documentos_por_minuto']:8.1f} docs/min, "
+                  f"p50 {cenario['latencia_documento_s']['p50']:.3f}s, p95 {cenario['latencia_documento_s']['p95']:.3f}s, "
+                  f"{cenario['conexoes_abertas']} conexões ({cenario['pico_conexoes_simultaneas']} simultâneas), "
+                  f"{cenario['falhas']} falha(s)")
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+    sequencial = resultado['cenarios']['sequencial']['duracao_s']
+    for nome in ('paralelo_sem_pool', 'paralelo_com_pool'):
+        duracao = resultado['cenarios'][nome]['duracao_s']
+        resultado['cenarios'][nome]['aceleracao'] = round(sequencial / duracao, 2) if duracao else None
+    print(f"\nAceleração sobre o sequencial: sem pool {resultado['cenarios']['paralelo_sem_pool']['aceleracao']}x, "
+          f"com pool {resultado['cenarios']['paralelo_com_pool']['aceleracao']}x")
+
+    texto = json.dumps(resultado, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(texto + '\n')
+        print(f"Resultados gravados em {args.saida}")
+    return 0 if all(c['falhas'] == 0 for c in resultado['cenarios'].values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+# Importa para o banco de aprendizado os títulos já existentes em uma aba da planilha
+import argparse
+import logging
+import time
+
+from src.utils import configurar_logging
+from src.config import SPREADSHEET_ID, SHEET_NAME
+from src.sheets_handler import SheetsHandler
+from src.docs_handler import DocsHandler
+from src.db_handler import DBHandler
+from src.gemini_handler import montar_registro_titulo
+
+
+def importar_titulos(spreadsheet_id: str, sheet_name: str, db_path: str, simular: bool = False) -> int:
+    """
+    Lê a coluna de títulos da aba e grava no banco de aprendizado os títulos que ainda não estão nele.
+
+    Returns:
+        Quantidade de títulos importados
+    """
+    logger = logging.getLogger('seo_linkbuilder.importar_titulos')
+    inicio = time.perf_counter()
+
+    sheets = SheetsHandler()
+    df = sheets.carregar_dados_planilha(spreadsheet_id, sheet_name)
+    if df is None:
+        logger.error("Erro ao carregar dados da planilha")
+        return 0
+
+    db = DBHandler(db_path)
+    existentes = set(db.get_all_titles())
+
+    registros = []
+    for _, row in df.iterrows():
+        dados = sheets.extrair_dados_linha(row, sheets.dynamic_column_map)
+        titulo = str(dados.get('titulo', '') or '').strip()
+        if not titulo or titulo.lower() == "sem titulo" or titulo in existentes:
+            continue
+        registros.append(montar_registro_titulo(titulo, dados.get('palavra_ancora', '')))
+        existentes.add(titulo)
+
+    logger.info(f"{len(registros)} título(s) novo(s) encontrado(s) em {len(df)} linha(s) da aba '{sheet_name}'")
+    if simular:
+        for registro in registros[:20]:
+            print(f"- {registro['title']} ({registro['main_theme']})")
+        print(f"Simulação: {len(registros)} título(s) seriam importados.")
+        return 0
+
+    db.add_titles_bulk(registros)
+    logger.info(f"Importação concluída em {time.perf_counter() - inicio:.1f}s")
+    return len(registros)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa os títulos de uma aba da planilha para o banco de aprendizado")
+    parser.add_argument("--planilha", default=SPREADSHEET_ID, help="ID ou URL da planilha (padrão: SPREADSHEET_ID do .env)")
+    parser.add_argument("--aba", default=SHEET_NAME, help="Nome da aba (padrão: SHEET_NAME do .env)")
+    parser.add_argument("--db", default="data/titles_learning.db", help="Caminho do banco de aprendizado")
+    parser.add_argument("--simular", action="store_true", help="Apenas mostra o que seria importado")
+    args = parser.parse_args()
+
+    if not args.planilha or not args.aba:
+        parser.error("Informe --planilha e --aba (ou defina SPREADSHEET_ID e SHEET_NAME no .env)")
+
+    configurar_logging()
+    spreadsheet_id = DocsHandler.extrair_id_da_url(args.planilha) or args.planilha
+    total = importar_titulos(spreadsheet_id, args.aba, args.db, simular=args.simular)
+    if not args.simular:
+        print(f"{total} título(s) importado(s) para {args.db}")
+
+
+if __name__ == "__main__":
+    main()
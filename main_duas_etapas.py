@@ -1,10 +1,13 @@
 # Ponto de entrada principal do script
+from __future__ import annotations
+
 import os
+import sys
+import argparse
 import time
 import logging
-import pandas as pd
 import asyncio
-from typing import Dict, List, Tuple, Optional
+from typing import TYPE_CHECKING, Dict, List, Tuple, Optional
 from datetime import datetime
 from collections import Counter
 import json
@@ -15,8 +18,15 @@ from src.sheets_handler import SheetsHandler
 from src.gemini_handler import GeminiHandler
 from src.docs_handler import DocsHandler
 from src.menu_handler import MenuHandler
-from src.processor import ContentProcessor
-from src.config import config
+from src.processor import ContentProcessor, POLITICAS_COMMIT
+from src.run_journal import RunJournal, INICIO
+from src.instrumentacao import obter_instrumentacao
+from src.orcamento import obter_governador
+from src.perfil_inicializacao import medir_inicializacao, formatar_relatorio
+from src.config import config, SHEET_NAME, DRIVE_FOLDER_ID
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 def carregar_ultima_selecao() -> Dict:
     """Carrega a última seleção salva"""
@@ -307,67 +317,123 @@ async def processar_linhas(sheets: SheetsHandler, gemini: GeminiHandler, docs: D
         logger.error(f"Erro no processamento de linhas: {str(e)}")
         return 0
 
-async def main(modo_teste: bool = False):
-    """Função principal do script"""
+def selecionar_parametros(menu_handler: MenuHandler, logger: logging.Logger) -> Optional[Dict]:
+    """Coleta pelos menus os parâmetros da execução (None se o usuário cancelar)"""
+    # Carrega última seleção
+    ultima_selecao = carregar_ultima_selecao()
+
+    # Menu de seleção da planilha
+    selecao = menu_handler.apresentar_menu_planilha(ultima_selecao)
+    if not selecao:
+        logger.info("Operação cancelada pelo usuário")
+        return None
+
+    spreadsheet_id, sheet_name, drive_folder_id = selecao
+
+    # Menu de processamento
+    modo_processamento = menu_handler.apresentar_menu_processamento()
+    if modo_processamento == "0":
+        logger.info("Operação cancelada pelo usuário")
+        return None
+
+    # Menu de quantidade
+    limite_linhas = menu_handler.apresentar_menu_quantidade()
+    if limite_linhas is None:  # Verifica se foi cancelado
+        logger.info("Operação cancelada pelo usuário")
+        return None
+        
+    # Converte -1 para None para processar tudo
+    if limite_linhas == -1:
+        limite_linhas = None
+
+    # Perguntar se deseja começar de um ID específico
+    id_inicial = None
+    usar_id_inicial = input("Deseja começar a partir de um ID específico? (S/N): ").strip().upper()
+    if usar_id_inicial == 'S':
+        id_inicial = input("Digite o ID inicial: ").strip()
+        if not id_inicial:
+            id_inicial = None
+
+    return {
+        'spreadsheet_id': spreadsheet_id,
+        'sheet_name': sheet_name,
+        'drive_folder_id': drive_folder_id,
+        'modo_processamento': modo_processamento,
+        'limite_linhas': limite_linhas,
+        'id_inicial': id_inicial
+    }
+
+async def main(modo_teste: bool = False, run_id_retomada: Optional[str] = None,
+               parametros_cli: Optional[Dict] = None, politica_commit: str = "perguntar",
+               max_workers: Optional[int] = None) -> Optional[Dict]:
+    """
+    Função principal do script.
+
+    Args:
+        modo_teste: Repassado ao processador
+        run_id_retomada: Retoma uma execução interrompida a partir do seu diário
+        parametros_cli: Parâmetros da execução vindos da linha de comando (modo não interativo,
+            sem menus); mesmas chaves de `selecionar_parametros`
+        politica_commit: "perguntar", "auto" ou "nunca" (ver ContentProcessor)
+        max_workers: Gerações de conteúdo simultâneas (None = GEMINI_MAX_WORKERS)
+
+    Returns:
+        Resumo da execução (ver ContentProcessor.resumo) ou None se foi cancelada
+    """
     try:
         # Configuração inicial
         configurar_logging()
         logger = logging.getLogger('seo_linkbuilder.main')
         logger.info("Iniciando execução do script")
 
-        # Inicialização dos handlers
+        # Só o handler da planilha é criado antes dos menus (e seus serviços, no primeiro uso);
+        # o Gemini e o Docs esperam a escolha dos parâmetros
         sheets_handler = SheetsHandler()
+
+        if run_id_retomada:
+            # Retomada: os parâmetros vêm do diário da execução original
+            journal = RunJournal.abrir(run_id_retomada)
+            if journal.finalizado:
+                print(f"A execução {run_id_retomada} já foi concluída; só as pendências (gravações na planilha e conteúdos adiados) serão processadas.")
+            parametros = journal.parametros
+            logger.info(f"Retomando a execução {journal.run_id}: {parametros}")
+        else:
+            if parametros_cli:
+                parametros = parametros_cli
+            else:
+                parametros = selecionar_parametros(MenuHandler(sheets_handler), logger)
+                if not parametros:
+                    return None
+            journal = RunJournal()
+            journal.registrar(INICIO, parametros=parametros)
+            print(f"\nExecução {journal.run_id} (se for interrompida, retome com: python main_duas_etapas.py --resume {journal.run_id})")
+
+        spreadsheet_id = parametros['spreadsheet_id']
+        sheet_name = parametros['sheet_name']
+        drive_folder_id = parametros['drive_folder_id']
+        modo_processamento = parametros['modo_processamento']
+        limite_linhas = parametros['limite_linhas']
+        id_inicial = parametros['id_inicial']
+
         gemini_handler = GeminiHandler()
         docs_handler = DocsHandler()
-        menu_handler = MenuHandler(sheets_handler)
-        processor = ContentProcessor(sheets_handler, gemini_handler, docs_handler)
-
-        # Carrega última seleção
-        ultima_selecao = carregar_ultima_selecao()
-
-        # Menu de seleção da planilha
-        selecao = menu_handler.apresentar_menu_planilha(ultima_selecao)
-        if not selecao:
-            logger.info("Operação cancelada pelo usuário")
-            return
-
-        spreadsheet_id, sheet_name, drive_folder_id = selecao
-
-        # Menu de processamento
-        modo_processamento = menu_handler.apresentar_menu_processamento()
-        if modo_processamento == "0":
-            logger.info("Operação cancelada pelo usuário")
-            return
-
-        # Menu de quantidade
-        limite_linhas = menu_handler.apresentar_menu_quantidade()
-        if limite_linhas is None:  # Verifica se foi cancelado
-            logger.info("Operação cancelada pelo usuário")
-            return
-            
-        # Converte -1 para None para processar tudo
-        if limite_linhas == -1:
-            limite_linhas = None
-
-        # Perguntar se deseja começar de um ID específico
-        id_inicial = None
-        usar_id_inicial = input("Deseja começar a partir de um ID específico? (S/N): ").strip().upper()
-        if usar_id_inicial == 'S':
-            id_inicial = input("Digite o ID inicial: ").strip()
-            if not id_inicial:
-                id_inicial = None
+        processor = ContentProcessor(
+            sheets_handler, gemini_handler, docs_handler,
+            max_workers=max_workers,
+            politica_commit=politica_commit,
+            pasta_destino=drive_folder_id
+        )
 
         # Carrega dados da planilha
         df = sheets_handler.carregar_dados_planilha(spreadsheet_id, sheet_name)
         if df is None:
-            logger.error("Erro ao carregar dados da planilha")
-            return
+            raise RuntimeError(f"Erro ao carregar dados da planilha {spreadsheet_id} (aba '{sheet_name}')")
 
         # Mapeamento dinâmico de colunas
         dynamic_column_map = sheets_handler.dynamic_column_map
 
         # Processa as linhas
-        processor.processar_linhas(
+        resumo = processor.processar_linhas(
             df=df,
             dynamic_column_map=dynamic_column_map,
             modo_teste=modo_teste,
@@ -375,21 +441,114 @@ async def main(modo_teste: bool = False):
             modo_processamento=modo_processamento,
             spreadsheet_id=spreadsheet_id,
             sheet_name=sheet_name,
-            id_inicial=id_inicial
+            id_inicial=id_inicial,
+            journal=journal
         )
 
-        # Salva última seleção
-        salvar_ultima_selecao({
-            'spreadsheet_id': spreadsheet_id,
-            'sheet_name': sheet_name,
-            'drive_folder_id': drive_folder_id
-        })
+        # Relatório das chamadas às APIs: tempo, tentativas, bytes, tokens e custo por endpoint
+        instrumentacao = obter_instrumentacao()
+        caminho_relatorio = os.path.splitext(journal.caminho)[0] + "_apis"
+        if run_id_retomada:
+            caminho_relatorio += time.strftime("_%Y%m%d-%H%M%S")
+        resumo['relatorio_apis'] = instrumentacao.exportar(caminho_relatorio)
+        print("\n" + instrumentacao.resumo_texto())
+
+        # Salva última seleção (apenas quando escolhida pelos menus)
+        if not parametros_cli and not run_id_retomada:
+            salvar_ultima_selecao({
+                'spreadsheet_id': spreadsheet_id,
+                'sheet_name': sheet_name,
+                'drive_folder_id': drive_folder_id
+            })
 
         logger.info("Processamento concluído com sucesso")
+        return resumo
 
     except Exception as e:
-        logger.error(f"Erro durante a execução: {e}")
+        logging.getLogger('seo_linkbuilder.main').error(f"Erro durante a execução: {e}")
         raise
 
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Geração de títulos e conteúdos em duas etapas. Sem argumentos, usa os menus interativos; "
+                    "com --planilha (ou --headless), roda sem interação e termina com um resumo em JSON."
+    )
+    parser.add_argument("--resume", metavar="RUN_ID", help="Retoma uma execução interrompida a partir do seu diário")
+    parser.add_argument("--headless", action="store_true", help="Roda sem menus nem perguntas (implícito com --planilha)")
+    parser.add_argument("--planilha", help="ID ou URL da planilha")
+    parser.add_argument("--aba", default=SHEET_NAME, help="Nome da aba (padrão: SHEET_NAME do .env)")
+    parser.add_argument("--pasta", default=DRIVE_FOLDER_ID, help="ID da pasta do Drive para os documentos (padrão: DRIVE_FOLDER_ID do .env)")
+    parser.add_argument("--modo", choices=["1", "2", "3"], default="3",
+                        help="1 = só títulos, 2 = só conteúdos, 3 = títulos e conteúdos (padrão)")
+    parser.add_argument("--limite", type=int, help="Número máximo de linhas a processar (padrão: todas)")
+    parser.add_argument("--id-inicial", help="ID da linha a partir da qual processar")
+    parser.add_argument("--workers", type=int, help="Gerações de conteúdo simultâneas (padrão: GEMINI_MAX_WORKERS)")
+    parser.add_argument("--commit", choices=list(POLITICAS_COMMIT),
+                        help="Criação dos documentos: perguntar (padrão interativo), auto (padrão sem interação) "
+                             "ou nunca (mantém os conteúdos no spool para um --resume posterior)")
+    parser.add_argument("--orcamento-usd", type=float, metavar="VALOR",
+                        help="Custo máximo do Gemini nesta execução, em dólares (padrão: ORCAMENTO_LIMITE_USD)")
+    parser.add_argument("--orcamento-brl", type=float, metavar="VALOR",
+                        help="Custo máximo do Gemini nesta execução, em reais (padrão: ORCAMENTO_LIMITE_BRL)")
+    parser.add_argument("--saida-json", metavar="ARQUIVO", help="Grava também o resumo JSON neste arquivo")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Mede o tempo de abertura do programa (importações por pacote) e sai")
+    return parser
+
+def executar_sem_interacao(args: argparse.Namespace, parser: argparse.ArgumentParser) -> int:
+    """Executa o pipeline inteiro sem menus e imprime o resumo em JSON (última linha da saída)"""
+    if args.commit == "perguntar":
+        parser.error("--commit perguntar não pode ser usado sem interação")
+    parametros_cli = None
+    if not args.resume:
+        if not args.planilha or not args.aba:
+            parser.error("Informe --planilha e --aba (ou defina SHEET_NAME no .env)")
+        if args.limite is not None and args.limite <= 0:
+            parser.error("--limite deve ser maior que zero")
+        parametros_cli = {
+            'spreadsheet_id': DocsHandler.extrair_id_da_url(args.planilha) or args.planilha,
+            'sheet_name': args.aba,
+            'drive_folder_id': args.pasta,
+            'modo_processamento': args.modo,
+            'limite_linhas': args.limite,
+            'id_inicial': args.id_inicial
+        }
+
+    inicio = time.perf_counter()
+    codigo = 0
+    try:
+        resumo = asyncio.run(main(
+            run_id_retomada=args.resume,
+            parametros_cli=parametros_cli,
+            politica_commit=args.commit or "auto",
+            max_workers=args.workers
+        )) or {}
+        if (resumo.get('orcamento') or {}).get('excedido'):
+            # Interrompida com o diário intacto: as linhas restantes são processadas com --resume
+            resumo['status'] = 'orcamento_excedido'
+            codigo = 2
+        else:
+            resumo['status'] = 'ok'
+    except Exception as e:
+        resumo = {'status': 'erro', 'erro': str(e)}
+        codigo = 1
+    resumo['duracao_s'] = round(time.perf_counter() - inicio, 1)
+
+    saida = json.dumps(resumo, ensure_ascii=False)
+    if args.saida_json:
+        with open(args.saida_json, 'w', encoding='utf-8') as f:
+            f.write(saida + "\n")
+    print(saida, flush=True)
+    return codigo
+
 if __name__ == "__main__":
-    asyncio.run(main())         
\ No newline at end of file
+    parser = criar_parser()
+    args = parser.parse_args()
+    if args.profile_startup:
+        print(formatar_relatorio(medir_inicializacao()))
+        sys.exit(0)
+    if args.orcamento_usd is not None or args.orcamento_brl is not None:
+        obter_governador().definir_limite(args.orcamento_usd, args.orcamento_brl)
+    if args.headless or args.planilha:
+        sys.exit(executar_sem_interacao(args, parser))
+    asyncio.run(main(run_id_retomada=args.resume, politica_commit=args.commit or "perguntar", max_workers=args.workers))
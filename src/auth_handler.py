@@ -1,13 +1,16 @@
 # Módulo para lidar com a autenticação das APIs do Google
+# As bibliotecas do Google são importadas dentro das funções: carregá-las leva alguns
+# décimos de segundo, que só devem ser pagos quando um serviço for de fato criado
 import os
 import json
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
 import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
 
-from src.config import CREDENTIALS_FILE_PATH
+from src.config import CREDENTIALS_FILE_PATH, DISCOVERY_CACHE_DIR
+
+# Documento de discovery de uma API que não está no cache local nem no googleapiclient
+URL_DISCOVERY = "https://www.googleapis.com/discovery/v1/apis/{api}/{versao}/rest"
 
 # Se modifica essas permissões, delete o arquivo token.json.
 SCOPES = [
@@ -27,6 +30,9 @@ def obter_credenciais():
     3. Se token.json existir mas estiver expirado, atualiza o token
     4. Se token.json não existir, abre o navegador para autorização
     """
+    from google.oauth2.credentials import Credentials
+    from google.auth.transport.requests import Request
+
     creds = None
     token_path = 'credentials/token.json'
     
@@ -62,6 +68,8 @@ def nova_autenticacao():
     """
     Realiza o fluxo de autenticação OAuth completo.
     """
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
     try:
         flow = InstalledAppFlow.from_client_secrets_file(
             CREDENTIALS_FILE_PATH, SCOPES)
@@ -71,12 +79,68 @@ def nova_autenticacao():
         logging.error(f"Erro durante autenticação: {e}")
         raise Exception(f"Falha na autenticação OAuth: {e}")
 
+# Documentos de discovery já lidos, por (api, versão)
+_documentos_discovery: Dict[Tuple[str, str], Dict[str, Any]] = {}
+_documentos_lock = threading.Lock()
+
+def _ler_documento_discovery(api: str, versao: str) -> str:
+    """
+    Lê o documento de discovery da API, nesta ordem: DISCOVERY_CACHE_DIR, documentos que vêm
+    com o googleapiclient e, por último, o serviço de discovery (a resposta é gravada em
+    DISCOVERY_CACHE_DIR, para que as próximas execuções não precisem da rede).
+    """
+    caminho = os.path.join(DISCOVERY_CACHE_DIR, f"{api}.{versao}.json")
+    if os.path.exists(caminho):
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    from googleapiclient.discovery_cache import get_static_doc
+    documento = get_static_doc(api, versao)
+    if documento:
+        return documento
+
+    import httplib2
+    url = URL_DISCOVERY.format(api=api, versao=versao)
+    resposta, conteudo = httplib2.Http(timeout=60).request(url)
+    if resposta.status >= 400:
+        raise Exception(f"Documento de discovery de {api} {versao} indisponível (HTTP {resposta.status})")
+    documento = conteudo.decode('utf-8')
+    os.makedirs(DISCOVERY_CACHE_DIR, exist_ok=True)
+    temporario = f"{caminho}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        f.write(documento)
+    os.replace(temporario, caminho)
+    logging.info(f"Documento de discovery de {api} {versao} gravado em {caminho}")
+    return documento
+
+def obter_documento_discovery(api: str, versao: str) -> Dict[str, Any]:
+    """Documento de discovery da API já interpretado, lido uma única vez por processo."""
+    with _documentos_lock:
+        documento = _documentos_discovery.get((api, versao))
+        if documento is None:
+            documento = json.loads(_ler_documento_discovery(api, versao))
+            _documentos_discovery[(api, versao)] = documento
+        return documento
+
+def _construir_servico(nome: str, versao: str, creds, http=None):
+    """
+    Cria o serviço da API a partir do documento de discovery em cache, com as requisições
+    instrumentadas (ver src/instrumentacao_http.py) e o transporte `http` (por padrão, um
+    PoolHttp próprio com as credenciais; ver src/transporte_http.py).
+    """
+    from googleapiclient.discovery import build_from_document
+    from src.instrumentacao_http import HttpRequestInstrumentada
+    from src.transporte_http import PoolHttp
+
+    return build_from_document(obter_documento_discovery(nome, versao), http=http or PoolHttp(creds),
+                               requestBuilder=HttpRequestInstrumentada)
+
 def criar_servico_sheets(creds):
     """
     Cria e retorna um serviço para interagir com o Google Sheets.
     """
     try:
-        service = build('sheets', 'v4', credentials=creds)
+        service = _construir_servico('sheets', 'v4', creds)
         return service
     except Exception as e:
         logging.error(f"Erro ao criar serviço do Sheets: {e}")
@@ -87,7 +151,7 @@ def criar_servico_docs(creds):
     Cria e retorna um serviço para interagir com o Google Docs.
     """
     try:
-        service = build('docs', 'v1', credentials=creds)
+        service = _construir_servico('docs', 'v1', creds)
         return service
     except Exception as e:
         logging.error(f"Erro ao criar serviço do Docs: {e}")
@@ -98,8 +162,47 @@ def criar_servico_drive(creds):
     Cria e retorna um serviço para interagir com o Google Drive.
     """
     try:
-        service = build('drive', 'v3', credentials=creds)
+        service = _construir_servico('drive', 'v3', creds)
         return service
     except Exception as e:
         logging.error(f"Erro ao criar serviço do Drive: {e}")
-        raise Exception(f"Falha ao criar serviço do Drive: {e}") 
\ No newline at end of file
+        raise Exception(f"Falha ao criar serviço do Drive: {e}") 
+
+class RegistroServicos:
+    """
+    Registro dos serviços do Google do processo: um único cliente por API e versão (e uma
+    única autenticação), compartilhado por todos os handlers. Seguro para uso entre threads.
+    Todos os clientes usam o mesmo PoolHttp, então as conexões abertas são reaproveitadas entre
+    as APIs e o total de requisições simultâneas fica limitado a GOOGLE_HTTP_CONEXOES.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Transporte compartilhado, criado (com a autenticação) no primeiro pedido
+        self.pool = None
+        self._servicos: Dict[Tuple[str, str], Any] = {}
+
+    def obter(self, api: str, versao: str):
+        """Retorna o serviço da API, autenticando e criando o cliente no primeiro pedido."""
+        with self._lock:
+            servico = self._servicos.get((api, versao))
+            if servico is None:
+                if self.pool is None:
+                    from src.transporte_http import PoolHttp
+                    self.pool = PoolHttp(obter_credenciais())
+                servico = _construir_servico(api, versao, self.pool.credentials, http=self.pool)
+                self._servicos[(api, versao)] = servico
+                logging.info(f"Serviço {api} {versao} criado")
+            return servico
+
+
+_registro_global: Optional[RegistroServicos] = None
+_registro_lock = threading.Lock()
+
+def obter_registro_servicos() -> RegistroServicos:
+    """Retorna o registro de serviços compartilhado por todos os handlers."""
+    global _registro_global
+    with _registro_lock:
+        if _registro_global is None:
+            _registro_global = RegistroServicos()
+        return _registro_global
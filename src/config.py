@@ -58,6 +58,49 @@ GEMINI_TEMPERATURE = float(os.getenv("GEMINI_TEMPERATURE", 0.3))
 # Delay entre chamadas da API Gemini (em segundos)
 DELAY_ENTRE_CHAMADAS_GEMINI = float(os.getenv("DELAY_ENTRE_CHAMADAS_GEMINI", 1.0)) # Padrão de 1 segundo
 
+# Número de gerações de conteúdo simultâneas (requisições ao Gemini em andamento). 1 = sequencial
+GEMINI_MAX_WORKERS = int(os.getenv("GEMINI_MAX_WORKERS", 4))
+
+# Quantidade de linhas cujos títulos são pedidos numa única requisição ao Gemini. 1 = uma requisição por linha
+GEMINI_TITULOS_POR_LOTE = int(os.getenv("GEMINI_TITULOS_POR_LOTE", 5))
+
+# Cotas da API do Gemini usadas pelo rate limiter (requisições e tokens de entrada por minuto)
+GEMINI_RPM_LIMIT = int(os.getenv("GEMINI_RPM_LIMIT", 60))
+GEMINI_TPM_LIMIT = int(os.getenv("GEMINI_TPM_LIMIT", 1000000))
+
+# Cache persistente das respostas do Gemini (evita pagar de novo por prompts já gerados)
+GEMINI_CACHE_ATIVO = os.getenv("GEMINI_CACHE_ATIVO", "true").strip().lower() in ("1", "true", "s", "sim", "yes")
+GEMINI_CACHE_PATH = os.getenv("GEMINI_CACHE_PATH", "data/gemini_cache.db")
+GEMINI_CACHE_TTL_HORAS = float(os.getenv("GEMINI_CACHE_TTL_HORAS", 24 * 30))
+GEMINI_CACHE_MAX_MB = float(os.getenv("GEMINI_CACHE_MAX_MB", 500))
+
+# Buffer de escrita na planilha: as atualizações de células são enviadas num único values().batchUpdate
+# a cada SHEETS_BUFFER_LINHAS linhas ou SHEETS_BUFFER_SEGUNDOS segundos (1 linha = escrita imediata)
+SHEETS_BUFFER_LINHAS = int(os.getenv("SHEETS_BUFFER_LINHAS", 50))
+SHEETS_BUFFER_SEGUNDOS = float(os.getenv("SHEETS_BUFFER_SEGUNDOS", 30))
+
+# Diário de execução: cada execução grava suas etapas em RUNS_DIR/<run_id>.jsonl (retomada com --resume)
+RUNS_DIR = os.getenv("RUNS_DIR", "data/runs")
+
+# Pipeline em etapas (títulos -> conteúdos -> pós-processamento -> documentos -> planilha), usado quando os
+# documentos são criados sem confirmação (--commit auto): workers por etapa e tamanho das filas entre elas
+PIPELINE_ATIVO = os.getenv("PIPELINE_ATIVO", "true").strip().lower() in ("1", "true", "s", "sim", "yes")
+PIPELINE_WORKERS_TITULOS = int(os.getenv("PIPELINE_WORKERS_TITULOS", 1))
+PIPELINE_WORKERS_DOCS = int(os.getenv("PIPELINE_WORKERS_DOCS", 2))
+PIPELINE_FILA_MAX = int(os.getenv("PIPELINE_FILA_MAX", 8))
+
+# Spool dos conteúdos gerados: os artigos ficam em SPOOL_DIR/<run_id>/ até os documentos serem criados
+SPOOL_DIR = os.getenv("SPOOL_DIR", "data/spool")
+
+# Documentos de discovery das APIs do Google que não vêm com o googleapiclient: baixados uma vez
+# e guardados em DISCOVERY_CACHE_DIR/<api>.<versão>.json (um arquivo ali também substitui o do pacote)
+DISCOVERY_CACHE_DIR = os.getenv("DISCOVERY_CACHE_DIR", "data/discovery")
+
+# Transporte HTTP dos serviços do Google: objetos httplib2 autorizados reaproveitados entre as threads
+# (keep-alive), no máximo GOOGLE_HTTP_CONEXOES requisições simultâneas (uma conexão por host em cada)
+GOOGLE_HTTP_CONEXOES = int(os.getenv("GOOGLE_HTTP_CONEXOES", 8))
+GOOGLE_HTTP_TIMEOUT = float(os.getenv("GOOGLE_HTTP_TIMEOUT", 60))
+
 # Preços do Gemini (manter apenas se for usar estimativa de custo)
 GEMINI_PRECO_ENTRADA = float(os.getenv("GEMINI_PRECO_ENTRADA", 0.00025))
 GEMINI_PRECO_SAIDA = float(os.getenv("GEMINI_PRECO_SAIDA", 0.0005))
@@ -65,6 +108,16 @@ GEMINI_PRECO_SAIDA = float(os.getenv("GEMINI_PRECO_SAIDA", 0.0005))
 # Taxa de Câmbio (pode ser ajustada ou carregada do .env se necessário no futuro)
 USD_TO_BRL_RATE = float(os.getenv("USD_TO_BRL_RATE", 5.0)) # Valor padrão de 5.0
 
+# Orçamento de custo do Gemini por execução (0 = sem limite); com os dois definidos vale o menor, e o limite
+# em reais é convertido com USD_TO_BRL_RATE. A partir de ORCAMENTO_LIMIAR_ECONOMIA do limite as novas
+# tentativas são suspensas e max_output_tokens cai para ORCAMENTO_MAX_TOKENS_ECONOMIA
+ORCAMENTO_LIMITE_USD = float(os.getenv("ORCAMENTO_LIMITE_USD", 0))
+ORCAMENTO_LIMITE_BRL = float(os.getenv("ORCAMENTO_LIMITE_BRL", 0))
+ORCAMENTO_LIMIAR_ECONOMIA = float(os.getenv("ORCAMENTO_LIMIAR_ECONOMIA", 0.8))
+ORCAMENTO_MAX_TOKENS_ECONOMIA = int(os.getenv("ORCAMENTO_MAX_TOKENS_ECONOMIA", 4096))
+# Linhas mais recentes do histórico de consumo de tokens usadas na previsão de custo
+ORCAMENTO_AMOSTRAS_HISTORICO = int(os.getenv("ORCAMENTO_AMOSTRAS_HISTORICO", 500))
+
 # Novo: Mapeamento de nomes de coluna esperados para flexibilizar a leitura de planilhas
 # As chaves são os identificadores internos usados pelo script.
 # Os valores são listas de possíveis nomes de cabeçalho que podem ser encontrados na planilha.
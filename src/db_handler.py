@@ -1,62 +1,323 @@
+import asyncio
+import os
 import sqlite3
 import logging
+import threading
+from contextlib import asynccontextmanager, contextmanager
 from datetime import datetime
-from typing import List, Dict, Tuple, Optional
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import aiosqlite
+
+
+# Migrações de esquema do banco de aprendizado: (versão, descrição, comandos SQL).
+# Novas alterações de esquema devem ser adicionadas ao final, com a próxima versão.
+MIGRACOES: List[Tuple[int, str, List[str]]] = [
+    (1, "esquema inicial", [
+        """
+        CREATE TABLE IF NOT EXISTS titles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            anchor_word TEXT NOT NULL,
+            main_theme TEXT NOT NULL,
+            structure_type TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            performance_score FLOAT DEFAULT 0.0,
+            feedback_score FLOAT DEFAULT 0.0,
+            is_approved BOOLEAN DEFAULT FALSE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS themes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title_id INTEGER,
+            theme TEXT NOT NULL,
+            FOREIGN KEY (title_id) REFERENCES titles (id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS successful_structures (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            structure_pattern TEXT NOT NULL,
+            theme TEXT NOT NULL,
+            success_count INTEGER DEFAULT 1,
+            last_used TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+    (2, "índices das consultas de aprendizado", [
+        # get_title_id / atualizar_desempenho_titulo (WHERE title = ?)
+        "CREATE INDEX IF NOT EXISTS idx_titles_title ON titles (title)",
+        # get_similar_successful_titles: filtro por palavra-âncora + tema, cobrindo as colunas lidas
+        """
+        CREATE INDEX IF NOT EXISTS idx_titles_anchor_theme
+        ON titles (anchor_word, main_theme, performance_score, feedback_score, title)
+        """,
+        # get_theme_statistics: agregados por tema sem ler a tabela
+        """
+        CREATE INDEX IF NOT EXISTS idx_titles_theme_stats
+        ON titles (main_theme, performance_score, feedback_score, is_approved)
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_themes_title_id ON themes (title_id)",
+        # get_successful_patterns: filtro por tema já na ordem do ORDER BY
+        """
+        CREATE INDEX IF NOT EXISTS idx_structures_theme_rank
+        ON successful_structures (theme, success_count DESC, last_used DESC, structure_pattern)
+        """,
+    ]),
+    (3, "unicidade de (structure_pattern, theme) em successful_structures", [
+        # Consolida duplicatas na linha mais antiga antes de criar o índice único
+        """
+        UPDATE successful_structures
+        SET success_count = (
+                SELECT SUM(s2.success_count) FROM successful_structures s2
+                WHERE s2.structure_pattern = successful_structures.structure_pattern
+                  AND s2.theme = successful_structures.theme
+            ),
+            last_used = (
+                SELECT MAX(s2.last_used) FROM successful_structures s2
+                WHERE s2.structure_pattern = successful_structures.structure_pattern
+                  AND s2.theme = successful_structures.theme
+            )
+        WHERE id IN (
+            SELECT MIN(id) FROM successful_structures
+            GROUP BY structure_pattern, theme HAVING COUNT(*) > 1
+        )
+        """,
+        """
+        DELETE FROM successful_structures
+        WHERE id NOT IN (SELECT MIN(id) FROM successful_structures GROUP BY structure_pattern, theme)
+        """,
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_structures_pattern_theme
+        ON successful_structures (structure_pattern, theme)
+        """,
+    ]),
+    (4, "histórico de consumo de tokens por linha (previsão de custo)", [
+        """
+        CREATE TABLE IF NOT EXISTS token_usage (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            input_tokens INTEGER NOT NULL,
+            output_tokens INTEGER NOT NULL,
+            calls REAL NOT NULL DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        # get_token_usage: amostras mais recentes de cada tipo
+        "CREATE INDEX IF NOT EXISTS idx_token_usage_kind ON token_usage (kind, id DESC)",
+    ]),
+]
+
+
+def aplicar_migracoes(conn: sqlite3.Connection, ate_versao: Optional[int] = None) -> List[int]:
+    """
+    Aplica, em ordem, as migrações ainda não registradas em `schema_migrations`.
+    
+    Args:
+        conn: Conexão com o banco (o chamador faz o commit)
+        ate_versao: Aplica apenas até esta versão (None = todas)
+        
+    Returns:
+        Lista das versões aplicadas nesta chamada
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    ja_aplicadas = {row[0] for row in conn.execute("SELECT version FROM schema_migrations")}
+    aplicadas = []
+    for versao, descricao, comandos in MIGRACOES:
+        if versao in ja_aplicadas or (ate_versao is not None and versao > ate_versao):
+            continue
+        for comando in comandos:
+            conn.execute(comando)
+        conn.execute(
+            "INSERT INTO schema_migrations (version, description) VALUES (?, ?)",
+            (versao, descricao)
+        )
+        aplicadas.append(versao)
+    return aplicadas
+
+
+class CacheAprendizado:
+    """
+    Cache em memória das consultas de aprendizado feitas a cada título gerado.
+
+    Guarda o resultado de `get_successful_patterns` por tema e de `get_similar_successful_titles`
+    por (palavra-âncora, tema). As entradas só mudam quando `update_structure_success` (padrões
+    do tema) ou `update_title_performance` (títulos da palavra-âncora e do tema do título) são
+    executados, e esses métodos invalidam exatamente as entradas afetadas. Títulos recém-inseridos
+    têm pontuação 0 e não entram no filtro de sucesso, então inserções não invalidam nada.
+
+    Escritas feitas por outros processos no mesmo arquivo não são vistas até `limpar()`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._padroes: Dict[str, Dict[int, List[Dict]]] = {}
+        self._similares: Dict[Tuple[str, str], Dict[int, List[Dict]]] = {}
+        # Incrementada a cada invalidação: uma leitura iniciada antes dela não grava resultado antigo
+        self._geracao = 0
+        self.acertos = 0
+        self.falhas = 0
+
+    @staticmethod
+    def _copiar(linhas: List[Dict]) -> List[Dict]:
+        return [dict(linha) for linha in linhas]
+
+    def _obter(self, tabela: Dict, chave, limit: int) -> Tuple[Optional[List[Dict]], int]:
+        with self._lock:
+            linhas = tabela.get(chave, {}).get(limit)
+            if linhas is None:
+                self.falhas += 1
+                return None, self._geracao
+            self.acertos += 1
+            return self._copiar(linhas), self._geracao
+
+    def _guardar(self, tabela: Dict, chave, limit: int, linhas: List[Dict], geracao: int) -> None:
+        with self._lock:
+            if geracao == self._geracao:
+                tabela.setdefault(chave, {})[limit] = self._copiar(linhas)
+
+    def obter_padroes(self, theme: str, limit: int) -> Tuple[Optional[List[Dict]], int]:
+        """Retorna (padrões em cache ou None, geração atual)."""
+        return self._obter(self._padroes, theme, limit)
+
+    def guardar_padroes(self, theme: str, limit: int, linhas: List[Dict], geracao: int) -> None:
+        self._guardar(self._padroes, theme, limit, linhas, geracao)
+
+    def obter_similares(self, anchor_word: str, theme: str, limit: int) -> Tuple[Optional[List[Dict]], int]:
+        """Retorna (títulos similares em cache ou None, geração atual)."""
+        return self._obter(self._similares, (anchor_word, theme), limit)
+
+    def guardar_similares(self, anchor_word: str, theme: str, limit: int, linhas: List[Dict], geracao: int) -> None:
+        self._guardar(self._similares, (anchor_word, theme), limit, linhas, geracao)
+
+    def invalidar_padroes(self, theme: str) -> None:
+        with self._lock:
+            self._geracao += 1
+            self._padroes.pop(theme, None)
+
+    def invalidar_similares(self, anchor_word: str, theme: str) -> None:
+        with self._lock:
+            self._geracao += 1
+            self._similares.pop((anchor_word, theme), None)
+
+    def limpar(self) -> None:
+        """Descarta todas as entradas (os contadores são mantidos)."""
+        with self._lock:
+            self._geracao += 1
+            self._padroes.clear()
+            self._similares.clear()
+
+    def estatisticas(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "temas": len(self._padroes),
+                "ancoras": len(self._similares),
+            }
+
+
+class _ConexaoCompartilhada:
+    """
+    Conexão SQLite de longa duração compartilhada por todos os DBHandler do mesmo arquivo.
+
+    Usa journaling WAL (leituras não bloqueiam a escrita), synchronous=NORMAL, cache de páginas
+    maior e cache de statements preparados. O acesso é serializado por um RLock, então a
+    mesma conexão pode ser usada com segurança por várias threads.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(
+            db_path,
+            check_same_thread=False,
+            cached_statements=256,
+            timeout=30,
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA cache_size=-16000")  # ~16 MB
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.schema_verificado = False
+        self.cache = CacheAprendizado()
+
+    @contextmanager
+    def transacao(self) -> Iterator[sqlite3.Connection]:
+        """Uso exclusivo da conexão; faz commit ao final ou rollback em caso de erro."""
+        with self.lock:
+            try:
+                yield self.conn
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+
+    def fechar(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+
+_conexoes: Dict[str, _ConexaoCompartilhada] = {}
+_conexoes_lock = threading.Lock()
+
+
+def _obter_conexao(db_path: str) -> _ConexaoCompartilhada:
+    """Retorna (criando na primeira vez) a conexão compartilhada do arquivo `db_path`."""
+    chave = db_path if db_path == ":memory:" else os.path.abspath(db_path)
+    with _conexoes_lock:
+        conexao = _conexoes.get(chave)
+        if conexao is None:
+            conexao = _ConexaoCompartilhada(db_path)
+            _conexoes[chave] = conexao
+        return conexao
+
 
 class DBHandler:
     def __init__(self, db_path: str = "data/titles_learning.db"):
         """
         Inicializa o handler do banco de dados.
         
+        Instâncias que apontam para o mesmo arquivo compartilham uma única conexão,
+        e as tabelas são verificadas apenas na primeira vez.
+        
         Args:
             db_path: Caminho para o arquivo do banco de dados SQLite
         """
         self.db_path = db_path
         self.logger = logging.getLogger('seo_linkbuilder.db')
-        self._init_db()
+        self._conexao = _obter_conexao(db_path)
+        self.cache = self._conexao.cache
+        with self._conexao.lock:
+            if not self._conexao.schema_verificado:
+                self._init_db()
+                self._conexao.schema_verificado = True
+
+    def _conectar(self):
+        """Contexto com a conexão compartilhada (commit ao final, rollback em caso de erro)."""
+        return self._conexao.transacao()
+
+    def fechar(self):
+        """Fecha a conexão compartilhada deste banco (as próximas instâncias abrem uma nova)."""
+        chave = self.db_path if self.db_path == ":memory:" else os.path.abspath(self.db_path)
+        with _conexoes_lock:
+            if _conexoes.get(chave) is self._conexao:
+                del _conexoes[chave]
+        self._conexao.fechar()
         
     def _init_db(self):
-        """Inicializa as tabelas do banco de dados se não existirem."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Tabela de títulos
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS titles (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title TEXT NOT NULL,
-                    anchor_word TEXT NOT NULL,
-                    main_theme TEXT NOT NULL,
-                    structure_type TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    performance_score FLOAT DEFAULT 0.0,
-                    feedback_score FLOAT DEFAULT 0.0,
-                    is_approved BOOLEAN DEFAULT FALSE
-                )
-            """)
-            
-            # Tabela de temas
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS themes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title_id INTEGER,
-                    theme TEXT NOT NULL,
-                    FOREIGN KEY (title_id) REFERENCES titles (id)
-                )
-            """)
-            
-            # Tabela de estruturas bem-sucedidas
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS successful_structures (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    structure_pattern TEXT NOT NULL,
-                    theme TEXT NOT NULL,
-                    success_count INTEGER DEFAULT 1,
-                    last_used TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            conn.commit()
+        """Cria as tabelas e aplica as migrações de esquema pendentes."""
+        with self._conectar() as conn:
+            aplicadas = aplicar_migracoes(conn)
+        if aplicadas:
+            self.logger.info(f"Migrações aplicadas ao banco {self.db_path}: {aplicadas}")
     
     def add_title(self, title: str, anchor_word: str, main_theme: str, structure_type: str, themes: List[str]) -> int:
         """
@@ -73,7 +334,7 @@ class DBHandler:
             ID do título inserido
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._conectar() as conn:
                 cursor = conn.cursor()
                 
                 # Insere o título
@@ -91,13 +352,105 @@ class DBHandler:
                         VALUES (?, ?)
                     """, (title_id, theme))
                 
-                conn.commit()
                 return title_id
                 
         except Exception as e:
             self.logger.error(f"Erro ao adicionar título: {e}")
             raise
     
+    def get_title_id(self, title: str) -> Optional[int]:
+        """
+        Retorna o ID de um título armazenado.
+        
+        Args:
+            title: O título a procurar
+            
+        Returns:
+            ID do título ou None se não existir
+        """
+        try:
+            with self._conectar() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT id FROM titles WHERE title = ?", (title,))
+                row = cursor.fetchone()
+                return row[0] if row else None
+                
+        except Exception as e:
+            self.logger.error(f"Erro ao buscar ID do título: {e}")
+            return None
+    
+    def get_all_titles(self) -> List[str]:
+        """
+        Retorna todos os títulos armazenados, do mais antigo para o mais recente.
+        
+        Returns:
+            Lista de títulos
+        """
+        try:
+            with self._conectar() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT title FROM titles ORDER BY id")
+                return [row[0] for row in cursor.fetchall()]
+                
+        except Exception as e:
+            self.logger.error(f"Erro ao buscar títulos: {e}")
+            return []
+    
+    def add_titles_bulk(self, records: List[Dict]) -> List[int]:
+        """
+        Adiciona vários títulos (e seus temas) em uma única transação, com executemany.
+        
+        A escrita é reservada (BEGIN IMMEDIATE) antes de ler o último ID: o lock da conexão só
+        vale dentro deste processo, e outro processo (ex.: importar_titulos.py com o programa
+        principal aberto) poderia inserir entre a leitura e os INSERTs, deslocando os IDs.
+        
+        Args:
+            records: Lista de dicionários com as chaves title, anchor_word, main_theme,
+                structure_type e themes (lista de temas secundários)
+            
+        Returns:
+            IDs dos títulos inseridos, na mesma ordem de `records`
+        """
+        if not records:
+            return []
+        try:
+            with self._conectar() as conn:
+                cursor = conn.cursor()
+                
+                # Com AUTOINCREMENT e a escrita reservada, os IDs da transação são consecutivos
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute("""
+                    SELECT MAX(
+                        COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'titles'), 0),
+                        COALESCE((SELECT MAX(id) FROM titles), 0)
+                    )
+                """)
+                base_id = cursor.fetchone()[0]
+                
+                cursor.executemany("""
+                    INSERT INTO titles (title, anchor_word, main_theme, structure_type)
+                    VALUES (?, ?, ?, ?)
+                """, [
+                    (r['title'], r['anchor_word'], r['main_theme'], r['structure_type'])
+                    for r in records
+                ])
+                
+                title_ids = list(range(base_id + 1, base_id + 1 + len(records)))
+                cursor.executemany("""
+                    INSERT INTO themes (title_id, theme)
+                    VALUES (?, ?)
+                """, [
+                    (title_id, theme)
+                    for title_id, r in zip(title_ids, records)
+                    for theme in r.get('themes', [])
+                ])
+                
+                return title_ids
+                
+        except Exception as e:
+            self.logger.error(f"Erro ao adicionar títulos em lote: {e}")
+            raise
+    
     def update_title_performance(self, title_id: int, performance_score: float, feedback_score: float = None):
         """
         Atualiza as métricas de desempenho de um título.
@@ -108,7 +461,7 @@ class DBHandler:
             feedback_score: Pontuação de feedback opcional (0-1)
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._conectar() as conn:
                 cursor = conn.cursor()
                 
                 if feedback_score is not None:
@@ -124,7 +477,12 @@ class DBHandler:
                         WHERE id = ?
                     """, (performance_score, title_id))
                 
-                conn.commit()
+                cursor.execute("SELECT anchor_word, main_theme FROM titles WHERE id = ?", (title_id,))
+                row = cursor.fetchone()
+                
+            # Invalida após o commit, para que nenhuma leitura concorrente guarde o valor antigo
+            if row:
+                self.cache.invalidar_similares(row[0], row[1])
                 
         except Exception as e:
             self.logger.error(f"Erro ao atualizar desempenho do título: {e}")
@@ -141,8 +499,11 @@ class DBHandler:
         Returns:
             Lista de dicionários com padrões e suas pontuações
         """
+        padroes, geracao = self.cache.obter_padroes(theme, limit)
+        if padroes is not None:
+            return padroes
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._conectar() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute("""
@@ -153,10 +514,12 @@ class DBHandler:
                     LIMIT ?
                 """, (theme, limit))
                 
-                return [
+                padroes = [
                     {"pattern": row[0], "success_count": row[1]}
                     for row in cursor.fetchall()
                 ]
+                self.cache.guardar_padroes(theme, limit, padroes, geracao)
+                return padroes
                 
         except Exception as e:
             self.logger.error(f"Erro ao buscar padrões de sucesso: {e}")
@@ -171,7 +534,7 @@ class DBHandler:
             theme: O tema principal
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._conectar() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute("""
@@ -182,7 +545,7 @@ class DBHandler:
                         last_used = CURRENT_TIMESTAMP
                 """, (structure_pattern, theme))
                 
-                conn.commit()
+            self.cache.invalidar_padroes(theme)
                 
         except Exception as e:
             self.logger.error(f"Erro ao atualizar sucesso da estrutura: {e}")
@@ -200,8 +563,11 @@ class DBHandler:
         Returns:
             Lista de dicionários com títulos e suas métricas
         """
+        similares, geracao = self.cache.obter_similares(anchor_word, theme, limit)
+        if similares is not None:
+            return similares
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._conectar() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute("""
@@ -214,7 +580,7 @@ class DBHandler:
                     LIMIT ?
                 """, (anchor_word, theme, limit))
                 
-                return [
+                similares = [
                     {
                         "title": row[0],
                         "performance": row[1],
@@ -222,11 +588,52 @@ class DBHandler:
                     }
                     for row in cursor.fetchall()
                 ]
+                self.cache.guardar_similares(anchor_word, theme, limit, similares, geracao)
+                return similares
                 
         except Exception as e:
             self.logger.error(f"Erro ao buscar títulos similares: {e}")
             return []
     
+    def add_token_usage(self, records: List[Tuple[str, int, int, float]]) -> None:
+        """
+        Adiciona ao histórico o consumo de tokens de linhas processadas, numa única transação.
+        
+        Args:
+            records: Tuplas (kind, input_tokens, output_tokens, calls), com kind 'titulo' ou 'conteudo'
+        """
+        if not records:
+            return
+        try:
+            with self._conectar() as conn:
+                conn.executemany("""
+                    INSERT INTO token_usage (kind, input_tokens, output_tokens, calls)
+                    VALUES (?, ?, ?, ?)
+                """, records)
+        except Exception as e:
+            self.logger.error(f"Erro ao salvar o histórico de consumo de tokens: {e}")
+    
+    def get_token_usage(self, kind: str, limit: int = 500) -> List[Tuple[int, int]]:
+        """
+        Retorna o consumo (input_tokens, output_tokens) das linhas mais recentes de um tipo.
+        
+        Args:
+            kind: 'titulo' ou 'conteudo'
+            limit: Número máximo de linhas a retornar
+        """
+        try:
+            with self._conectar() as conn:
+                cursor = conn.execute("""
+                    SELECT input_tokens, output_tokens FROM token_usage
+                    WHERE kind = ?
+                    ORDER BY id DESC
+                    LIMIT ?
+                """, (kind, limit))
+                return [(row[0], row[1]) for row in cursor.fetchall()]
+        except Exception as e:
+            self.logger.error(f"Erro ao buscar o histórico de consumo de tokens: {e}")
+            return []
+    
     def get_theme_statistics(self, theme: str) -> Dict:
         """
         Retorna estatísticas de desempenho para um tema específico.
@@ -238,7 +645,7 @@ class DBHandler:
             Dicionário com estatísticas do tema
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._conectar() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute("""
@@ -266,4 +673,264 @@ class DBHandler:
                 "avg_performance": 0.0,
                 "avg_feedback": 0.0,
                 "approved_count": 0
-            } 
\ No newline at end of file
+            } 
+
+class AsyncDBHandler:
+    """
+    Variante assíncrona do DBHandler (mesmos métodos, com `await`), baseada em aiosqlite.
+
+    Mantém um pool de conexões: cada conexão do aiosqlite roda em sua própria thread, então
+    leituras de tarefas concorrentes não bloqueiam o event loop nem esperam umas pelas outras
+    (o modo WAL permite leitores simultâneos). As escritas são serializadas por um asyncio.Lock.
+    """
+
+    def __init__(self, db_path: str = "data/titles_learning.db", tamanho_pool: int = 4):
+        """
+        Args:
+            db_path: Caminho para o arquivo do banco de dados SQLite
+            tamanho_pool: Número de conexões abertas com o banco
+        """
+        self.db_path = db_path
+        self.tamanho_pool = max(1, tamanho_pool)
+        self.logger = logging.getLogger('seo_linkbuilder.db')
+        # O esquema (tabelas e migrações) é garantido pelo handler síncrono, uma única vez por arquivo;
+        # o cache de aprendizado é o mesmo do handler síncrono do arquivo
+        self.cache = DBHandler(db_path).cache
+        self._pool: Optional[asyncio.Queue] = None
+        self._conexoes: List[aiosqlite.Connection] = []
+        self._lock_escrita: Optional[asyncio.Lock] = None
+        self._lock_pool: Optional[asyncio.Lock] = None
+
+    async def _iniciar_pool(self) -> asyncio.Queue:
+        if self._lock_pool is None:
+            self._lock_pool = asyncio.Lock()
+        async with self._lock_pool:
+            if self._pool is None:
+                pool: asyncio.Queue = asyncio.Queue()
+                for _ in range(self.tamanho_pool):
+                    conn = await aiosqlite.connect(self.db_path, timeout=30)
+                    await conn.execute("PRAGMA synchronous=NORMAL")
+                    await conn.execute("PRAGMA cache_size=-16000")
+                    await conn.execute("PRAGMA temp_store=MEMORY")
+                    self._conexoes.append(conn)
+                    pool.put_nowait(conn)
+                self._lock_escrita = asyncio.Lock()
+                self._pool = pool
+        return self._pool
+
+    @asynccontextmanager
+    async def _conectar(self, escrita: bool = False) -> AsyncIterator[aiosqlite.Connection]:
+        """Empresta uma conexão do pool; em escritas, faz commit ao final ou rollback em caso de erro."""
+        pool = self._pool or await self._iniciar_pool()
+        conn = await pool.get()
+        try:
+            if not escrita:
+                yield conn
+                return
+            async with self._lock_escrita:
+                try:
+                    yield conn
+                    await conn.commit()
+                except Exception:
+                    await conn.rollback()
+                    raise
+        finally:
+            pool.put_nowait(conn)
+
+    async def fechar(self) -> None:
+        """Fecha todas as conexões do pool."""
+        for conn in self._conexoes:
+            await conn.close()
+        self._conexoes = []
+        self._pool = None
+
+    async def add_title(self, title: str, anchor_word: str, main_theme: str, structure_type: str, themes: List[str]) -> int:
+        """Adiciona um novo título ao banco de dados. Retorna o ID do título inserido."""
+        try:
+            async with self._conectar(escrita=True) as conn:
+                cursor = await conn.execute("""
+                    INSERT INTO titles (title, anchor_word, main_theme, structure_type)
+                    VALUES (?, ?, ?, ?)
+                """, (title, anchor_word, main_theme, structure_type))
+                title_id = cursor.lastrowid
+                await conn.executemany("""
+                    INSERT INTO themes (title_id, theme)
+                    VALUES (?, ?)
+                """, [(title_id, theme) for theme in themes])
+                return title_id
+        except Exception as e:
+            self.logger.error(f"Erro ao adicionar título: {e}")
+            raise
+
+    async def add_titles_bulk(self, records: List[Dict]) -> List[int]:
+        """Adiciona vários títulos (e seus temas) em uma única transação. Ver DBHandler.add_titles_bulk."""
+        if not records:
+            return []
+        try:
+            async with self._conectar(escrita=True) as conn:
+                # BEGIN IMMEDIATE reserva a escrita antes de ler o último ID (outros processos também escrevem)
+                await conn.execute("BEGIN IMMEDIATE")
+                async with conn.execute("""
+                    SELECT MAX(
+                        COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'titles'), 0),
+                        COALESCE((SELECT MAX(id) FROM titles), 0)
+                    )
+                """) as cursor:
+                    base_id = (await cursor.fetchone())[0]
+                await conn.executemany("""
+                    INSERT INTO titles (title, anchor_word, main_theme, structure_type)
+                    VALUES (?, ?, ?, ?)
+                """, [(r['title'], r['anchor_word'], r['main_theme'], r['structure_type']) for r in records])
+                title_ids = list(range(base_id + 1, base_id + 1 + len(records)))
+                await conn.executemany("""
+                    INSERT INTO themes (title_id, theme)
+                    VALUES (?, ?)
+                """, [(title_id, theme) for title_id, r in zip(title_ids, records) for theme in r.get('themes', [])])
+                return title_ids
+        except Exception as e:
+            self.logger.error(f"Erro ao adicionar títulos em lote: {e}")
+            raise
+
+    async def get_title_id(self, title: str) -> Optional[int]:
+        """Retorna o ID de um título armazenado, ou None se não existir."""
+        try:
+            async with self._conectar() as conn:
+                async with conn.execute("SELECT id FROM titles WHERE title = ?", (title,)) as cursor:
+                    row = await cursor.fetchone()
+                    return row[0] if row else None
+        except Exception as e:
+            self.logger.error(f"Erro ao buscar ID do título: {e}")
+            return None
+
+    async def get_all_titles(self) -> List[str]:
+        """Retorna todos os títulos armazenados, do mais antigo para o mais recente."""
+        try:
+            async with self._conectar() as conn:
+                async with conn.execute("SELECT title FROM titles ORDER BY id") as cursor:
+                    return [row[0] for row in await cursor.fetchall()]
+        except Exception as e:
+            self.logger.error(f"Erro ao buscar títulos: {e}")
+            return []
+
+    async def update_title_performance(self, title_id: int, performance_score: float, feedback_score: float = None):
+        """Atualiza as métricas de desempenho de um título."""
+        try:
+            async with self._conectar(escrita=True) as conn:
+                if feedback_score is not None:
+                    await conn.execute("""
+                        UPDATE titles
+                        SET performance_score = ?, feedback_score = ?
+                        WHERE id = ?
+                    """, (performance_score, feedback_score, title_id))
+                else:
+                    await conn.execute("""
+                        UPDATE titles
+                        SET performance_score = ?
+                        WHERE id = ?
+                    """, (performance_score, title_id))
+                async with conn.execute("SELECT anchor_word, main_theme FROM titles WHERE id = ?", (title_id,)) as cursor:
+                    row = await cursor.fetchone()
+            if row:
+                self.cache.invalidar_similares(row[0], row[1])
+        except Exception as e:
+            self.logger.error(f"Erro ao atualizar desempenho do título: {e}")
+            raise
+
+    async def get_successful_patterns(self, theme: str, limit: int = 5) -> List[Dict]:
+        """Retorna os padrões de estrutura mais bem-sucedidos para um tema."""
+        padroes, geracao = self.cache.obter_padroes(theme, limit)
+        if padroes is not None:
+            return padroes
+        try:
+            async with self._conectar() as conn:
+                async with conn.execute("""
+                    SELECT structure_pattern, success_count
+                    FROM successful_structures
+                    WHERE theme = ?
+                    ORDER BY success_count DESC, last_used DESC
+                    LIMIT ?
+                """, (theme, limit)) as cursor:
+                    padroes = [
+                        {"pattern": row[0], "success_count": row[1]}
+                        for row in await cursor.fetchall()
+                    ]
+            self.cache.guardar_padroes(theme, limit, padroes, geracao)
+            return padroes
+        except Exception as e:
+            self.logger.error(f"Erro ao buscar padrões de sucesso: {e}")
+            return []
+
+    async def update_structure_success(self, structure_pattern: str, theme: str):
+        """Atualiza o contador de sucesso para uma estrutura específica."""
+        try:
+            async with self._conectar(escrita=True) as conn:
+                await conn.execute("""
+                    INSERT INTO successful_structures (structure_pattern, theme)
+                    VALUES (?, ?)
+                    ON CONFLICT (structure_pattern, theme) DO UPDATE
+                    SET success_count = success_count + 1,
+                        last_used = CURRENT_TIMESTAMP
+                """, (structure_pattern, theme))
+            self.cache.invalidar_padroes(theme)
+        except Exception as e:
+            self.logger.error(f"Erro ao atualizar sucesso da estrutura: {e}")
+            raise
+
+    async def get_similar_successful_titles(self, anchor_word: str, theme: str, limit: int = 5) -> List[Dict]:
+        """Retorna títulos bem-sucedidos similares baseados na palavra-âncora e tema."""
+        similares, geracao = self.cache.obter_similares(anchor_word, theme, limit)
+        if similares is not None:
+            return similares
+        try:
+            async with self._conectar() as conn:
+                async with conn.execute("""
+                    SELECT t.title, t.performance_score, t.feedback_score
+                    FROM titles t
+                    WHERE t.anchor_word = ?
+                        AND t.main_theme = ?
+                        AND (t.performance_score > 0.7 OR t.feedback_score > 0.7)
+                    ORDER BY (t.performance_score + COALESCE(t.feedback_score, 0))/2 DESC
+                    LIMIT ?
+                """, (anchor_word, theme, limit)) as cursor:
+                    similares = [
+                        {
+                            "title": row[0],
+                            "performance": row[1],
+                            "feedback": row[2]
+                        }
+                        for row in await cursor.fetchall()
+                    ]
+            self.cache.guardar_similares(anchor_word, theme, limit, similares, geracao)
+            return similares
+        except Exception as e:
+            self.logger.error(f"Erro ao buscar títulos similares: {e}")
+            return []
+
+    async def get_theme_statistics(self, theme: str) -> Dict:
+        """Retorna estatísticas de desempenho para um tema específico."""
+        try:
+            async with self._conectar() as conn:
+                async with conn.execute("""
+                    SELECT 
+                        COUNT(*) as total_titles,
+                        AVG(performance_score) as avg_performance,
+                        AVG(feedback_score) as avg_feedback,
+                        COUNT(CASE WHEN is_approved = 1 THEN 1 END) as approved_count
+                    FROM titles
+                    WHERE main_theme = ?
+                """, (theme,)) as cursor:
+                    row = await cursor.fetchone()
+                    return {
+                        "total_titles": row[0],
+                        "avg_performance": row[1] or 0.0,
+                        "avg_feedback": row[2] or 0.0,
+                        "approved_count": row[3]
+                    }
+        except Exception as e:
+            self.logger.error(f"Erro ao buscar estatísticas do tema: {e}")
+            return {
+                "total_titles": 0,
+                "avg_performance": 0.0,
+                "avg_feedback": 0.0,
+                "approved_count": 0
+            }
@@ -1,27 +1,49 @@
 # Módulo para interagir com as APIs do Google Docs e Drive
 import logging
+import threading
 from typing import Dict, List, Tuple, Optional
 import re
 
 from src.config import DRIVE_FOLDER_ID, TITULO_TAMANHO
-from src.auth_handler import obter_credenciais, criar_servico_docs, criar_servico_drive
+from src.auth_handler import obter_registro_servicos
 from src.utils import extrair_titulos_markdown, converter_markdown_para_docs
 
 class DocsHandler:
-    def __init__(self):
+    def __init__(self, service_docs=None, service_drive=None):
         # Inicializa o logger
         self.logger = logging.getLogger('seo_linkbuilder.docs')
         
-        # Obtém credenciais e inicializa os serviços
+        # Os serviços vêm do registro compartilhado (um cliente por API no processo) no primeiro
+        # uso; serviços injetados, como os de src/fakes.py, dispensam a autenticação
+        self._service_docs = service_docs
+        self._service_drive = service_drive
+
+        # Pastas já verificadas: {pasta solicitada: pasta efetivamente usada}
+        self._pastas_verificadas: Dict[str, str] = {}
+        self._pastas_lock = threading.Lock()
+    
+    def _obter_servico(self, api: str, versao: str):
+        """Serviço do registro compartilhado (criado, com a autenticação, no primeiro pedido)."""
         try:
-            self.credenciais = obter_credenciais()
-            self.service_docs = criar_servico_docs(self.credenciais)
-            self.service_drive = criar_servico_drive(self.credenciais)
-            self.logger.info("Serviços do Google Docs e Drive inicializados com sucesso")
+            return obter_registro_servicos().obter(api, versao)
         except Exception as e:
             self.logger.error(f"Erro ao inicializar os serviços: {e}")
             raise
-    
+
+    @property
+    def service_docs(self):
+        """Serviço do Google Docs, obtido no primeiro uso."""
+        if self._service_docs is None:
+            self._service_docs = self._obter_servico('docs', 'v1')
+        return self._service_docs
+
+    @property
+    def service_drive(self):
+        """Serviço do Google Drive, obtido no primeiro uso."""
+        if self._service_drive is None:
+            self._service_drive = self._obter_servico('drive', 'v3')
+        return self._service_drive
+
     @staticmethod
     def extrair_id_da_url(url: str) -> str:
         """
@@ -65,13 +87,24 @@ class DocsHandler:
             Tupla (document_id, document_url)
         """
         try:
-            # Cria um documento em branco com o título especificado
-            documento = self.service_docs.documents().create(
-                body={"title": nome_arquivo}
+            # Define e verifica (uma única vez por pasta) a pasta de destino
+            folder_id_destino = self._resolver_pasta_destino(target_folder_id if target_folder_id else DRIVE_FOLDER_ID)
+
+            # Cria o documento diretamente na pasta de destino, sem precisar movê-lo depois
+            metadados = {
+                'name': nome_arquivo,
+                'mimeType': 'application/vnd.google-apps.document'
+            }
+            if folder_id_destino and folder_id_destino != "root":
+                metadados['parents'] = [folder_id_destino]
+            documento = self.service_drive.files().create(
+                body=metadados,
+                fields='id',
+                supportsAllDrives=True
             ).execute()
             
-            document_id = documento.get('documentId')
-            self.logger.info(f"Documento criado com ID: {document_id}")
+            document_id = documento.get('id')
+            self.logger.info(f"Documento criado com ID: {document_id} (pasta: {folder_id_destino or 'root'})")
             
             # Verifica o tamanho do conteúdo
             self.logger.info(f"Tamanho do conteúdo: {len(conteudo)} caracteres")
@@ -89,7 +122,8 @@ class DocsHandler:
                 self.logger.warning("Nenhuma informação de link fornecida")
 
             # Converte o texto para requests da API do Docs, incluindo informações do link
-            requests = converter_markdown_para_docs(conteudo, info_link)
+            # e a formatação do título principal (H1) no tamanho configurado
+            requests = converter_markdown_para_docs(conteudo, info_link, tamanho_titulo=TITULO_TAMANHO)
             self.logger.info(f"Gerados {len(requests)} requests para a API do Docs")
             
             # Aplica as atualizações ao documento
@@ -102,23 +136,6 @@ class DocsHandler:
             else:
                 self.logger.warning("Nenhum request gerado para atualizar o documento")
             
-            # Formata o título principal (H1) para tamanho configurado
-            self._formatar_titulo(document_id, TITULO_TAMANHO)
-            
-            # Define a pasta de destino
-            folder_id_destino = target_folder_id if target_folder_id else DRIVE_FOLDER_ID
-            
-            # Verifica se a pasta existe antes de tentar mover
-            pasta_existe = self._verificar_pasta(folder_id_destino)
-            
-            if not pasta_existe:
-                # A pasta não existe, criar uma nova para armazenar os documentos
-                self.logger.warning(f"A pasta com ID {folder_id_destino} não existe ou você não tem acesso.")
-                folder_id_destino = self._criar_pasta_documentos()
-            
-            # Move o arquivo para a pasta especificada no Drive
-            self._mover_para_pasta(document_id, folder_id_destino)
-            
             # Configura as permissões do documento para o usuário atual
             self._configurar_permissoes_documento(document_id)
             
@@ -130,110 +147,28 @@ class DocsHandler:
         except Exception as e:
             self.logger.error(f"Erro ao criar documento: {e}")
             raise
-    
-    def _formatar_titulo(self, document_id: str, tamanho: int = 17) -> None:
+
+    def _resolver_pasta_destino(self, folder_id: Optional[str]) -> str:
         """
-        Formata o título principal (H1) do documento com o tamanho especificado.
+        Retorna a pasta onde os documentos devem ser criados, verificando cada pasta apenas uma vez.
+        Se a pasta não existir ou não for acessível, cria (uma única vez) uma pasta nova.
         
         Args:
-            document_id: ID do documento no Google Docs
-            tamanho: Tamanho da fonte para o título
-        """
-        try:
-            # Obtém o documento para encontrar o título
-            documento = self.service_docs.documents().get(documentId=document_id).execute()
+            folder_id: ID da pasta solicitada
             
-            # Procura pelo primeiro título (H1)
-            for elemento in documento.get('body', {}).get('content', []):
-                if 'paragraph' in elemento:
-                    paragrafo = elemento.get('paragraph', {})
-                    estilo = paragrafo.get('paragraphStyle', {}).get('namedStyleType', '')
-                    
-                    # Se encontrou um H1, aplica o tamanho da fonte
-                    if estilo == 'HEADING_1':
-                        start_index = elemento.get('startIndex')
-                        end_index = elemento.get('endIndex')
-                        
-                        # Aplica o tamanho da fonte
-                        self.service_docs.documents().batchUpdate(
-                            documentId=document_id,
-                            body={
-                                "requests": [
-                                    {
-                                        "updateTextStyle": {
-                                            "range": {
-                                                "startIndex": start_index,
-                                                "endIndex": end_index
-                                            },
-                                            "textStyle": {
-                                                "fontSize": {
-                                                    "magnitude": tamanho,
-                                                    "unit": "PT"
-                                                },
-                                                "bold": True
-                                            },
-                                            "fields": "fontSize,bold"
-                                        }
-                                    }
-                                ]
-                            }
-                        ).execute()
-                        
-                        self.logger.info(f"Título formatado com tamanho {tamanho}pt")
-                        break
-        
-        except Exception as e:
-            self.logger.warning(f"Erro ao formatar título: {e}")
-    
-    def _mover_para_pasta(self, document_id: str, folder_id: str) -> None:
-        """
-        Move o documento para a pasta especificada no Google Drive.
-        
-        Args:
-            document_id: ID do documento a ser movido
-            folder_id: ID da pasta de destino
+        Returns:
+            ID da pasta a ser usada ('root' para a raiz do Drive)
         """
-        if not folder_id:
-             self.logger.warning(f"Nenhum ID de pasta de destino fornecido para mover o documento {document_id}. O documento permanecerá na raiz.")
-             return
-        try:
-            # Tenta verificar se a pasta de destino existe
-            try:
-                folder = self.service_drive.files().get(
-                    fileId=folder_id,
-                    fields='id,name,mimeType',
-                    supportsAllDrives=True
-                ).execute()
-                
-                self.logger.info(f"Pasta de destino verificada: ID={folder.get('id')}, Nome={folder.get('name')}")
-                
-                # Verifica se é realmente uma pasta
-                if folder.get('mimeType') != 'application/vnd.google-apps.folder':
-                    self.logger.error(f"O ID {folder_id} não é de uma pasta! MimeType: {folder.get('mimeType')}")
-                    return
-                    
-            except Exception as e:
-                self.logger.error(f"Erro ao verificar a pasta de destino {folder_id}: {e}")
-                self.logger.info("Tentando mover o documento mesmo assim...")
-            
-            # Adiciona a pasta como pai do arquivo
-            self.logger.info(f"Tentando mover documento {document_id} para a pasta {folder_id}...")
-            
-            resultado = self.service_drive.files().update(
-                fileId=document_id,
-                addParents=folder_id,
-                removeParents='root',  # Remove da pasta raiz/anterior
-                fields='id, parents',
-                supportsAllDrives=True  # Suporte para shared drives
-            ).execute()
-            
-            self.logger.info(f"Documento {document_id} movido com sucesso para a pasta {folder_id}")
-            self.logger.info(f"Resultado da operação: {resultado}")
-        
-        except Exception as e:
-            self.logger.warning(f"Erro ao mover documento para a pasta: {e}")
-            self.logger.warning(f"Detalhes do erro: Documento ID={document_id}, Pasta ID={folder_id}")
-            # Isso não deve interromper o fluxo principal, apenas logamos o erro 
+        chave = folder_id or "root"
+        with self._pastas_lock:
+            if chave not in self._pastas_verificadas:
+                if self._verificar_pasta(folder_id):
+                    self._pastas_verificadas[chave] = chave
+                else:
+                    # A pasta não existe, criar uma nova para armazenar os documentos
+                    self.logger.warning(f"A pasta com ID {folder_id} não existe ou você não tem acesso.")
+                    self._pastas_verificadas[chave] = self._criar_pasta_documentos()
+            return self._pastas_verificadas[chave]
     
     def obter_conteudo_documento(self, document_id: str) -> str:
         """
@@ -479,13 +414,6 @@ class DocsHandler:
             document_id: ID do documento a configurar
         """
         try:
-            # Verifica quem é o proprietário atual do documento
-            file_info = self.service_drive.files().get(
-                fileId=document_id,
-                fields='owners,permissions',
-                supportsAllDrives=True
-            ).execute()
-            
             self.logger.info("Configurando permissões do documento...")
             
             # Define permissão para qualquer pessoa com o link poder visualizar
@@ -499,7 +427,8 @@ class DocsHandler:
                 fileId=document_id,
                 body=permission,
                 fields='id',
-                sendNotificationEmail=False
+                sendNotificationEmail=False,
+                supportsAllDrives=True
             ).execute()
             
             self.logger.info(f"Permissão configurada para acesso via link: {result.get('id')}")
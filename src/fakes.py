@@ -0,0 +1,606 @@
+# Módulo de serviços falsos (em memória) do Sheets, Drive, Docs e Gemini, para testes de carga sem rede
+import itertools
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import httplib2
+from googleapiclient.errors import HttpError
+from google.api_core.exceptions import ResourceExhausted, ServiceUnavailable
+
+from src.instrumentacao import obter_instrumentacao
+
+logger = logging.getLogger('seo_linkbuilder.fakes')
+
+MIME_PLANILHA = 'application/vnd.google-apps.spreadsheet'
+MIME_DOCUMENTO = 'application/vnd.google-apps.document'
+MIME_PASTA = 'application/vnd.google-apps.folder'
+
+# Vocabulário dos títulos e artigos gerados pelo Gemini falso (sem termos proibidos nem palavras
+# que deixem o título "incompleto" para verificar_e_corrigir_titulo)
+_VOCABULARIO = [
+    'estratégia', 'rodada', 'partida', 'torneio', 'jogada', 'rotina', 'mesa', 'cartas', 'roleta', 'tabuleiro',
+    'desafio', 'equilíbrio', 'ritmo', 'leitura', 'padrões', 'escolhas', 'momento', 'sessão', 'limites', 'foco',
+    'calma', 'atenção', 'detalhes', 'bastidores', 'segredos', 'hábitos', 'planejamento', 'controle', 'regras',
+    'variações', 'clássicos', 'novidades', 'tendências', 'comunidade', 'experiência', 'diversão', 'lazer',
+    'intuição', 'paciência', 'disciplina', 'curiosidades', 'história', 'mitos', 'verdades', 'erros', 'acertos',
+    'iniciantes', 'veteranos', 'noites', 'finais', 'semanas', 'temporadas', 'placares', 'times', 'campeonatos',
+    'análise', 'números', 'probabilidades', 'cenários', 'perfis', 'estilos', 'táticas', 'caminhos', 'sinais',
+]
+
+
+def _erro_http(status: int, mensagem: str) -> HttpError:
+    """Erro no formato do googleapiclient (o mesmo que as APIs reais do Sheets, Drive e Docs lançam)."""
+    resposta = httplib2.Response({'status': status})
+    resposta.reason = mensagem
+    conteudo = json.dumps({'error': {'code': status, 'message': mensagem}}).encode('utf-8')
+    return HttpError(resposta, conteudo)
+
+
+def _erro_gemini(status: int, mensagem: str) -> Exception:
+    """Erro no formato do google.api_core (o mesmo que o SDK do Gemini lança)."""
+    if status == 429:
+        return ResourceExhausted(mensagem)
+    return ServiceUnavailable(mensagem)
+
+
+class PerfilServico:
+    """
+    Comportamento de uma API falsa: latência, erros, erros 429 e cotas.
+
+    Cada chamada espera `latencia` segundos (± `variacao_latencia`), pode falhar com erro 503
+    (probabilidade `taxa_erro`) ou 429 (`taxa_429`), e recebe 429 quando passa da cota
+    por minuto (`cota_por_minuto`, janela deslizante) ou da cota total (`cota_total`).
+    Chamadas recusadas pela cota não contam para ela, como nas APIs reais.
+    """
+
+    def __init__(self, latencia: float = 0.0, variacao_latencia: float = 0.0, taxa_erro: float = 0.0,
+                 taxa_429: float = 0.0, cota_por_minuto: Optional[int] = None, cota_total: Optional[int] = None,
+                 semente: Optional[int] = None):
+        self.latencia = latencia
+        self.variacao_latencia = variacao_latencia
+        self.taxa_erro = taxa_erro
+        self.taxa_429 = taxa_429
+        self.cota_por_minuto = cota_por_minuto
+        self.cota_total = cota_total
+        self._aleatorio = random.Random(semente)
+        self._lock = threading.Lock()
+        self._janela: Deque[float] = deque()
+        self.chamadas = 0
+        self.aceitas = 0
+        self.erros = 0
+        self.erros_429 = 0
+        self.por_operacao: Dict[str, int] = {}
+
+    def sortear(self, funcao: Callable[[random.Random], Any]) -> Any:
+        """Executa `funcao` com o gerador aleatório do perfil (reprodutível com `semente`)."""
+        with self._lock:
+            return funcao(self._aleatorio)
+
+    def chamar(self, operacao: str, fabrica_erro: Callable[[int, str], Exception] = _erro_http) -> None:
+        """Simula a latência e as falhas de uma chamada; lança o erro da API quando ela falha."""
+        with self._lock:
+            self.chamadas += 1
+            self.por_operacao[operacao] = self.por_operacao.get(operacao, 0) + 1
+            agora = time.monotonic()
+            while self._janela and agora - self._janela[0] >= 60.0:
+                self._janela.popleft()
+            if self.cota_total is not None and self.aceitas >= self.cota_total:
+                self.erros_429 += 1
+                raise fabrica_erro(429, f"Cota total de {self.cota_total} chamadas esgotada ({operacao})")
+            if self.cota_por_minuto is not None and len(self._janela) >= self.cota_por_minuto:
+                self.erros_429 += 1
+                raise fabrica_erro(429, f"Cota de {self.cota_por_minuto} chamadas por minuto excedida ({operacao})")
+            self._janela.append(agora)
+            self.aceitas += 1
+            espera = max(0.0, self.latencia + self._aleatorio.uniform(-self.variacao_latencia, self.variacao_latencia))
+            sorteio = self._aleatorio.random()
+
+        if espera:
+            time.sleep(espera)
+        if sorteio < self.taxa_429:
+            with self._lock:
+                self.erros_429 += 1
+            raise fabrica_erro(429, f"Rate limit simulado ({operacao})")
+        if sorteio < self.taxa_429 + self.taxa_erro:
+            with self._lock:
+                self.erros += 1
+            raise fabrica_erro(503, f"Erro simulado ({operacao})")
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'chamadas': self.chamadas,
+                'aceitas': self.aceitas,
+                'erros': self.erros,
+                'erros_429': self.erros_429,
+                'por_operacao': dict(self.por_operacao),
+            }
+
+
+class _Requisicao:
+    """
+    Requisição preparada, executada com `.execute()` como as do googleapiclient e registrada na
+    instrumentação com o mesmo methodId da API real.
+    """
+
+    def __init__(self, perfil: PerfilServico, operacao: str, funcao: Callable[[], Any]):
+        self._perfil = perfil
+        self._operacao = operacao
+        self._funcao = funcao
+
+    def execute(self, num_retries: int = 0, http: Any = None) -> Any:
+        with obter_instrumentacao().medir(self._operacao) as registro:
+            self._perfil.chamar(self._operacao)
+            resultado = self._funcao()
+            registro['bytes_recebidos'] = len(json.dumps(resultado, ensure_ascii=False, default=str).encode('utf-8'))
+            return resultado
+
+
+# ---------------------------------------------------------------------------------------------
+# Sheets
+# ---------------------------------------------------------------------------------------------
+
+_RANGE_A1 = re.compile(
+    r"^(?:'?(?P<aba>[^!]+?)'?!)?(?P<c1>[A-Z]+)?(?P<l1>\d+)?(?::(?P<c2>[A-Z]+)?(?P<l2>\d+)?)?$"
+)
+
+
+def _indice_coluna(letras: str) -> int:
+    """'A' -> 0, 'Z' -> 25, 'AA' -> 26."""
+    indice = 0
+    for letra in letras:
+        indice = indice * 26 + (ord(letra) - ord('A') + 1)
+    return indice - 1
+
+
+def _interpretar_range(range_a1: str) -> Tuple[str, int, int, Optional[int], Optional[int]]:
+    """
+    Interpreta um range A1 ('Aba!A1:Z20', 'Aba!A:Z', 'Aba!C5', 'Aba!A3:F').
+
+    Returns:
+        (aba, coluna inicial, linha inicial, coluna final, linha final), todos 0-based;
+        coluna/linha final None significa "até o fim"
+    """
+    encontrado = _RANGE_A1.match(range_a1.strip())
+    if not encontrado:
+        raise _erro_http(400, f"Unable to parse range: {range_a1}")
+    aba = encontrado.group('aba') or ''
+    c1 = _indice_coluna(encontrado.group('c1')) if encontrado.group('c1') else 0
+    l1 = int(encontrado.group('l1')) - 1 if encontrado.group('l1') else 0
+    if ':' not in range_a1:
+        # Célula única
+        return aba, c1, l1, c1, l1
+    c2 = _indice_coluna(encontrado.group('c2')) if encontrado.group('c2') else None
+    l2 = int(encontrado.group('l2')) - 1 if encontrado.group('l2') else None
+    return aba, c1, l1, c2, l2
+
+
+class _ValoresFake:
+    def __init__(self, servico: 'FakeSheetsService'):
+        self._servico = servico
+
+    def get(self, spreadsheetId: str, range: str, **kwargs) -> _Requisicao:
+        return _Requisicao(self._servico.perfil, 'sheets.spreadsheets.values.get',
+                           lambda: self._servico._ler(spreadsheetId, range))
+
+    def update(self, spreadsheetId: str, range: str, body: Dict, valueInputOption: str = 'RAW', **kwargs) -> _Requisicao:
+        def gravar():
+            celulas = self._servico._gravar(spreadsheetId, range, body.get('values', []))
+            return {'spreadsheetId': spreadsheetId, 'updatedRange': range, 'updatedCells': celulas}
+        return _Requisicao(self._servico.perfil, 'sheets.spreadsheets.values.update', gravar)
+
+    def batchUpdate(self, spreadsheetId: str, body: Dict, **kwargs) -> _Requisicao:
+        def gravar():
+            total = sum(self._servico._gravar(spreadsheetId, d['range'], d.get('values', [])) for d in body.get('data', []))
+            return {'spreadsheetId': spreadsheetId, 'totalUpdatedCells': total}
+        return _Requisicao(self._servico.perfil, 'sheets.spreadsheets.values.batchUpdate', gravar)
+
+
+class _PlanilhasFake:
+    def __init__(self, servico: 'FakeSheetsService'):
+        self._servico = servico
+
+    def get(self, spreadsheetId: str, **kwargs) -> _Requisicao:
+        def obter():
+            abas = self._servico._abas(spreadsheetId)
+            return {
+                'spreadsheetId': spreadsheetId,
+                'sheets': [{'properties': {'sheetId': i, 'title': nome, 'index': i}} for i, nome in enumerate(abas)],
+            }
+        return _Requisicao(self._servico.perfil, 'sheets.spreadsheets.get', obter)
+
+    def values(self) -> _ValoresFake:
+        return self._servico._valores
+
+
+class FakeSheetsService:
+    """
+    Substituto em memória do serviço do Sheets (`build('sheets', 'v4')`), com as operações usadas
+    pelo SheetsHandler: spreadsheets().get e values().get/update/batchUpdate.
+    """
+
+    def __init__(self, perfil: Optional[PerfilServico] = None):
+        self.perfil = perfil or PerfilServico()
+        # {spreadsheet_id: {aba: [[células]]}}
+        self.planilhas: Dict[str, Dict[str, List[List[Any]]]] = {}
+        self._lock = threading.Lock()
+        self._valores = _ValoresFake(self)
+        self._planilhas = _PlanilhasFake(self)
+
+    def spreadsheets(self) -> _PlanilhasFake:
+        return self._planilhas
+
+    def criar_planilha(self, spreadsheet_id: str, abas: Dict[str, List[List[Any]]]) -> None:
+        """Cria (ou substitui) uma planilha com as linhas de cada aba."""
+        with self._lock:
+            self.planilhas[spreadsheet_id] = {aba: [list(linha) for linha in linhas] for aba, linhas in abas.items()}
+
+    def _abas(self, spreadsheet_id: str) -> Dict[str, List[List[Any]]]:
+        abas = self.planilhas.get(spreadsheet_id)
+        if abas is None:
+            raise _erro_http(404, f"Requested entity was not found: {spreadsheet_id}")
+        return abas
+
+    def _grade(self, spreadsheet_id: str, aba: str) -> List[List[Any]]:
+        abas = self._abas(spreadsheet_id)
+        if aba not in abas:
+            if aba or not abas:
+                raise _erro_http(400, f"Unable to parse range: {aba}")
+            aba = next(iter(abas))
+        return abas[aba]
+
+    def _ler(self, spreadsheet_id: str, range_a1: str) -> Dict[str, Any]:
+        aba, c1, l1, c2, l2 = _interpretar_range(range_a1)
+        with self._lock:
+            grade = self._grade(spreadsheet_id, aba)
+            linhas = grade[l1:None if l2 is None else l2 + 1]
+            valores = [list(linha[c1:None if c2 is None else c2 + 1]) for linha in linhas]
+        # Como a API real, omite células vazias no fim de cada linha e linhas vazias no fim
+        for linha in valores:
+            while linha and linha[-1] in ('', None):
+                linha.pop()
+        while valores and not valores[-1]:
+            valores.pop()
+        resposta: Dict[str, Any] = {'range': range_a1, 'majorDimension': 'ROWS'}
+        if valores:
+            resposta['values'] = valores
+        return resposta
+
+    def _gravar(self, spreadsheet_id: str, range_a1: str, valores: List[List[Any]]) -> int:
+        aba, c1, l1, _, _ = _interpretar_range(range_a1)
+        celulas = 0
+        with self._lock:
+            grade = self._grade(spreadsheet_id, aba)
+            for i, linha_valores in enumerate(valores):
+                while len(grade) <= l1 + i:
+                    grade.append([])
+                linha = grade[l1 + i]
+                for j, valor in enumerate(linha_valores):
+                    while len(linha) <= c1 + j:
+                        linha.append('')
+                    linha[c1 + j] = valor
+                    celulas += 1
+        return celulas
+
+    def valor(self, spreadsheet_id: str, aba: str, celula: str) -> Any:
+        """Valor atual de uma célula ('C5'), para conferir o resultado de um teste."""
+        _, coluna, linha, _, _ = _interpretar_range(celula)
+        with self._lock:
+            grade = self._grade(spreadsheet_id, aba)
+            if linha < len(grade) and coluna < len(grade[linha]):
+                return grade[linha][coluna]
+        return ''
+
+
+def gerar_linhas_planilha(quantidade: int, semente: Optional[int] = None) -> List[List[str]]:
+    """
+    Gera uma aba de exemplo (cabeçalho + `quantidade` linhas) com colunas reconhecidas pelo
+    mapeamento de COLUNAS_MAPEAMENTO_NOMES; título e documento ficam vazios para serem gerados.
+    A última coluna (Observação) é sempre preenchida, então as linhas lidas têm todas as colunas.
+    """
+    aleatorio = random.Random(semente)
+    cabecalho = ['ID', 'Site', 'Âncora', 'URL de Destino', 'Tema', 'Conteúdo (Drive)', 'Observação']
+    linhas = [cabecalho]
+    for i in range(1, quantidade + 1):
+        ancora = aleatorio.choice(['roleta online', 'poker', 'blackjack', 'bingo', 'apostas esportivas', 'slots'])
+        linhas.append([str(i), f"site{i % 97}.com.br", ancora, f"https://exemplo.com.br/{ancora.replace(' ', '-')}", '', '', 'teste de carga'])
+    return linhas
+
+
+# ---------------------------------------------------------------------------------------------
+# Drive
+# ---------------------------------------------------------------------------------------------
+
+class _ArquivosFake:
+    def __init__(self, servico: 'FakeDriveService'):
+        self._servico = servico
+
+    def list(self, q: str = '', fields: str = '', **kwargs) -> _Requisicao:
+        def listar():
+            mime = re.search(r"mimeType\s*=\s*'([^']+)'", q or '')
+            with self._servico._lock:
+                arquivos = [
+                    {'id': a['id'], 'name': a['name']} for a in self._servico.arquivos.values()
+                    if not mime or a['mimeType'] == mime.group(1)
+                ]
+            return {'files': arquivos}
+        return _Requisicao(self._servico.perfil, 'drive.files.list', listar)
+
+    def create(self, body: Dict, fields: str = 'id', **kwargs) -> _Requisicao:
+        return _Requisicao(self._servico.perfil, 'drive.files.create', lambda: self._servico._criar(body))
+
+    def get(self, fileId: str, fields: str = '', **kwargs) -> _Requisicao:
+        def obter():
+            with self._servico._lock:
+                arquivo = self._servico.arquivos.get(fileId)
+            if arquivo is None:
+                raise _erro_http(404, f"File not found: {fileId}")
+            return dict(arquivo)
+        return _Requisicao(self._servico.perfil, 'drive.files.get', obter)
+
+    def update(self, fileId: str, body: Optional[Dict] = None, addParents: Optional[str] = None,
+               removeParents: Optional[str] = None, **kwargs) -> _Requisicao:
+        def atualizar():
+            with self._servico._lock:
+                arquivo = self._servico.arquivos.get(fileId)
+                if arquivo is None:
+                    raise _erro_http(404, f"File not found: {fileId}")
+                if body and 'name' in body:
+                    arquivo['name'] = body['name']
+                    if self._servico.docs is not None:
+                        self._servico.docs._renomear(fileId, body['name'])
+                pais = [p for p in arquivo['parents'] if p not in (removeParents or '').split(',')]
+                pais.extend(p for p in (addParents or '').split(',') if p)
+                arquivo['parents'] = pais
+                return dict(arquivo)
+        return _Requisicao(self._servico.perfil, 'drive.files.update', atualizar)
+
+
+class _PermissoesFake:
+    def __init__(self, servico: 'FakeDriveService'):
+        self._servico = servico
+
+    def create(self, fileId: str, body: Dict, **kwargs) -> _Requisicao:
+        def criar():
+            with self._servico._lock:
+                if fileId not in self._servico.arquivos:
+                    raise _erro_http(404, f"File not found: {fileId}")
+                permissao = dict(body, id=f"perm-{next(self._servico._ids)}")
+                self._servico.permissoes.setdefault(fileId, []).append(permissao)
+            return {'id': permissao['id']}
+        return _Requisicao(self._servico.perfil, 'drive.permissions.create', criar)
+
+
+class FakeDriveService:
+    """
+    Substituto em memória do serviço do Drive (`build('drive', 'v3')`): files().list/create/get/update
+    e permissions().create. Documentos criados aqui passam a existir no FakeDocsService ligado a ele.
+    """
+
+    def __init__(self, perfil: Optional[PerfilServico] = None, docs: Optional['FakeDocsService'] = None):
+        self.perfil = perfil or PerfilServico()
+        self.docs = docs
+        self.arquivos: Dict[str, Dict[str, Any]] = {}
+        self.permissoes: Dict[str, List[Dict[str, Any]]] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._arquivos = _ArquivosFake(self)
+        self._permissoes = _PermissoesFake(self)
+
+    def files(self) -> _ArquivosFake:
+        return self._arquivos
+
+    def permissions(self) -> _PermissoesFake:
+        return self._permissoes
+
+    def criar_pasta(self, nome: str, folder_id: Optional[str] = None) -> str:
+        """Cria uma pasta diretamente (sem latência nem falhas) e retorna o ID."""
+        return self._criar({'name': nome, 'mimeType': MIME_PASTA}, folder_id)['id']
+
+    def _criar(self, body: Dict, file_id: Optional[str] = None) -> Dict[str, Any]:
+        mime = body.get('mimeType', 'application/octet-stream')
+        with self._lock:
+            file_id = file_id or f"fake-{mime.rsplit('.', 1)[-1]}-{next(self._ids)}"
+            arquivo = {
+                'id': file_id,
+                'name': body.get('name', 'Sem nome'),
+                'mimeType': mime,
+                'parents': list(body.get('parents', ['root'])),
+                'webViewLink': f"https://drive.google.com/fake/{file_id}",
+            }
+            self.arquivos[file_id] = arquivo
+        if mime == MIME_DOCUMENTO and self.docs is not None:
+            self.docs._registrar(file_id, arquivo['name'])
+        return dict(arquivo)
+
+
+# ---------------------------------------------------------------------------------------------
+# Docs
+# ---------------------------------------------------------------------------------------------
+
+class _DocumentosFake:
+    def __init__(self, servico: 'FakeDocsService'):
+        self._servico = servico
+
+    def get(self, documentId: str, **kwargs) -> _Requisicao:
+        return _Requisicao(self._servico.perfil, 'docs.documents.get', lambda: self._servico._obter(documentId))
+
+    def batchUpdate(self, documentId: str, body: Dict, **kwargs) -> _Requisicao:
+        return _Requisicao(self._servico.perfil, 'docs.documents.batchUpdate',
+                           lambda: self._servico._aplicar(documentId, body.get('requests', [])))
+
+
+class FakeDocsService:
+    """
+    Substituto em memória do serviço do Docs (`build('docs', 'v1')`). Aplica os requests
+    insertText e deleteContentRange ao texto do documento; os de formatação são apenas contados.
+    """
+
+    def __init__(self, perfil: Optional[PerfilServico] = None, guardar_texto: bool = True):
+        self.perfil = perfil or PerfilServico()
+        # Com guardar_texto=False só o tamanho do texto é mantido (testes com muitos documentos)
+        self.guardar_texto = guardar_texto
+        self.documentos: Dict[str, Dict[str, Any]] = {}
+        self.requests_aplicados = 0
+        self._lock = threading.Lock()
+        self._documentos = _DocumentosFake(self)
+
+    def documents(self) -> _DocumentosFake:
+        return self._documentos
+
+    def _registrar(self, document_id: str, titulo: str) -> None:
+        with self._lock:
+            self.documentos[document_id] = {'title': titulo, 'texto': '', 'tamanho': 0}
+
+    def _renomear(self, document_id: str, titulo: str) -> None:
+        with self._lock:
+            if document_id in self.documentos:
+                self.documentos[document_id]['title'] = titulo
+
+    def _documento(self, document_id: str) -> Dict[str, Any]:
+        documento = self.documentos.get(document_id)
+        if documento is None:
+            raise _erro_http(404, f"Requested entity was not found: {document_id}")
+        return documento
+
+    def _obter(self, document_id: str) -> Dict[str, Any]:
+        with self._lock:
+            documento = self._documento(document_id)
+            texto, tamanho = documento['texto'], documento['tamanho']
+        # Estrutura mínima de um documento: quebra de seção seguida de um parágrafo com todo o texto
+        return {
+            'documentId': document_id,
+            'title': documento['title'],
+            'body': {'content': [
+                {'startIndex': 0, 'endIndex': 1, 'sectionBreak': {}},
+                {'startIndex': 1, 'endIndex': tamanho + 2,
+                 'paragraph': {'elements': [{'textRun': {'content': texto + '\n'}}]}},
+            ]},
+        }
+
+    def _aplicar(self, document_id: str, requests: List[Dict[str, Any]]) -> Dict[str, Any]:
+        with self._lock:
+            documento = self._documento(document_id)
+            for request in requests:
+                if 'insertText' in request:
+                    inserir = request['insertText']
+                    texto = inserir.get('text', '')
+                    documento['tamanho'] += len(texto)
+                    if self.guardar_texto:
+                        posicao = max(0, inserir.get('location', {}).get('index', 1) - 1)
+                        documento['texto'] = documento['texto'][:posicao] + texto + documento['texto'][posicao:]
+                elif 'deleteContentRange' in request:
+                    intervalo = request['deleteContentRange'].get('range', {})
+                    inicio = max(0, intervalo.get('startIndex', 1) - 1)
+                    fim = max(inicio, intervalo.get('endIndex', 1) - 1)
+                    documento['tamanho'] = max(0, documento['tamanho'] - (fim - inicio))
+                    if self.guardar_texto:
+                        documento['texto'] = documento['texto'][:inicio] + documento['texto'][fim:]
+            self.requests_aplicados += len(requests)
+        return {'documentId': document_id, 'replies': [{} for _ in requests]}
+
+
+# ---------------------------------------------------------------------------------------------
+# Gemini
+# ---------------------------------------------------------------------------------------------
+
+_ITEM_LOTE = re.compile(r'- id "(\d+)": palavra-âncora')
+_QUANTIDADE_TITULOS = re.compile(r'Gere (\d+) títulos')
+_TITULO_BASE = 'Use o seguinte título como base para o conteúdo:\n'
+_TITULO_FORNECIDO = re.compile(r'^## TÍTULO FORNECIDO: *(.+)$', re.MULTILINE)
+_PALAVRA_ANCORA = re.compile(r'^## Palavra-âncora: *(.+)$', re.MULTILINE)
+
+
+class RespostaFake:
+    """Resposta do Gemini falso (o handler usa apenas `text`)."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGeminiModel:
+    """
+    Substituto do `genai.GenerativeModel` para o GeminiHandler(model=...).
+
+    Reconhece o tipo de prompt montado pelo GeminiHandler e responde no formato esperado:
+    array JSON para títulos em lote, uma linha por título para títulos avulsos e um artigo em
+    Markdown (com `palavras_artigo` palavras) para conteúdo. Os títulos são combinações
+    aleatórias do vocabulário, distintas o bastante para passar pelo índice de similaridade.
+    """
+
+    def __init__(self, perfil: Optional[PerfilServico] = None, palavras_artigo: int = 600):
+        self.perfil = perfil or PerfilServico()
+        self.palavras_artigo = palavras_artigo
+
+    def generate_content(self, prompt: str, generation_config: Optional[Dict] = None, **kwargs) -> RespostaFake:
+        self.perfil.chamar('gemini.generate_content', _erro_gemini)
+        ids = _ITEM_LOTE.findall(prompt)
+        if ids:
+            return RespostaFake(json.dumps([{'id': i, 'titulo': self._titulo()} for i in ids], ensure_ascii=False))
+        if _TITULO_BASE not in prompt and 'Geração de Títulos' in prompt:
+            quantidade = _QUANTIDADE_TITULOS.search(prompt)
+            return RespostaFake('\n'.join(self._titulo() for _ in range(int(quantidade.group(1)) if quantidade else 1)))
+        if _TITULO_BASE in prompt:
+            titulo = prompt.split(_TITULO_BASE, 1)[1].strip().split('\n', 1)[0]
+        else:
+            fornecido = _TITULO_FORNECIDO.search(prompt)
+            titulo = fornecido.group(1).strip() if fornecido and fornecido.group(1).strip() else self._titulo()
+        ancora = _PALAVRA_ANCORA.search(prompt)
+        return RespostaFake(self._artigo(titulo, ancora.group(1).strip() if ancora else ''))
+
+    def _titulo(self) -> str:
+        palavras = self.perfil.sortear(lambda aleatorio: aleatorio.sample(_VOCABULARIO, aleatorio.randint(9, 11)))
+        titulo = ' '.join(palavras)
+        return titulo[0].upper() + titulo[1:]
+
+    def _artigo(self, titulo: str, ancora: str = '') -> str:
+        def sortear(aleatorio: random.Random) -> List[str]:
+            return [aleatorio.choice(_VOCABULARIO) for _ in range(self.palavras_artigo)]
+        palavras = self.perfil.sortear(sortear)
+        paragrafos = []
+        for inicio in range(0, len(palavras), 60):
+            trecho = ' '.join(palavras[inicio:inicio + 60])
+            if ancora and not paragrafos:
+                # A palavra-âncora no primeiro parágrafo recebe o link, como num artigo real
+                trecho += f" com {ancora}"
+            paragrafos.append(trecho[0].upper() + trecho[1:] + '.')
+        secoes = [f"# {titulo}"]
+        for i, paragrafo in enumerate(paragrafos):
+            if i and i % 3 == 0:
+                secoes.append(f"## {paragrafo.split(' ', 1)[0]} em detalhes")
+            secoes.append(paragrafo)
+        return '\n\n'.join(secoes)
+
+
+class AmbienteFake:
+    """
+    Os quatro serviços falsos já ligados entre si, prontos para injetar nos handlers:
+
+        ambiente = AmbienteFake(perfil_gemini=PerfilServico(latencia=0.8, taxa_429=0.01))
+        ambiente.sheets.criar_planilha("planilha", {"Aba": gerar_linhas_planilha(10000)})
+        sheets = SheetsHandler(service=ambiente.sheets, service_drive=ambiente.drive)
+        docs = DocsHandler(service_docs=ambiente.docs, service_drive=ambiente.drive)
+        gemini = GeminiHandler(model=ambiente.gemini)
+    """
+
+    def __init__(self, perfil_sheets: Optional[PerfilServico] = None, perfil_drive: Optional[PerfilServico] = None,
+                 perfil_docs: Optional[PerfilServico] = None, perfil_gemini: Optional[PerfilServico] = None,
+                 palavras_artigo: int = 600, guardar_texto: bool = True):
+        self.docs = FakeDocsService(perfil_docs, guardar_texto=guardar_texto)
+        self.drive = FakeDriveService(perfil_drive, docs=self.docs)
+        self.sheets = FakeSheetsService(perfil_sheets)
+        self.gemini = FakeGeminiModel(perfil_gemini, palavras_artigo=palavras_artigo)
+
+    def estatisticas(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            'sheets': self.sheets.perfil.estatisticas(),
+            'drive': self.drive.perfil.estatisticas(),
+            'docs': self.docs.perfil.estatisticas(),
+            'gemini': self.gemini.perfil.estatisticas(),
+        }
@@ -1,28 +1,44 @@
 # Módulo para interagir com a API do Gemini
 import os
+import asyncio
 import logging
-import google.generativeai as genai
 import re
 import random
 import time
+import json
+from functools import lru_cache
+import threading
 from typing import Dict, Tuple, Optional, List
-from unidecode import unidecode
-from google.api_core import retry
-from google.api_core.exceptions import ResourceExhausted
-from Levenshtein import ratio
-import sqlite3
 
 from src.config import (
     GOOGLE_API_KEY, 
     GEMINI_MODEL,
     GEMINI_MAX_OUTPUT_TOKENS,
     GEMINI_TEMPERATURE,
+    GEMINI_CACHE_ATIVO,
     estimar_custo_gemini,
     GEMINI_PRECO_ENTRADA as GEMINI_INPUT_COST_PER_1K,
     GEMINI_PRECO_SAIDA as GEMINI_OUTPUT_COST_PER_1K
 )
-from src.utils import contar_tokens, substituir_links_markdown, normalizar_texto
-from .db_handler import DBHandler
+from src.utils import contar_tokens, preparar_codificador, substituir_links_markdown, normalizar_texto
+from src.rate_limiter import obter_rate_limiter
+from src.response_cache import ResponseCache, RespostaCache
+from src.instrumentacao import obter_instrumentacao, CACHE
+from src.orcamento import obter_governador
+from src.similarity_index import SimilarityIndex
+from .db_handler import DBHandler, AsyncDBHandler
+
+@lru_cache(maxsize=None)
+def _levenshtein_ratio():
+    """`Levenshtein.ratio`, importado no primeiro uso (fica fora da abertura do programa)."""
+    from Levenshtein import ratio
+    return ratio
+
+@lru_cache(maxsize=None)
+def _unidecode():
+    """`unidecode.unidecode`, importado no primeiro uso (fica fora da abertura do programa)."""
+    from unidecode import unidecode
+    return unidecode
 
 def qualquer_palavra_em_outra(palavras1, palavras2):
     """
@@ -34,7 +50,116 @@ def qualquer_palavra_em_outra(palavras1, palavras2):
                 return True
     return False
 
-def verificar_conteudo_proibido(texto: str) -> str:
+# Mapeamento de termos sensíveis para alternativas (a ordem define a prioridade das substituições)
+TERMOS_PROIBIDOS = {
+    # Termos de ganho financeiro
+    r'\bganhar dinheiro\b': 'ter uma experiência divertida',
+    r'\blucrar\b': 'divertir-se',
+    r'\blucrativo\b': 'empolgante',
+    r'\blucros\b': 'momentos divertidos',
+    r'\bganhos\b': 'resultados positivos',
+    r'\bganhar\b': 'aproveitar',
+    r'\brico\b': 'mais experiente',
+    r'\briqueza\b': 'satisfação',
+    r'\benriquecer\b': 'melhorar sua experiência',
+    r'\bfique rico\b': 'divirta-se mais',
+    r'\brentabilidade\b': 'diversão',
+    r'\brentável\b': 'interessante',
+    r'\bretorno\b': 'satisfação',
+    
+    # Garantias de sucesso
+    r'\bgarantido\b': 'possível',
+    r'\bgarantia\b': 'possibilidade',
+    r'\bcerteza\b': 'chance',
+    r'\binfalível\b': 'interessante',
+    
+    # Termos relacionados a dinheiro
+    r'\bdinheiro fácil\b': 'diversão responsável',
+    r'\bgrana\b': 'experiência',
+    r'\bdinheiro real\b': 'jogo interativo',
+    
+    # Termos de apostas (novos)
+    r'\bapostar tudo\b': 'jogar com responsabilidade',
+    r'\bapostar alto\b': 'jogar com moderação',
+    r'\bapostas altas\b': 'jogadas estratégicas',
+    r'\bvício\b': 'hobby',
+    r'\bviciado\b': 'entusiasta',
+    
+    # Termos discriminatórios (novos)
+    r'\braciais\b': 'racionais',
+    r'\bpreconceito\b': 'diferenças',
+    r'\bdiscriminação\b': 'distinção',
+    
+    # Termos políticos (novos)
+    r'\bpolítica\b': 'gestão',
+    r'\bpolítico\b': 'administrador',
+    r'\bpartido\b': 'grupo',
+    r'\beleição\b': 'escolha',
+    r'\bvotar\b': 'escolher',
+    
+    # Termos de violência (novos)
+    r'\bviolência\b': 'desafio',
+    r'\bbriga\b': 'competição',
+    r'\bcrime\b': 'incidente',
+    r'\btragédia\b': 'acontecimento',
+    
+    # Termos infantis (novos)
+    r'\bcriança\b': 'pessoa',
+    r'\binfantil\b': 'iniciante',
+    r'\bmenor de idade\b': 'inexperiente',
+    
+    # Termos de investimento (novos)
+    r'\binvestir\b': 'participar',
+    r'\binvestimento\b': 'participação',
+    r'\binvestidor\b': 'participante',
+    r'\baplicar\b': 'utilizar',
+    r'\baplicação\b': 'utilização'
+}
+
+
+def _regex_trie(termos: List[str]) -> str:
+    """Monta uma alternância em forma de trie (prefixos compartilhados), bem mais rápida que uma lista plana."""
+    trie: Dict = {}
+    for termo in termos:
+        no = trie
+        for caractere in termo:
+            no = no.setdefault(caractere, {})
+        no[''] = True
+
+    def _montar(no: Dict) -> str:
+        # O fim de termo ('') torna o restante opcional; o quantificador guloso tenta primeiro o termo mais longo
+        ramos = [re.escape(c) + _montar(filho) for c, filho in sorted(no.items()) if c]
+        if not ramos:
+            return ''
+        corpo = ramos[0] if len(ramos) == 1 else '(?:' + '|'.join(ramos) + ')'
+        if '' in no:
+            corpo = '(?:' + corpo + ')?'
+        return corpo
+
+    return _montar(trie)
+
+def _compilar_termos_proibidos(termos: Dict[str, str]) -> Tuple["re.Pattern", Dict[str, Tuple[int, str]]]:
+    """
+    Compila todos os padrões numa única expressão, para que o texto seja reescrito em uma só passada.
+
+    Os padrões são termos literais entre \\b; o termo casado (em minúsculas) é buscado numa tabela
+    com a posição do padrão e o substituto. Padrões que contêm um padrão anterior nunca casam na
+    aplicação sequencial (ex.: 'fique rico' depois de 'rico') e por isso são descartados.
+    """
+    tabela: Dict[str, Tuple[int, str]] = {}
+    for indice, (padrao, substituto) in enumerate(termos.items()):
+        literal = padrao.replace(r'\b', '')
+        if not re.fullmatch(r"[\w' -]+", literal):
+            raise ValueError(f"Padrão de termo proibido não é um termo literal: {padrao}")
+        if any(re.search(rf'\b{re.escape(anterior)}\b', literal, re.IGNORECASE) for anterior in tabela):
+            continue
+        tabela[literal.lower()] = (indice, substituto)
+    regex = re.compile(r'\b' + _regex_trie(list(tabela)) + r'\b', re.IGNORECASE)
+    return regex, tabela
+
+_REGEX_TERMOS_PROIBIDOS, _TABELA_TERMOS_PROIBIDOS = _compilar_termos_proibidos(TERMOS_PROIBIDOS)
+
+def verificar_conteudo_proibido(texto: str) -> Tuple[str, List[str]]:
     """
     Verifica e substitui termos sensíveis no conteúdo gerado.
     
@@ -42,88 +167,25 @@ def verificar_conteudo_proibido(texto: str) -> str:
         texto: O texto a ser verificado
         
     Returns:
-        Texto com termos sensíveis substituídos por alternativas adequadas
+        Tupla (texto com termos sensíveis substituídos por alternativas adequadas,
+        lista dos termos encontrados na ordem de TERMOS_PROIBIDOS)
     """
-    # Mapeamento de termos sensíveis para alternativas
-    termos_proibidos = {
-        # Termos de ganho financeiro
-        r'\bganhar dinheiro\b': 'ter uma experiência divertida',
-        r'\blucrar\b': 'divertir-se',
-        r'\blucrativo\b': 'empolgante',
-        r'\blucros\b': 'momentos divertidos',
-        r'\bganhos\b': 'resultados positivos',
-        r'\bganhar\b': 'aproveitar',
-        r'\brico\b': 'mais experiente',
-        r'\briqueza\b': 'satisfação',
-        r'\benriquecer\b': 'melhorar sua experiência',
-        r'\bfique rico\b': 'divirta-se mais',
-        r'\brentabilidade\b': 'diversão',
-        r'\brentável\b': 'interessante',
-        r'\bretorno\b': 'satisfação',
-        
-        # Garantias de sucesso
-        r'\bgarantido\b': 'possível',
-        r'\bgarantia\b': 'possibilidade',
-        r'\bcerteza\b': 'chance',
-        r'\binfalível\b': 'interessante',
-        
-        # Termos relacionados a dinheiro
-        r'\bdinheiro fácil\b': 'diversão responsável',
-        r'\bgrana\b': 'experiência',
-        r'\bdinheiro real\b': 'jogo interativo',
-        
-        # Termos de apostas (novos)
-        r'\bapostar tudo\b': 'jogar com responsabilidade',
-        r'\bapostar alto\b': 'jogar com moderação',
-        r'\bapostas altas\b': 'jogadas estratégicas',
-        r'\bvício\b': 'hobby',
-        r'\bviciado\b': 'entusiasta',
-        
-        # Termos discriminatórios (novos)
-        r'\braciais\b': 'racionais',
-        r'\bpreconceito\b': 'diferenças',
-        r'\bdiscriminação\b': 'distinção',
-        
-        # Termos políticos (novos)
-        r'\bpolítica\b': 'gestão',
-        r'\bpolítico\b': 'administrador',
-        r'\bpartido\b': 'grupo',
-        r'\beleição\b': 'escolha',
-        r'\bvotar\b': 'escolher',
-        
-        # Termos de violência (novos)
-        r'\bviolência\b': 'desafio',
-        r'\bbriga\b': 'competição',
-        r'\bcrime\b': 'incidente',
-        r'\btragédia\b': 'acontecimento',
-        
-        # Termos infantis (novos)
-        r'\bcriança\b': 'pessoa',
-        r'\binfantil\b': 'iniciante',
-        r'\bmenor de idade\b': 'inexperiente',
-        
-        # Termos de investimento (novos)
-        r'\binvestir\b': 'participar',
-        r'\binvestimento\b': 'participação',
-        r'\binvestidor\b': 'participante',
-        r'\baplicar\b': 'utilizar',
-        r'\baplicação\b': 'utilização'
-    }
-    
-    texto_modificado = texto
-    termos_substituidos = []
-    
-    for padrao, substituto in termos_proibidos.items():
-        # Encontra todas as ocorrências do padrão
-        ocorrencias = re.findall(padrao, texto_modificado, re.IGNORECASE)
-        
-        if ocorrencias:
-            # Registra os termos encontrados
-            termos_substituidos.extend(ocorrencias)
-            # Substitui o termo (mantendo case-sensitivity quando possível)
-            texto_modificado = re.sub(padrao, substituto, texto_modificado, flags=re.IGNORECASE)
-    
-    # Retorna o texto modificado e a lista de termos substituídos
+    ocorrencias: List[Tuple[int, str]] = []
+
+    def _substituir(match: "re.Match") -> str:
+        termo = match.group(0)
+        entrada = _TABELA_TERMOS_PROIBIDOS.get(termo.lower())
+        if entrada is None:
+            # Equivalências raras de caixa Unicode que não voltam ao mesmo termo com lower()
+            return termo
+        indice, substituto = entrada
+        ocorrencias.append((indice, termo))
+        return substituto
+
+    texto_modificado = _REGEX_TERMOS_PROIBIDOS.sub(_substituir, texto)
+
+    # Ordena pelos padrões (ordenação estável mantém a ordem no texto), como na aplicação sequencial
+    termos_substituidos = [termo for _, termo in sorted(ocorrencias, key=lambda o: o[0])]
     return texto_modificado, termos_substituidos
 
     
@@ -326,17 +388,109 @@ def verificar_e_corrigir_titulo(titulo: str, palavra_ancora: str, is_document_ti
     return True, titulo_processado
 
 
+def extrair_tema_principal(titulo: str) -> str:
+    """Extrai o tema principal de um título."""
+    temas = {
+        "Cinema": ["filme", "cinema", "diretor", "ator", "atriz", "oscar"],
+        "Séries": ["série", "netflix", "temporada", "episódio", "hbo", "disney+"],
+        "Games": ["game", "jogo", "playstation", "xbox", "nintendo", "steam"],
+        "Tecnologia": ["tech", "smartphone", "app", "gadget", "android", "iphone"],
+        "Música": ["música", "cantor", "banda", "álbum", "spotify", "show"],
+        "Esportes": ["futebol", "basquete", "esporte", "atleta", "campeonato"],
+        "Lifestyle": ["moda", "estilo", "tendência", "dicas", "lifestyle"],
+        "Cultura Pop": ["pop", "viral", "meme", "influencer", "youtube"]
+    }
+    
+    titulo_lower = titulo.lower()
+    for tema, palavras_chave in temas.items():
+        if any(palavra in titulo_lower for palavra in palavras_chave):
+            return tema
+    return "Geral"
+
+def extrair_estrutura(titulo: str) -> str:
+    """Extrai o padrão de estrutura de um título."""
+    # Remove números específicos
+    estrutura = re.sub(r'\d+', '#', titulo)
+    # Remove palavras específicas mantendo estrutura
+    estrutura = re.sub(r'\b\w+\b', 'PALAVRA', estrutura)
+    return estrutura
+
+def extrair_temas_secundarios(titulo: str) -> List[str]:
+    """Extrai temas secundários de um título."""
+    temas = []
+    titulo_lower = titulo.lower()
+    
+    # Mapeia palavras-chave para temas
+    mapeamento_temas = {
+        "Entretenimento": ["diversão", "lazer", "hobby", "passatempo"],
+        "Tecnologia": ["digital", "online", "virtual", "internet"],
+        "Cultura": ["arte", "cultura", "história", "tradição"],
+        "Lifestyle": ["vida", "estilo", "dia a dia", "rotina"],
+        "Social": ["amigos", "família", "relacionamento", "pessoas"]
+    }
+    
+    for tema, palavras in mapeamento_temas.items():
+        if any(palavra in titulo_lower for palavra in palavras):
+            temas.append(tema)
+    
+    return temas
+
+def montar_registro_titulo(titulo: str, palavra_ancora: str) -> Dict:
+    """Monta o registro de um título para o banco de aprendizado (formato de DBHandler.add_titles_bulk)."""
+    return {
+        "title": titulo,
+        "anchor_word": palavra_ancora,
+        "main_theme": extrair_tema_principal(titulo),
+        "structure_type": extrair_estrutura(titulo),
+        "themes": extrair_temas_secundarios(titulo),
+    }
+
+
 class GeminiHandler:
-    def __init__(self, credentials_path: str = None):
+    def __init__(self, credentials_path: str = None, model=None, db: Optional[DBHandler] = None):
         # Inicializa o logger
         self.logger = logging.getLogger('seo_linkbuilder.gemini')
         
+        if model is not None:
+            # Modelo injetado (ex.: FakeGeminiModel de src/fakes.py): dispensa a chave da API
+            self.model = model
+            self.temperatura_atual = GEMINI_TEMPERATURE
+            self.safety_settings = []
+            self.logger.info(f"Usando modelo injetado: {type(model).__name__}")
+        else:
+            self._configurar_api()
+        
+        self.max_retries = 5
+        self.base_delay = 2  # 60 segundos base delay
+        self.max_delay = 5  # 5 minutos máximo delay
+        # Limitador de taxa compartilhado por todas as chamadas ao Gemini
+        self.rate_limiter = obter_rate_limiter()
+        # Tempo, tentativas, tokens e custo de cada chamada, agregados por operação
+        self.instrumentacao = obter_instrumentacao()
+        # Limite de custo da execução, compartilhado por todas as chamadas ao Gemini
+        self.orcamento = obter_governador()
+        # Cache em disco das respostas, para que reexecuções não paguem de novo pelos mesmos prompts
+        self.cache = ResponseCache() if GEMINI_CACHE_ATIVO else None
+        self.db = db or DBHandler()
+        # Variante assíncrona do banco, usada pelo caminho assíncrono (gerar_titulo)
+        self._db_async: Optional[AsyncDBHandler] = None
+        # Índice de similaridade dos títulos já aceitos (carregado do banco no primeiro uso)
+        self._indice_titulos: Optional[SimilarityIndex] = None
+        self._indice_titulos_lock = threading.Lock()
+        # O codificador de tokens é carregado em segundo plano enquanto a planilha é lida
+        preparar_codificador()
+    
+    def _configurar_api(self) -> None:
+        """Configura a API do Gemini e cria o modelo."""
         # Verifica se a chave da API está definida
         if not GOOGLE_API_KEY:
             erro_msg = "API key para o Gemini não encontrada. Verifique o arquivo .env"
             self.logger.error(erro_msg)
             raise ValueError(erro_msg)
         
+        # O SDK do Gemini é importado só aqui: sozinho ele leva mais de meio segundo para carregar
+        import google.generativeai as genai
+
         # Configura a API do Gemini
         try:
             genai.configure(api_key=GOOGLE_API_KEY)
@@ -357,12 +511,35 @@ class GeminiHandler:
         except Exception as e:
             self.logger.error(f"Erro ao inicializar a API do Gemini: {e}")
             raise
-        
-        self.max_retries = 5
-        self.base_delay = 2  # 60 segundos base delay
-        self.max_delay = 5  # 5 minutos máximo delay
-        self.db = DBHandler()
-    
+
+    @property
+    def db_async(self) -> AsyncDBHandler:
+        """Banco de aprendizado assíncrono (mesmo arquivo de `self.db`), criado no primeiro uso."""
+        if getattr(self, '_db_async', None) is None:
+            self._db_async = AsyncDBHandler(self.db.db_path)
+        return self._db_async
+
+    @property
+    def indice_titulos(self) -> SimilarityIndex:
+        """Índice dos títulos já aceitos (histórico do banco + títulos aceitos nesta execução)."""
+        with self._indice_titulos_lock:
+            if self._indice_titulos is None:
+                self._indice_titulos = SimilarityIndex(self.db.get_all_titles())
+                self.logger.info(f"Índice de similaridade carregado com {len(self._indice_titulos)} título(s) do histórico")
+            return self._indice_titulos
+
+    def registrar_titulo_aceito(self, titulo: str) -> None:
+        """Adiciona um título aceito ao índice de similaridade."""
+        self.indice_titulos.adicionar(titulo)
+
+    def _titulo_similar_existente(self, titulo: str, limiar: float, *indices: SimilarityIndex) -> Optional[Tuple[str, float]]:
+        """Procura nos índices um título com similaridade acima de `limiar` (reavaliando só os candidatos)."""
+        for indice in indices:
+            similar = indice.mais_similar(titulo, self._calcular_similaridade_titulos, limiar)
+            if similar:
+                return similar
+        return None
+
     def carregar_prompt_template(self, tipo: str = 'conteudo') -> str:
         """
         Carrega o template do prompt do arquivo correto conforme o tipo ('titulos' ou 'conteudo').
@@ -600,7 +777,8 @@ INSTRUÇÕES DE DIVERSIFICAÇÃO TEMÁTICA:
             titulo: O título a ser verificado
             palavra_ancora: A palavra-âncora que deve estar presente no título
             palavras_a_evitar: Lista de palavras que não devem aparecer no título
-            titulos_existentes: Lista opcional de títulos já existentes para verificar duplicidade
+            titulos_existentes: Lista opcional (ou SimilarityIndex) de títulos já existentes para verificar duplicidade
+                (se omitida, usa o índice dos títulos já aceitos, `indice_titulos`)
             
         Returns:
             Boolean indicando se o título é válido
@@ -628,12 +806,19 @@ INSTRUÇÕES DE DIVERSIFICAÇÃO TEMÁTICA:
                 return False
                 
         # Verifica similaridade com títulos existentes
+        # (um SimilarityIndex persistente evita reavaliar todos os títulos a cada chamada;
+        # montar um índice aqui, para uma única consulta, custaria mais que a comparação direta)
+        if titulos_existentes is None:
+            titulos_existentes = self.indice_titulos
         if titulos_existentes:
-            for titulo_existente in titulos_existentes:
-                similaridade = self._calcular_similaridade_titulos(titulo, titulo_existente)
-                if similaridade > 0.6:  # Limite de similaridade
-                    logger.warning(f"Título muito similar a um existente (similaridade: {similaridade:.2f}). Rejeitado.")
-                    return False
+            if isinstance(titulos_existentes, SimilarityIndex):
+                similar = self._titulo_similar_existente(titulo, 0.6, titulos_existentes)  # Limite de similaridade
+            else:
+                similar = next(((t, s) for t in titulos_existentes
+                                for s in [self._calcular_similaridade_titulos(titulo, t)] if s > 0.6), None)
+            if similar:
+                logger.warning(f"Título muito similar a um existente (similaridade: {similar[1]:.2f}). Rejeitado.")
+                return False
         
         return True
 
@@ -727,10 +912,9 @@ INSTRUÇÕES DE DIVERSIFICAÇÃO TEMÁTICA:
                         frases_texto = match.group(1)
                         palavras_a_evitar.extend([p.strip().strip("'") for p in frases_texto.split(",")])
             
-            # Armazena temperatura original e ajusta para mais aleatoriedade
-            temperatura_original = self.temperatura_atual
-            nova_temperatura = min(0.9, temperatura_original + 0.1 * (hash(dados.get('site', '')) % 5))
-            self.temperatura_atual = nova_temperatura
+            # Ajusta a temperatura para mais aleatoriedade (só nesta chamada: o handler é
+            # compartilhado pelas threads de geração de conteúdo)
+            temperatura = min(0.9, self.temperatura_atual + 0.1 * (hash(dados.get('site', '')) % 5))
             
             # Conta tokens de entrada para estimativa de custo
             tokens_entrada = contar_tokens(prompt)
@@ -745,7 +929,7 @@ INSTRUÇÕES DE DIVERSIFICAÇÃO TEMÁTICA:
             
             # Cria configuração de geração com a nova temperatura
             generation_config = {
-                "temperature": self.temperatura_atual,
+                "temperature": temperatura,
                 "top_p": 0.9,
                 "top_k": 40,
                 "max_output_tokens": GEMINI_MAX_OUTPUT_TOKENS,
@@ -764,10 +948,7 @@ INSTRUÇÕES DE DIVERSIFICAÇÃO TEMÁTICA:
                 self.logger.info(f"Tentativa {tentativas} de geração de conteúdo")
                 
                 # Faz a requisição à API do Gemini (removido safety_settings)
-                resposta = self.model.generate_content(
-                    prompt,
-                    generation_config=generation_config
-                )
+                resposta = self._chamar_gemini(prompt, generation_config=generation_config, operacao="conteudo")
                 
                 # Extrai o conteúdo da resposta
                 conteudo_gerado = resposta.text
@@ -777,6 +958,8 @@ INSTRUÇÕES DE DIVERSIFICAÇÃO TEMÁTICA:
                 
                 # Calcula custo estimado
                 custo_estimado = (tokens_entrada * GEMINI_INPUT_COST_PER_1K / 1000) + (tokens_saida * GEMINI_OUTPUT_COST_PER_1K / 1000)
+                if getattr(resposta, 'do_cache', False):
+                    custo_estimado = 0.0
                 
                 # Verifica se o título está adequado
                 linhas = conteudo_gerado.strip().split('\n')
@@ -791,20 +974,20 @@ INSTRUÇÕES DE DIVERSIFICAÇÃO TEMÁTICA:
                 if sucesso:
                     self.logger.info(f"Título gerado é aceitável: '{titulo_corrigido}'")
                     break # Sai do loop de tentativas
+                elif self.orcamento.em_economia:
+                    self.logger.warning(f"Título '{titulo_gerado}' invalidado por verificar_e_corrigir_titulo, mas o orçamento está perto do limite: sem novas tentativas.")
+                    break
                 else:
                     self.logger.warning(f"Título '{titulo_gerado}' invalidado por verificar_e_corrigir_titulo. Tentando novamente.")
 
                 # Título contém padrões proibidos ou é inválido, tenta novamente com temperatura mais alta
-                self.temperatura_atual = min(0.95, self.temperatura_atual + 0.1)
-                generation_config["temperature"] = self.temperatura_atual
-                self.logger.info(f"Aumentando temperatura para {self.temperatura_atual} e tentando novamente")
+                temperatura = min(0.95, temperatura + 0.1)
+                generation_config["temperature"] = temperatura
+                self.logger.info(f"Aumentando temperatura para {temperatura} e tentando novamente")
                 # INSTRUÇÃO AGRESSIVA para evitar repetição
                 instrucao_adicional = "\n\nATENÇÃO: Os títulos anteriores foram rejeitados por serem repetidos ou pouco criativos. GERE UM TÍTULO TOTALMENTE DIFERENTE DE TUDO QUE JÁ FOI USADO PARA ESTA PALAVRA-ÂNCORA. NÃO USE NÚMEROS, NÃO USE PADRÕES JÁ VISTOS, INOVE!"
                 prompt += instrucao_adicional
             
-            # Restaura a temperatura original para próximas chamadas
-            self.temperatura_atual = temperatura_original
-            
             # 'conteudo_gerado' é o texto completo da última tentativa da API (ou da primeira bem-sucedida)
             # 'titulo_corrigido' é o título dessa mesma tentativa, após passar por verificar_e_corrigir_titulo no loop
 
@@ -845,7 +1028,7 @@ INSTRUÇÕES DE DIVERSIFICAÇÃO TEMÁTICA:
             # tokens_entrada e custo_estimado são da última tentativa bem sucedida ou da última tentativa falha.
             metricas = {
                 'input_token_count': tokens_entrada, 
-                'output_token_count': contar_tokens(conteudo_gerado), # Baseado no output bruto da API
+                'output_token_count': tokens_saida, # Baseado no output bruto da API
                 'cost_usd': custo_estimado,
                 'tentativas': tentativas,
                 'block_reason': resposta.prompt_feedback.block_reason if resposta.prompt_feedback else None,
@@ -868,12 +1051,13 @@ INSTRUÇÕES DE DIVERSIFICAÇÃO TEMÁTICA:
             self.logger.exception("Detalhes do erro:")
             raise
 
-    def gerar_titulos(self, dados: Dict[str, str], quantidade: int = 1) -> List[str]:
+    def gerar_titulos(self, dados: Dict[str, str], quantidade: int = 1, aumento_temperatura: float = 0.0) -> List[str]:
         """
         Gera apenas títulos para o conteúdo, sem gerar o corpo do texto.
         Args:
             dados: Dicionário com os dados necessários (palavra_ancora, etc)
             quantidade: Quantidade de títulos a serem gerados
+            aumento_temperatura: Acréscimo à temperatura desta chamada (ex.: em novas tentativas)
         Returns:
             Lista de títulos gerados
         """
@@ -903,14 +1087,16 @@ Exemplos de estruturas:
 """
 
         # Aumenta levemente a temperatura para títulos
-        temp_titulos = min(1.0, GEMINI_TEMPERATURE + 0.15)
+        # (a temperatura vale só para esta chamada: o handler é compartilhado entre threads)
+        temp_titulos = min(1.0, GEMINI_TEMPERATURE + 0.15 + aumento_temperatura)
         generation_config = {
             "temperature": temp_titulos,
             "max_output_tokens": GEMINI_MAX_OUTPUT_TOKENS,
         }
 
         # Gera os títulos
-        response = self._make_api_call(self.model.generate_content, prompt, generation_config=generation_config)
+        # Títulos não usam o cache: novas tentativas precisam de respostas diferentes
+        response = self._chamar_gemini(prompt, generation_config=generation_config, usar_cache=False, operacao="titulos")
 
         if not response or not response.text:
             self.logger.error("Falha ao gerar títulos: resposta vazia da API")
@@ -918,7 +1104,7 @@ Exemplos de estruturas:
 
         # Processa a resposta para extrair os títulos
         titulos = []
-        titulos_existentes = set()
+        titulos_existentes = SimilarityIndex()
         for linha in response.text.split('\n'):
             titulo = linha.strip()
             if titulo and not titulo.startswith(('#', '*', '-', '1.', '2.', '3.')):
@@ -930,18 +1116,108 @@ Exemplos de estruturas:
                 )
                 # Rejeita títulos muito similares aos já aceitos
                 if sucesso:
-                    titulo_norm = normalizar_texto(titulo_corrigido.lower())
-                    if any(self._calcular_similaridade_titulos(titulo_norm, normalizar_texto(t.lower())) > 0.7 for t in titulos_existentes):
+                    if self._titulo_similar_existente(titulo_corrigido, 0.7, titulos_existentes, self.indice_titulos):
                         self.logger.warning(f"Título rejeitado por ser muito similar a outro já aceito: '{titulo_corrigido}'")
                         continue
                     titulos.append(titulo_corrigido)
-                    titulos_existentes.add(titulo_corrigido)
+                    titulos_existentes.adicionar(titulo_corrigido)
                 else:
                     self.logger.info(f"Título rejeitado por não passar validação: '{titulo}'")
 
         self.logger.info(f"Títulos gerados com sucesso: {len(titulos)}")
         return titulos
 
+    def _construir_prompt_titulos_lote(self, lista_dados: List[Dict[str, str]], prompt_template: str) -> str:
+        """
+        Constrói um único prompt que pede um título para cada item do lote.
+        As instruções gerais do template são enviadas uma única vez.
+        """
+        prompt = prompt_template.replace("{{palavra_ancora}}", "palavra-âncora")
+        prompt = prompt.replace("{palavra_ancora}", "palavra-âncora")
+        prompt = prompt.replace("{{site}}", "site").replace("{{url_ancora}}", "URL")
+        prompt = prompt.replace("{{titulo}}", "")
+
+        itens = []
+        for i, dados in enumerate(lista_dados, 1):
+            itens.append(
+                f'- id "{i}": palavra-âncora \'{dados.get("palavra_ancora", "").lower()}\', '
+                f'site \'{dados.get("site", "")}\', URL \'{dados.get("url_ancora", "")}\''
+            )
+
+        prompt += (
+            "\n\n## GERAÇÃO EM LOTE\n"
+            f"Gere exatamente UM título para CADA um dos {len(lista_dados)} itens abaixo. "
+            "Cada item tem sua própria palavra-âncora: o título de um item deve se relacionar somente com a "
+            "palavra-âncora daquele item, e os títulos devem ter estruturas diferentes entre si.\n\n"
+            + "\n".join(itens)
+            + "\n\nIGNORE a instrução anterior sobre o formato da resposta. Responda APENAS com um array JSON, "
+            'sem texto antes ou depois, no formato: [{"id": "1", "titulo": "..."}, {"id": "2", "titulo": "..."}]'
+            "\n\nIMPORTANTE: Nunca use termos como 'ganhar', 'lucrar', 'ganhos', 'dinheiro fácil' ou "
+            "qualquer linguagem que sugira garantia de resultados financeiros."
+        )
+        return prompt
+
+    def _extrair_titulos_json(self, texto: str) -> Dict[str, str]:
+        """Extrai o mapeamento id -> título da resposta JSON do modo em lote."""
+        inicio = texto.find('[')
+        fim = texto.rfind(']')
+        if inicio == -1 or fim <= inicio:
+            raise ValueError("Resposta não contém um array JSON")
+        itens = json.loads(texto[inicio:fim + 1])
+        titulos = {}
+        for item in itens:
+            if isinstance(item, dict) and item.get('id') is not None and item.get('titulo'):
+                titulos[str(item['id']).strip()] = str(item['titulo'])
+        return titulos
+
+    def gerar_titulos_lote(self, lista_dados: List[Dict[str, str]]) -> List[Optional[str]]:
+        """
+        Gera um título para cada linha do lote com uma única requisição ao Gemini.
+
+        Args:
+            lista_dados: Lista de dicionários com os dados de cada linha (palavra_ancora, site, url_ancora)
+
+        Returns:
+            Lista alinhada com `lista_dados`, com o título validado ou None para as linhas
+            cujo título faltou ou não passou na validação (que devem ser geradas individualmente)
+        """
+        resultado: List[Optional[str]] = [None] * len(lista_dados)
+        if not lista_dados:
+            return resultado
+
+        self.logger.info(f"Gerando títulos em lote para {len(lista_dados)} linha(s)")
+        try:
+            prompt_template = self.carregar_prompt_template('titulos')
+            prompt = self._construir_prompt_titulos_lote(lista_dados, prompt_template)
+            generation_config = {
+                "temperature": min(1.0, GEMINI_TEMPERATURE + 0.15),
+                "max_output_tokens": GEMINI_MAX_OUTPUT_TOKENS,
+            }
+            response = self._chamar_gemini(prompt, generation_config=generation_config, usar_cache=False, operacao="titulos_lote")
+            titulos_por_id = self._extrair_titulos_json(response.text)
+        except Exception as e:
+            self.logger.error(f"Falha na geração de títulos em lote: {e}")
+            return resultado
+
+        titulos_aceitos = SimilarityIndex()
+        for i, dados in enumerate(lista_dados):
+            titulo = titulos_por_id.get(str(i + 1))
+            if not titulo:
+                self.logger.warning(f"Título do item {i + 1} ausente na resposta em lote")
+                continue
+            sucesso, titulo_corrigido = verificar_e_corrigir_titulo(titulo, dados.get('palavra_ancora', ''), is_document_title=False)
+            if not sucesso:
+                self.logger.info(f"Título em lote rejeitado por não passar validação: '{titulo}'")
+                continue
+            if self._titulo_similar_existente(titulo_corrigido, 0.7, titulos_aceitos, self.indice_titulos):
+                self.logger.warning(f"Título em lote rejeitado por ser muito similar a outro já aceito: '{titulo_corrigido}'")
+                continue
+            resultado[i] = titulo_corrigido
+            titulos_aceitos.adicionar(titulo_corrigido)
+
+        self.logger.info(f"Títulos em lote aceitos: {len(titulos_aceitos)} de {len(lista_dados)}")
+        return resultado
+
     def gerar_conteudo_por_titulo(self, dados: Dict[str, str], titulo: str) -> Tuple[str, Dict[str, float], Optional[Dict]]:
         """
         Gera conteúdo baseado em um título específico.
@@ -962,7 +1238,7 @@ Exemplos de estruturas:
         # Conta tokens de entrada para estimativa de custo
         tokens_entrada = contar_tokens(prompt)
         # Gera o conteúdo
-        response = self._make_api_call(self.model.generate_content, prompt)
+        response = self._chamar_gemini(prompt, tokens_estimados=tokens_entrada, operacao="conteudo")
         if not response or not response.text:
             self.logger.error("Falha ao gerar conteúdo: resposta vazia da API")
             return "", {}, None
@@ -970,11 +1246,16 @@ Exemplos de estruturas:
         conteudo = response.text.strip()
         tokens_saida = contar_tokens(conteudo)
         custo_estimado = (tokens_entrada * GEMINI_INPUT_COST_PER_1K / 1000) + (tokens_saida * GEMINI_OUTPUT_COST_PER_1K / 1000)
+        do_cache = getattr(response, 'do_cache', False)
+        if do_cache:
+            # Resposta reaproveitada do cache não gera custo
+            custo_estimado = 0.0
         # Calcula métricas completas
         metricas = {
             'input_token_count': tokens_entrada,
             'output_token_count': tokens_saida,
             'cost_usd': custo_estimado,
+            'do_cache': do_cache,
             'num_palavras': len(conteudo.split()),
             'num_caracteres': len(conteudo),
         }
@@ -1007,11 +1288,11 @@ Exemplos de estruturas:
             # Constrói o prompt
             prompt = self._construir_prompt(dados, prompt_template)
             
-            # Calcula tokens de entrada
-            input_tokens = contar_tokens(prompt)
+            # Calcula tokens de entrada (estimativa rápida, suficiente para a prévia de custo)
+            input_tokens = contar_tokens(prompt, aproximado=True)
             
-            # Estima tokens de saída (baseado em experiências anteriores)
-            estimated_output_tokens = 2000  # Estimativa média para um artigo
+            # Estima tokens de saída pela mediana do histórico de artigos (2000 sem histórico)
+            estimated_output_tokens = self.orcamento.tokens_saida_tipicos(self.db, 'conteudo') or 2000
             
             # Calcula custo estimado
             input_cost = (input_tokens / 1000) * GEMINI_INPUT_COST_PER_1K
@@ -1035,17 +1316,102 @@ Exemplos de estruturas:
             return None
 
     def _normalizar_flex(self, texto):
-        return unidecode(texto.lower().strip())
+        return _unidecode()(texto.lower().strip())
 
     def _exponential_backoff(self, attempt: int) -> float:
         """Calcula o tempo de espera com backoff exponencial e jitter."""
         delay = min(self.base_delay * (2 ** attempt) + random.uniform(0, 1), 120)
         return delay
 
-    def _make_api_call(self, func, *args, **kwargs):
-        """Faz chamada à API com retry e backoff exponencial, tentando indefinidamente em caso de erro de cota."""
+    def _chamar_gemini(self, prompt: str, generation_config: Optional[Dict] = None,
+                       tokens_estimados: Optional[int] = None, usar_cache: bool = True,
+                       operacao: str = "generate_content"):
+        """
+        Envia um prompt ao modelo, consultando antes o cache persistente de respostas.
+
+        Args:
+            prompt: Prompt completo (já construído por _construir_prompt)
+            generation_config: Configuração de geração; None usa a configuração padrão do modelo
+            tokens_estimados: Tokens do prompt para o rate limiter (calculado se None)
+            usar_cache: Se False, sempre chama a API e não grava a resposta no cache
+            operacao: Nome da operação na instrumentação (endpoint `gemini.<operacao>`)
+
+        Returns:
+            Resposta da API ou RespostaCache (ambas com o atributo `text`)
+        """
+        # Perto do limite do orçamento, as respostas são encurtadas
+        generation_config = self.orcamento.ajustar_config(generation_config)
+        chave = None
+        if self.cache and usar_cache:
+            config_efetiva = generation_config or {
+                "temperature": GEMINI_TEMPERATURE,
+                "max_output_tokens": GEMINI_MAX_OUTPUT_TOKENS,
+            }
+            chave = ResponseCache.gerar_chave(prompt, GEMINI_MODEL, config_efetiva)
+            inicio = time.perf_counter()
+            texto_cache = self.cache.obter(chave)
+            if texto_cache is not None:
+                self.logger.info("Resposta encontrada no cache; nenhuma chamada à API foi feita")
+                self.instrumentacao.registrar(f"gemini.{operacao}", time.perf_counter() - inicio,
+                                              resultado=CACHE, bytes_recebidos=len(texto_cache.encode('utf-8')))
+                return RespostaCache(texto_cache)
+
+        if tokens_estimados is None:
+            tokens_estimados = contar_tokens(prompt)
+        kwargs = {"generation_config": generation_config} if generation_config else {}
+        # Reserva o custo máximo da chamada; lança OrcamentoExcedido se ele não couber no limite
+        reserva = self.orcamento.reservar(
+            tokens_estimados, (generation_config or {}).get("max_output_tokens", GEMINI_MAX_OUTPUT_TOKENS)
+        )
+        registro: Dict = {}
+        try:
+            with self.instrumentacao.medir(f"gemini.{operacao}", bytes_enviados=len(prompt.encode('utf-8'))) as registro:
+                resposta = self._make_api_call(self.model.generate_content, prompt, tokens_estimados=tokens_estimados,
+                                               registro=registro, **kwargs)
+                self._atribuir_uso(registro, resposta, tokens_estimados)
+        finally:
+            self.orcamento.registrar(reserva, registro.get('tokens_entrada', 0), registro.get('tokens_saida', 0),
+                                     registro.get('custo_usd', 0.0))
+
+        if chave:
+            try:
+                self.cache.salvar(chave, GEMINI_MODEL, resposta.text)
+            except ValueError:
+                # Resposta bloqueada pelos filtros de segurança não possui texto
+                pass
+        return resposta
+
+    def _atribuir_uso(self, registro: Dict, resposta, tokens_estimados: int) -> None:
+        """
+        Preenche no registro da instrumentação o tamanho da resposta, os tokens e o custo da chamada.
+        Usa a contagem de tokens devolvida pela API (usage_metadata) e, sem ela, a estimativa local.
+        """
+        try:
+            texto = resposta.text or ""
+        except ValueError:
+            # Resposta bloqueada pelos filtros de segurança não possui texto
+            texto = ""
+        uso = getattr(resposta, 'usage_metadata', None)
+        tokens_entrada = getattr(uso, 'prompt_token_count', 0) or tokens_estimados
+        tokens_saida = getattr(uso, 'candidates_token_count', 0) or contar_tokens(texto)
+        registro['bytes_recebidos'] = len(texto.encode('utf-8'))
+        registro['tokens_entrada'] = tokens_entrada
+        registro['tokens_saida'] = tokens_saida
+        registro['custo_usd'] = (tokens_entrada * GEMINI_INPUT_COST_PER_1K / 1000) + (tokens_saida * GEMINI_OUTPUT_COST_PER_1K / 1000)
+
+    def _make_api_call(self, func, *args, tokens_estimados: int = 0, registro: Optional[Dict] = None, **kwargs):
+        """
+        Faz chamada à API com retry e backoff exponencial, tentando indefinidamente em caso de erro de cota.
+        Antes de cada tentativa adquire cota do rate limiter compartilhado (RPM e TPM).
+        Com `registro` (da instrumentação), anota nele o número de tentativas feitas.
+        """
+        from google.api_core.exceptions import ResourceExhausted
+
         attempt = 0
         while True:  # Tenta até conseguir
+            if registro is not None:
+                registro['tentativas'] = attempt + 1
+            self.rate_limiter.adquirir(tokens_estimados)
             try:
                 return func(*args, **kwargs)
             except ResourceExhausted as e:
@@ -1055,7 +1421,8 @@ Exemplos de estruturas:
                 if hasattr(e, 'retry_delay') and e.retry_delay:
                     wait_time = min(120, e.retry_delay.seconds)
                 self.logger.warning(f"Rate limit atingido (erro 429). Tentativa {attempt}. Aguardando {wait_time:.1f} segundos antes de tentar novamente...")
-                time.sleep(wait_time)
+                # Pausa todas as threads que compartilham o rate limiter, não apenas esta
+                self.rate_limiter.pausar(wait_time)
             except Exception as e:
                 raise
 
@@ -1063,7 +1430,7 @@ Exemplos de estruturas:
         """
         Calcula a similaridade entre duas sequências de palavras usando o algoritmo de Levenshtein.
         """
-        return ratio(palavras1.lower(), palavras2.lower())
+        return _levenshtein_ratio()(palavras1.lower(), palavras2.lower())
 
     def _verificar_estrutura_similar(self, titulo1: str, titulo2: str) -> bool:
         """
@@ -1086,55 +1453,46 @@ Exemplos de estruturas:
 
     def _extrair_tema_principal(self, titulo: str) -> str:
         """Extrai o tema principal de um título."""
-        temas = {
-            "Cinema": ["filme", "cinema", "diretor", "ator", "atriz", "oscar"],
-            "Séries": ["série", "netflix", "temporada", "episódio", "hbo", "disney+"],
-            "Games": ["game", "jogo", "playstation", "xbox", "nintendo", "steam"],
-            "Tecnologia": ["tech", "smartphone", "app", "gadget", "android", "iphone"],
-            "Música": ["música", "cantor", "banda", "álbum", "spotify", "show"],
-            "Esportes": ["futebol", "basquete", "esporte", "atleta", "campeonato"],
-            "Lifestyle": ["moda", "estilo", "tendência", "dicas", "lifestyle"],
-            "Cultura Pop": ["pop", "viral", "meme", "influencer", "youtube"]
-        }
-        
-        titulo_lower = titulo.lower()
-        for tema, palavras_chave in temas.items():
-            if any(palavra in titulo_lower for palavra in palavras_chave):
-                return tema
-        return "Geral"
+        return extrair_tema_principal(titulo)
 
     def _extrair_estrutura(self, titulo: str) -> str:
         """Extrai o padrão de estrutura de um título."""
-        import re
-        
-        # Remove números específicos
-        estrutura = re.sub(r'\d+', '#', titulo)
-        # Remove palavras específicas mantendo estrutura
-        estrutura = re.sub(r'\b\w+\b', 'PALAVRA', estrutura)
-        return estrutura
+        return extrair_estrutura(titulo)
 
     async def gerar_titulo(self, palavra_ancora: str, prompt: str) -> str:
         """Gera um título usando o modelo e aprende com sucessos anteriores."""
         tema_principal = self._extrair_tema_principal(palavra_ancora)
         
-        # Busca padrões bem-sucedidos
-        padroes_sucesso = self.db.get_successful_patterns(tema_principal)
-        titulos_similares = self.db.get_similar_successful_titles(palavra_ancora, tema_principal)
+        # Busca padrões bem-sucedidos e títulos similares em paralelo, sem bloquear o event loop
+        padroes_sucesso, titulos_similares = await asyncio.gather(
+            self.db_async.get_successful_patterns(tema_principal),
+            self.db_async.get_similar_successful_titles(palavra_ancora, tema_principal)
+        )
         
         # Adiciona exemplos bem-sucedidos ao prompt
+        prompt = prompt.replace("{{palavra_ancora}}", palavra_ancora)
         if titulos_similares:
             prompt += "\n\nExemplos de títulos bem-sucedidos:\n"
             for titulo in titulos_similares:
                 prompt += f"- {titulo['title']}\n"
         
-        # Gera o título
-        titulo = await super().gerar_titulo(palavra_ancora, prompt)
+        # Gera o título (a chamada à API é síncrona e roda numa thread à parte)
+        generation_config = {
+            "temperature": min(1.0, GEMINI_TEMPERATURE + 0.15),
+            "max_output_tokens": GEMINI_MAX_OUTPUT_TOKENS,
+        }
+        resposta = await asyncio.to_thread(self._chamar_gemini, prompt, generation_config=generation_config, usar_cache=False,
+                                         operacao="titulo_async")
+        linhas = [linha.strip() for linha in (resposta.text or "").split('\n') if linha.strip()]
+        if not linhas:
+            raise ValueError("Resposta vazia da API ao gerar título")
+        titulo = linhas[0]
         
         # Armazena o novo título
         estrutura = self._extrair_estrutura(titulo)
         temas_secundarios = [tema for tema in self._extrair_temas_secundarios(titulo)]
         
-        title_id = self.db.add_title(
+        title_id = await self.db_async.add_title(
             title=titulo,
             anchor_word=palavra_ancora,
             main_theme=tema_principal,
@@ -1146,43 +1504,23 @@ Exemplos de estruturas:
 
     def _extrair_temas_secundarios(self, titulo: str) -> List[str]:
         """Extrai temas secundários de um título."""
-        temas = []
-        titulo_lower = titulo.lower()
-        
-        # Mapeia palavras-chave para temas
-        mapeamento_temas = {
-            "Entretenimento": ["diversão", "lazer", "hobby", "passatempo"],
-            "Tecnologia": ["digital", "online", "virtual", "internet"],
-            "Cultura": ["arte", "cultura", "história", "tradição"],
-            "Lifestyle": ["vida", "estilo", "dia a dia", "rotina"],
-            "Social": ["amigos", "família", "relacionamento", "pessoas"]
-        }
-        
-        for tema, palavras in mapeamento_temas.items():
-            if any(palavra in titulo_lower for palavra in palavras):
-                temas.append(tema)
-        
-        return temas
+        return extrair_temas_secundarios(titulo)
 
     def atualizar_desempenho_titulo(self, titulo: str, performance_score: float, feedback_score: float = None):
         """Atualiza o desempenho de um título e aprende com seu sucesso."""
         try:
             # Encontra o ID do título no banco
-            with sqlite3.connect(self.db.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT id FROM titles WHERE title = ?", (titulo,))
-                result = cursor.fetchone()
+            title_id = self.db.get_title_id(titulo)
+            
+            if title_id is not None:
+                # Atualiza as métricas
+                self.db.update_title_performance(title_id, performance_score, feedback_score)
                 
-                if result:
-                    title_id = result[0]
-                    # Atualiza as métricas
-                    self.db.update_title_performance(title_id, performance_score, feedback_score)
-                    
-                    # Se o título foi bem-sucedido, atualiza o contador de estruturas
-                    if performance_score > 0.7 or (feedback_score and feedback_score > 0.7):
-                        estrutura = self._extrair_estrutura(titulo)
-                        tema = self._extrair_tema_principal(titulo)
-                        self.db.update_structure_success(estrutura, tema)
+                # Se o título foi bem-sucedido, atualiza o contador de estruturas
+                if performance_score > 0.7 or (feedback_score and feedback_score > 0.7):
+                    estrutura = self._extrair_estrutura(titulo)
+                    tema = self._extrair_tema_principal(titulo)
+                    self.db.update_structure_success(estrutura, tema)
                         
         except Exception as e:
             self.logger.error(f"Erro ao atualizar desempenho: {e}")
\ No newline at end of file
@@ -0,0 +1,242 @@
+# Módulo de instrumentação das chamadas às APIs externas (Gemini, Sheets, Docs e Drive)
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger('seo_linkbuilder.instrumentacao')
+
+# Limites superiores (ms) dos baldes dos histogramas de latência; o último balde não tem limite
+LIMITES_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000)
+
+# Resultados possíveis de uma chamada
+OK = "ok"
+ERRO = "erro"
+ERRO_429 = "429"
+CACHE = "cache"
+
+
+def classificar_erro(erro: BaseException) -> str:
+    """Classifica uma exceção de API como limite de taxa (429) ou erro comum."""
+    # Importados aqui: as bibliotecas do Google só são carregadas quando alguma API é usada
+    from google.api_core.exceptions import ResourceExhausted
+    from googleapiclient.errors import HttpError
+    if isinstance(erro, ResourceExhausted):
+        return ERRO_429
+    if isinstance(erro, HttpError) and getattr(erro.resp, 'status', None) == 429:
+        return ERRO_429
+    return ERRO
+
+
+class Histograma:
+    """Histograma de latências com baldes fixos (em ms)."""
+
+    def __init__(self, limites: Sequence[float] = LIMITES_MS):
+        self.limites = tuple(limites)
+        self.contagens = [0] * (len(self.limites) + 1)
+        self.total = 0
+        self.soma = 0.0
+        self.minimo: Optional[float] = None
+        self.maximo: Optional[float] = None
+
+    def adicionar(self, valor_ms: float) -> None:
+        indice = len(self.limites)
+        for i, limite in enumerate(self.limites):
+            if valor_ms <= limite:
+                indice = i
+                break
+        self.contagens[indice] += 1
+        self.total += 1
+        self.soma += valor_ms
+        self.minimo = valor_ms if self.minimo is None else min(self.minimo, valor_ms)
+        self.maximo = valor_ms if self.maximo is None else max(self.maximo, valor_ms)
+
+    def percentil(self, p: float) -> Optional[float]:
+        """Estimativa do percentil: limite superior do balde onde ele cai (limitado ao máximo observado)."""
+        if not self.total:
+            return None
+        alvo = p / 100 * self.total
+        acumulado = 0
+        for i, contagem in enumerate(self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo and contagem:
+                limite = self.limites[i] if i < len(self.limites) else self.maximo
+                return round(min(limite, self.maximo), 2)
+        return round(self.maximo, 2)
+
+    def como_dict(self) -> Dict[str, Any]:
+        baldes = {f"<={limite}": n for limite, n in zip(self.limites, self.contagens) if n}
+        if self.contagens[-1]:
+            baldes[f">{self.limites[-1]}"] = self.contagens[-1]
+        return {
+            'media': round(self.soma / self.total, 2) if self.total else None,
+            'p50': self.percentil(50),
+            'p95': self.percentil(95),
+            'p99': self.percentil(99),
+            'min': round(self.minimo, 2) if self.minimo is not None else None,
+            'max': round(self.maximo, 2) if self.maximo is not None else None,
+            'baldes': baldes,
+        }
+
+
+class EstatisticasEndpoint:
+    """Totais e histograma de latência de um endpoint."""
+
+    def __init__(self):
+        self.chamadas = 0
+        self.resultados: Dict[str, int] = {}
+        self.tentativas = 0
+        self.bytes_enviados = 0
+        self.bytes_recebidos = 0
+        self.tokens_entrada = 0
+        self.tokens_saida = 0
+        self.custo_usd = 0.0
+        self.tempo_total_s = 0.0
+        self.latencia_ms = Histograma()
+
+    def como_dict(self) -> Dict[str, Any]:
+        return {
+            'chamadas': self.chamadas,
+            'resultados': dict(self.resultados),
+            'novas_tentativas': self.tentativas - self.chamadas,
+            'bytes_enviados': self.bytes_enviados,
+            'bytes_recebidos': self.bytes_recebidos,
+            'tokens_entrada': self.tokens_entrada,
+            'tokens_saida': self.tokens_saida,
+            'custo_usd': round(self.custo_usd, 6),
+            'tempo_total_s': round(self.tempo_total_s, 3),
+            'latencia_ms': self.latencia_ms.como_dict(),
+        }
+
+
+class Instrumentacao:
+    """
+    Registro thread-safe das chamadas às APIs externas, agregado por endpoint
+    (ex.: 'gemini.conteudo', 'sheets.spreadsheets.values.batchUpdate', 'docs.documents.batchUpdate').
+
+    Cada chamada registra duração, resultado (ok, erro, 429 ou cache), tentativas, bytes enviados
+    e recebidos e, no Gemini, tokens e custo. O relatório mostra onde o tempo da execução foi gasto.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.inicio = time.time()
+        self.endpoints: Dict[str, EstatisticasEndpoint] = {}
+
+    def zerar(self) -> None:
+        with self._lock:
+            self.inicio = time.time()
+            self.endpoints = {}
+
+    def registrar(self, endpoint: str, duracao_s: float, resultado: str = OK, tentativas: int = 1,
+                  bytes_enviados: int = 0, bytes_recebidos: int = 0, tokens_entrada: int = 0,
+                  tokens_saida: int = 0, custo_usd: float = 0.0) -> None:
+        with self._lock:
+            estatisticas = self.endpoints.get(endpoint)
+            if estatisticas is None:
+                estatisticas = self.endpoints[endpoint] = EstatisticasEndpoint()
+            estatisticas.chamadas += 1
+            estatisticas.resultados[resultado] = estatisticas.resultados.get(resultado, 0) + 1
+            estatisticas.tentativas += max(1, tentativas)
+            estatisticas.bytes_enviados += bytes_enviados
+            estatisticas.bytes_recebidos += bytes_recebidos
+            estatisticas.tokens_entrada += tokens_entrada
+            estatisticas.tokens_saida += tokens_saida
+            estatisticas.custo_usd += custo_usd
+            estatisticas.tempo_total_s += duracao_s
+            estatisticas.latencia_ms.adicionar(duracao_s * 1000)
+
+    @contextmanager
+    def medir(self, endpoint: str, bytes_enviados: int = 0) -> Iterator[Dict[str, Any]]:
+        """
+        Mede a chamada executada dentro do bloco. O dicionário retornado pode receber
+        'tentativas', 'bytes_recebidos', 'tokens_entrada', 'tokens_saida' e 'custo_usd';
+        uma exceção é registrada como erro (ou 429) e propagada.
+        """
+        registro: Dict[str, Any] = {'resultado': OK, 'bytes_enviados': bytes_enviados}
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        except BaseException as e:
+            registro['resultado'] = classificar_erro(e)
+            raise
+        finally:
+            self.registrar(endpoint, time.perf_counter() - inicio, **registro)
+
+    def relatorio(self) -> Dict[str, Any]:
+        """Relatório serializável por endpoint e por serviço."""
+        with self._lock:
+            endpoints = {nome: e.como_dict() for nome, e in sorted(self.endpoints.items())}
+        servicos: Dict[str, Dict[str, float]] = {}
+        for nome, dados in endpoints.items():
+            servico = servicos.setdefault(nome.split('.', 1)[0], {'chamadas': 0, 'tempo_total_s': 0.0, 'custo_usd': 0.0})
+            servico['chamadas'] += dados['chamadas']
+            servico['tempo_total_s'] = round(servico['tempo_total_s'] + dados['tempo_total_s'], 3)
+            servico['custo_usd'] = round(servico['custo_usd'] + dados['custo_usd'], 6)
+        tempo_apis = sum(dados['tempo_total_s'] for dados in endpoints.values())
+        maior = max(endpoints.items(), key=lambda item: item[1]['tempo_total_s'], default=None)
+        return {
+            'inicio': datetime.fromtimestamp(self.inicio).isoformat(timespec='seconds'),
+            'duracao_s': round(time.time() - self.inicio, 3),
+            'tempo_total_apis_s': round(tempo_apis, 3),
+            'maior_tempo_acumulado': {
+                'endpoint': maior[0],
+                'fracao': round(maior[1]['tempo_total_s'] / tempo_apis, 3) if tempo_apis else None,
+            } if maior else None,
+            'servicos': servicos,
+            'endpoints': endpoints,
+        }
+
+    def resumo_texto(self, relatorio: Optional[Dict[str, Any]] = None) -> str:
+        """Resumo legível do relatório, um endpoint por linha."""
+        relatorio = relatorio or self.relatorio()
+        if not relatorio['endpoints']:
+            return "Nenhuma chamada às APIs registrada."
+        tempo_apis = relatorio['tempo_total_apis_s'] or 1.0
+        linhas: List[str] = [
+            f"Chamadas às APIs ({relatorio['duracao_s']:.1f}s de execução, {relatorio['tempo_total_apis_s']:.1f}s somados nas chamadas):",
+            f"{'endpoint':<42} {'chamadas':>8} {'erros':>6} {'429':>5} {'retry':>6} {'p50 ms':>9} {'p95 ms':>9} "
+            f"{'total s':>9} {'%':>5} {'custo US$':>10}",
+        ]
+        for nome, dados in sorted(relatorio['endpoints'].items(), key=lambda item: -item[1]['tempo_total_s']):
+            latencia = dados['latencia_ms']
+            linhas.append(
+                f"{nome[:42]:<42} {dados['chamadas']:>8} {dados['resultados'].get(ERRO, 0):>6} "
+                f"{dados['resultados'].get(ERRO_429, 0):>5} {dados['novas_tentativas']:>6} "
+                f"{latencia['p50'] or 0:>9.0f} {latencia['p95'] or 0:>9.0f} {dados['tempo_total_s']:>9.1f} "
+                f"{dados['tempo_total_s'] / tempo_apis:>5.0%} {dados['custo_usd']:>10.4f}"
+            )
+        maior = relatorio['maior_tempo_acumulado']
+        if maior:
+            linhas.append(f"Maior tempo acumulado: {maior['endpoint']} ({maior['fracao']:.0%} do tempo nas APIs)")
+        return "\n".join(linhas)
+
+    def exportar(self, caminho_base: str) -> str:
+        """Grava `<caminho_base>.json` (relatório) e `<caminho_base>.txt` (resumo) e retorna o caminho do JSON."""
+        relatorio = self.relatorio()
+        diretorio = os.path.dirname(caminho_base)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        with open(f"{caminho_base}.json", "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+        with open(f"{caminho_base}.txt", "w", encoding="utf-8") as f:
+            f.write(self.resumo_texto(relatorio) + "\n")
+        logger.info(f"Relatório das chamadas às APIs gravado em {caminho_base}.json")
+        return f"{caminho_base}.json"
+
+
+_instrumentacao_global: Optional[Instrumentacao] = None
+_instrumentacao_lock = threading.Lock()
+
+
+def obter_instrumentacao() -> Instrumentacao:
+    """Retorna a instrumentação compartilhada por todos os handlers."""
+    global _instrumentacao_global
+    with _instrumentacao_lock:
+        if _instrumentacao_global is None:
+            _instrumentacao_global = Instrumentacao()
+        return _instrumentacao_global
@@ -0,0 +1,41 @@
+# Requisições HTTP instrumentadas dos serviços do Google (Sheets, Docs e Drive)
+# Separado de src/instrumentacao.py para que o googleapiclient só seja importado ao criar um serviço
+from googleapiclient.http import HttpRequest
+
+from src.instrumentacao import obter_instrumentacao
+
+
+class HttpRequestInstrumentada(HttpRequest):
+    """
+    HttpRequest do googleapiclient que registra cada execute() na instrumentação, com o
+    methodId da API como endpoint. Usada como `requestBuilder` dos serviços do Sheets, Docs e Drive.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._novas_tentativas = 0
+        self._bytes_recebidos = 0
+        # O googleapiclient dorme entre as novas tentativas (num_retries): cada espera é uma tentativa a mais
+        dormir = self._sleep
+
+        def _dormir_contando(segundos):
+            self._novas_tentativas += 1
+            dormir(segundos)
+        self._sleep = _dormir_contando
+
+        processar = self.postproc
+
+        def _processar_medindo(resp, content):
+            self._bytes_recebidos = len(content or b'')
+            return processar(resp, content)
+        self.postproc = _processar_medindo
+
+    def execute(self, http=None, num_retries=0):
+        self._novas_tentativas = 0
+        self._bytes_recebidos = 0
+        with obter_instrumentacao().medir(self.methodId or f"{self.method} {self.uri}", self.body_size) as registro:
+            try:
+                return super().execute(http=http, num_retries=num_retries)
+            finally:
+                registro['tentativas'] = 1 + self._novas_tentativas
+                registro['bytes_recebidos'] = self._bytes_recebidos
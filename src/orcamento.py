@@ -0,0 +1,223 @@
+# Módulo do orçamento de custo das chamadas ao Gemini (limite por execução e previsão de custo)
+import logging
+import math
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from src.config import (
+    GEMINI_MAX_OUTPUT_TOKENS, GEMINI_TEMPERATURE, USD_TO_BRL_RATE,
+    GEMINI_PRECO_ENTRADA, GEMINI_PRECO_SAIDA,
+    ORCAMENTO_LIMITE_USD, ORCAMENTO_LIMITE_BRL, ORCAMENTO_LIMIAR_ECONOMIA,
+    ORCAMENTO_MAX_TOKENS_ECONOMIA, ORCAMENTO_AMOSTRAS_HISTORICO
+)
+
+logger = logging.getLogger('seo_linkbuilder.orcamento')
+
+
+class OrcamentoExcedido(Exception):
+    """Lançada quando uma chamada ao Gemini ultrapassaria o orçamento da execução."""
+
+
+def custo_usd(tokens_entrada: int, tokens_saida: int) -> float:
+    """Custo em dólares de uma chamada com os preços configurados (por 1.000 tokens)."""
+    return (tokens_entrada * GEMINI_PRECO_ENTRADA / 1000) + (tokens_saida * GEMINI_PRECO_SAIDA / 1000)
+
+
+def _percentil(valores: Sequence[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, max(0, math.ceil(p / 100 * len(ordenados)) - 1))]
+
+
+class GovernadorOrcamento:
+    """
+    Controla o custo de todas as chamadas ao Gemini de uma execução.
+
+    Antes de cada chamada é reservado o custo máximo dela (tokens do prompt + max_output_tokens);
+    enquanto a reserva não cabe por causa de chamadas em andamento, a chamada espera que elas
+    terminem; se não cabe nem assim, é recusada com `OrcamentoExcedido` e a execução passa a ser
+    interrompida. Assim o limite vale mesmo com várias chamadas simultâneas. Perto do
+    limite (`limiar_economia`), o modo econômico suspende as novas tentativas e reduz o
+    max_output_tokens das chamadas.
+
+    O consumo de tokens de cada linha (somando novas tentativas) alimenta um histórico local,
+    usado para prever o custo das próximas execuções.
+    """
+
+    def __init__(self, limite_usd: Optional[float] = None, limite_brl: Optional[float] = None,
+                 limiar_economia: float = ORCAMENTO_LIMIAR_ECONOMIA,
+                 max_tokens_economia: int = ORCAMENTO_MAX_TOKENS_ECONOMIA):
+        self.limiar_economia = limiar_economia
+        self.max_tokens_economia = max_tokens_economia
+        self._lock = threading.Lock()
+        self._reserva_liberada = threading.Condition(self._lock)
+        self._local = threading.local()
+        self.limite_usd: Optional[float] = None
+        self.definir_limite(limite_usd, limite_brl)
+        self.gasto_usd = 0.0
+        self.reservado_usd = 0.0
+        self.chamadas = 0
+        self.chamadas_recusadas = 0
+        self.excedido = False
+        self._economia_avisada = False
+        # (tipo, tokens_entrada, tokens_saida, chamadas) por linha, ainda não gravados no histórico
+        self._historico_pendente: List[Tuple[str, int, int, float]] = []
+
+    def definir_limite(self, limite_usd: Optional[float] = None, limite_brl: Optional[float] = None) -> None:
+        """Define o limite da execução (valores vazios ou zero = sem limite; com os dois, vale o menor)."""
+        limites = [valor for valor in (limite_usd, (limite_brl or 0) / USD_TO_BRL_RATE) if valor and valor > 0]
+        self.limite_usd = min(limites) if limites else None
+
+    @property
+    def fracao_usada(self) -> float:
+        """Fração do limite já gasta (0 sem limite)."""
+        if not self.limite_usd:
+            return 0.0
+        return self.gasto_usd / self.limite_usd
+
+    @property
+    def em_economia(self) -> bool:
+        """True quando o orçamento está perto do limite: sem novas tentativas e com respostas mais curtas."""
+        return self.limite_usd is not None and self.fracao_usada >= self.limiar_economia
+
+    def ajustar_config(self, generation_config: Optional[Dict]) -> Optional[Dict]:
+        """Reduz o max_output_tokens da configuração de geração no modo econômico."""
+        if not self.em_economia:
+            return generation_config
+        ajustada = dict(generation_config or {
+            "temperature": GEMINI_TEMPERATURE,
+            "max_output_tokens": GEMINI_MAX_OUTPUT_TOKENS,
+        })
+        ajustada["max_output_tokens"] = min(ajustada.get("max_output_tokens", GEMINI_MAX_OUTPUT_TOKENS),
+                                            self.max_tokens_economia)
+        if not self._economia_avisada:
+            self._economia_avisada = True
+            logger.warning(f"Orçamento em {self.fracao_usada:.0%} do limite de US$ {self.limite_usd:.4f}: "
+                           f"novas tentativas suspensas e max_output_tokens reduzido para {ajustada['max_output_tokens']}")
+        return ajustada
+
+    def reservar(self, tokens_entrada: int, max_tokens_saida: int) -> float:
+        """
+        Reserva o custo máximo de uma chamada, esperando as chamadas em andamento se preciso.
+        Lança OrcamentoExcedido se a reserva não couber no limite nem sem elas (a partir daí todas
+        as chamadas da execução são recusadas).
+
+        Returns:
+            Valor reservado, a ser informado em `registrar` depois da chamada
+        """
+        reserva = custo_usd(tokens_entrada, max_tokens_saida)
+        with self._lock:
+            while self.limite_usd is not None and (
+                self.excedido or self.gasto_usd + self.reservado_usd + reserva > self.limite_usd
+            ):
+                if self.excedido or self.gasto_usd + reserva > self.limite_usd:
+                    self.chamadas_recusadas += 1
+                    if not self.excedido:
+                        self.excedido = True
+                        logger.warning(f"Orçamento de US$ {self.limite_usd:.4f} esgotado (gasto US$ {self.gasto_usd:.4f}); "
+                                       f"nenhuma nova chamada ao Gemini será feita nesta execução")
+                        self._reserva_liberada.notify_all()
+                    raise OrcamentoExcedido(f"Orçamento de US$ {self.limite_usd:.4f} esgotado")
+                # Cabe quando as chamadas em andamento liberarem suas reservas
+                self._reserva_liberada.wait()
+            self.reservado_usd += reserva
+        return reserva
+
+    def registrar(self, reserva: float, tokens_entrada: int, tokens_saida: int, custo: float) -> None:
+        """Libera a reserva de uma chamada concluída (ou que falhou) e contabiliza o custo real."""
+        with self._lock:
+            self.reservado_usd = max(0.0, self.reservado_usd - reserva)
+            self.gasto_usd += custo
+            self.chamadas += 1
+            self._reserva_liberada.notify_all()
+        acumulado = getattr(self._local, 'acumulado', None)
+        if acumulado is not None:
+            acumulado['tokens_entrada'] += tokens_entrada
+            acumulado['tokens_saida'] += tokens_saida
+            acumulado['chamadas'] += 1
+
+    @contextmanager
+    def consumo_linha(self, tipo: str, linhas: int = 1) -> Iterator[None]:
+        """
+        Soma os tokens das chamadas feitas nesta thread dentro do bloco e os guarda como consumo
+        por linha do tipo ('titulo' ou 'conteudo'); com `linhas` > 1, o total é dividido entre elas.
+        """
+        anterior = getattr(self._local, 'acumulado', None)
+        acumulado = {'tokens_entrada': 0, 'tokens_saida': 0, 'chamadas': 0}
+        self._local.acumulado = acumulado
+        try:
+            yield
+        finally:
+            self._local.acumulado = anterior
+            # Linhas sem chamadas (respostas do cache ou orçamento esgotado) não representam o custo real
+            if acumulado['chamadas'] and linhas > 0:
+                registro = (tipo, acumulado['tokens_entrada'] // linhas, acumulado['tokens_saida'] // linhas,
+                            acumulado['chamadas'] / linhas)
+                with self._lock:
+                    self._historico_pendente.extend([registro] * linhas)
+
+    def salvar_historico(self, db) -> None:
+        """Grava no banco (DBHandler) o consumo por linha acumulado desde a última gravação."""
+        with self._lock:
+            pendentes, self._historico_pendente = self._historico_pendente, []
+        db.add_token_usage(pendentes)
+
+    def prever(self, db, linhas: int, tipos: Sequence[str]) -> Dict[str, Any]:
+        """
+        Prevê o custo de `linhas` linhas a partir do histórico de consumo por linha de cada tipo.
+
+        Returns:
+            Custo esperado (média) e pessimista (p90) em dólares e reais, amostras usadas por tipo
+            e, com limite, quantas linhas o orçamento restante deve cobrir. Os custos são None
+            quando falta histórico de algum dos tipos.
+        """
+        media_linha = p90_linha = 0.0
+        amostras: Dict[str, int] = {}
+        for tipo in tipos:
+            custos = [custo_usd(entrada, saida) for entrada, saida in db.get_token_usage(tipo, ORCAMENTO_AMOSTRAS_HISTORICO)]
+            amostras[tipo] = len(custos)
+            if custos:
+                media_linha += sum(custos) / len(custos)
+                p90_linha += _percentil(custos, 90)
+        sem_historico = not all(amostras.values())
+        previsao: Dict[str, Any] = {
+            'linhas': linhas,
+            'amostras': amostras,
+            'custo_esperado_usd': None if sem_historico else round(media_linha * linhas, 6),
+            'custo_p90_usd': None if sem_historico else round(p90_linha * linhas, 6),
+            'custo_esperado_brl': None if sem_historico else round(media_linha * linhas * USD_TO_BRL_RATE, 4),
+            'linhas_no_orcamento': None,
+        }
+        if self.limite_usd is not None and not sem_historico and media_linha > 0:
+            restante = max(0.0, self.limite_usd - self.gasto_usd - self.reservado_usd)
+            previsao['linhas_no_orcamento'] = int(restante / media_linha)
+        return previsao
+
+    def tokens_saida_tipicos(self, db, tipo: str) -> Optional[int]:
+        """Mediana dos tokens de saída por linha do tipo no histórico (None sem histórico)."""
+        saidas = [saida for _, saida in db.get_token_usage(tipo, ORCAMENTO_AMOSTRAS_HISTORICO)]
+        return int(_percentil(saidas, 50)) if saidas else None
+
+    def resumo(self) -> Dict[str, Any]:
+        return {
+            'limite_usd': self.limite_usd,
+            'gasto_usd': round(self.gasto_usd, 6),
+            'gasto_brl': round(self.gasto_usd * USD_TO_BRL_RATE, 4),
+            'chamadas': self.chamadas,
+            'chamadas_recusadas': self.chamadas_recusadas,
+            'economia': self.em_economia,
+            'excedido': self.excedido,
+        }
+
+
+_governador_global: Optional[GovernadorOrcamento] = None
+_governador_lock = threading.Lock()
+
+
+def obter_governador() -> GovernadorOrcamento:
+    """Retorna o governador de orçamento compartilhado por todas as chamadas ao Gemini."""
+    global _governador_global
+    with _governador_lock:
+        if _governador_global is None:
+            _governador_global = GovernadorOrcamento(ORCAMENTO_LIMITE_USD, ORCAMENTO_LIMITE_BRL)
+        return _governador_global
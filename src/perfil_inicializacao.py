@@ -0,0 +1,129 @@
+# Módulo do perfil de inicialização do programa (opção --profile-startup)
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Any, Dict, List
+
+MODULO_PRINCIPAL = "main_duas_etapas"
+
+# Bibliotecas pesadas que devem ser importadas só no primeiro uso, e não na abertura do programa
+MODULOS_ADIADOS = (
+    "pandas",
+    "google.generativeai",
+    "tiktoken",
+    "google.api_core",
+    "googleapiclient.discovery",
+    "google_auth_oauthlib",
+    "google.oauth2",
+    "numpy",
+    "Levenshtein",
+    "unidecode",
+)
+
+# Executado num processo novo: importa o programa e cria o handler usado pelo primeiro menu
+_CODIGO_MEDICAO = (
+    "import time\n"
+    "inicio = time.perf_counter()\n"
+    "import {modulo} as principal\n"
+    "importado = time.perf_counter()\n"
+    "principal.SheetsHandler()\n"
+    "fim = time.perf_counter()\n"
+    "print((importado - inicio) * 1000, (fim - inicio) * 1000)\n"
+)
+
+
+def _ler_importtime(saida: str) -> List[Dict[str, Any]]:
+    """Converte as linhas de `python -X importtime` em registros (na ordem em que terminaram)."""
+    importacoes = []
+    for linha in saida.splitlines():
+        if not linha.startswith("import time:"):
+            continue
+        partes = linha[len("import time:"):].split("|")
+        if len(partes) != 3 or not partes[0].strip().isdigit():
+            continue  # cabeçalho
+        nome = partes[2].rstrip()
+        importacoes.append({
+            'modulo': nome.strip(),
+            'nivel': (len(nome) - len(nome.lstrip()) - 1) // 2,
+            'proprio_ms': int(partes[0]) / 1000,
+            'acumulado_ms': int(partes[1]) / 1000,
+        })
+    return importacoes
+
+
+def _importacoes_do_modulo(importacoes: List[Dict[str, Any]], modulo: str) -> List[Dict[str, Any]]:
+    """Registros do módulo de nível 0 `modulo` e de tudo que ele importou (ficam logo antes dele)."""
+    for fim, registro in enumerate(importacoes):
+        if registro['nivel'] == 0 and registro['modulo'] == modulo:
+            inicio = fim
+            while inicio > 0 and importacoes[inicio - 1]['nivel'] > 0:
+                inicio -= 1
+            return importacoes[inicio:fim + 1]
+    return []
+
+
+def medir_inicializacao(modulo: str = MODULO_PRINCIPAL, repeticoes: int = 3) -> Dict[str, Any]:
+    """
+    Mede a abertura do programa em processos novos, com `python -X importtime`.
+
+    O tempo até o primeiro menu é o da importação de `modulo` mais a criação do SheetsHandler
+    (a listagem das planilhas, que depende da rede, fica de fora). Das `repeticoes`, vale a mais
+    rápida, a menos afetada por ruído.
+
+    Returns:
+        Tempos do processo, da importação e até o primeiro menu (ms) e as importações do módulo
+    """
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    ambiente = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [raiz, os.environ.get('PYTHONPATH')])))
+    melhor = None
+    for _ in range(max(1, repeticoes)):
+        processo = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _CODIGO_MEDICAO.format(modulo=modulo)],
+            capture_output=True, text=True, cwd=raiz, env=ambiente
+        )
+        if processo.returncode != 0:
+            raise RuntimeError(f"Falha ao medir a inicialização: {processo.stderr.strip().splitlines()[-1:]}")
+        importacao_ms, primeiro_menu_ms = (float(valor) for valor in processo.stdout.split()[-2:])
+        if melhor is None or primeiro_menu_ms < melhor['primeiro_menu_ms']:
+            importacoes = _ler_importtime(processo.stderr)
+            melhor = {
+                'modulo': modulo,
+                'importacao_ms': round(importacao_ms, 1),
+                'primeiro_menu_ms': round(primeiro_menu_ms, 1),
+                'interpretador_ms': round(sum(r['acumulado_ms'] for r in importacoes
+                                              if r['nivel'] == 0 and r['modulo'] != modulo), 1),
+                'importacoes': _importacoes_do_modulo(importacoes, modulo),
+            }
+    return melhor
+
+
+def formatar_relatorio(medicao: Dict[str, Any], top: int = 10) -> str:
+    """Relatório em texto: tempos, pacotes e módulos mais lentos e situação das bibliotecas adiadas."""
+    importacoes = medicao['importacoes']
+    por_pacote: Dict[str, float] = defaultdict(float)
+    for registro in importacoes:
+        por_pacote[registro['modulo'].split('.')[0]] += registro['proprio_ms']
+    total = sum(por_pacote.values()) or 1.0
+
+    linhas = [
+        f"Perfil de inicialização de {medicao['modulo']} (melhor de várias execuções)",
+        f"  Interpretador (site e afins): {medicao['interpretador_ms']:.1f} ms",
+        f"  Importação do programa:       {medicao['importacao_ms']:.1f} ms ({len(importacoes)} módulos)",
+        f"  Até o primeiro menu:          {medicao['primeiro_menu_ms']:.1f} ms (sem a listagem das planilhas)",
+        "",
+        f"Pacotes mais lentos (tempo próprio somado):",
+    ]
+    for pacote, ms in sorted(por_pacote.items(), key=lambda item: item[1], reverse=True)[:top]:
+        linhas.append(f"  {pacote:<32} {ms:8.1f} ms  {ms / total:6.1%}")
+    linhas += ["", "Módulos mais lentos (com o que importam):"]
+    mais_lentos = sorted((r for r in importacoes if r['modulo'] != medicao['modulo']),
+                         key=lambda r: r['acumulado_ms'], reverse=True)
+    for registro in mais_lentos[:top]:
+        linhas.append(f"  {registro['modulo']:<32} {registro['acumulado_ms']:8.1f} ms")
+    importados = {registro['modulo'] for registro in importacoes}
+    linhas += ["", "Bibliotecas adiadas até o primeiro uso:"]
+    for modulo in MODULOS_ADIADOS:
+        carregado = any(nome == modulo or nome.startswith(modulo + ".") for nome in importados)
+        linhas.append(f"  {modulo:<32} {'IMPORTADO NA ABERTURA' if carregado else 'adiado'}")
+    return "\n".join(linhas)
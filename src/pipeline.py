@@ -0,0 +1,157 @@
+# Módulo de pipeline em etapas (produtor-consumidor com filas limitadas)
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger('seo_linkbuilder.pipeline')
+
+# Marcador de fim de fluxo enviado a cada worker da etapa seguinte
+_FIM = object()
+
+
+class Etapa:
+    """
+    Uma etapa do pipeline.
+
+    `funcao` recebe um item e retorna o item para a próxima etapa (None descarta o item).
+    Com `tamanho_lote` > 1, a função recebe uma lista com até `tamanho_lote` itens já
+    disponíveis na fila e retorna uma lista do mesmo tamanho.
+    """
+
+    def __init__(self, nome: str, funcao: Callable, workers: int = 1, tamanho_fila: int = 8,
+                 tamanho_lote: int = 1):
+        self.nome = nome
+        self.funcao = funcao
+        self.workers = max(1, workers)
+        self.tamanho_fila = max(1, tamanho_fila)
+        self.tamanho_lote = max(1, tamanho_lote)
+        self.fila: "queue.Queue" = queue.Queue(maxsize=self.tamanho_fila)
+        self._lock = threading.Lock()
+        self._ativos = 0
+        self.processados = 0
+        self.descartados = 0
+        self.erros = 0
+        self.tempo_ocupado = 0.0
+        self.primeiro_concluido: Optional[float] = None
+
+    def estatisticas(self, inicio: float) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "processados": self.processados,
+            "descartados": self.descartados,
+            "erros": self.erros,
+            "tempo_ocupado_s": round(self.tempo_ocupado, 2),
+            "primeiro_concluido_s": round(self.primeiro_concluido - inicio, 2) if self.primeiro_concluido else None,
+        }
+
+
+class Pipeline:
+    """
+    Encadeia etapas com filas limitadas entre elas, cada etapa com seus próprios workers.
+
+    Uma fila cheia bloqueia a etapa anterior (backpressure), então no máximo `tamanho_fila`
+    itens esperam entre duas etapas e todas as etapas trabalham ao mesmo tempo: o primeiro
+    item chega ao fim do pipeline sem esperar os demais. Um erro num item é registrado e o
+    item é descartado; os outros seguem normalmente.
+    """
+
+    def __init__(self, etapas: List[Etapa]):
+        if not etapas:
+            raise ValueError("O pipeline precisa de pelo menos uma etapa")
+        self.etapas = etapas
+        self.inicio = 0.0
+
+    def executar(self, itens: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Processa todos os itens e espera o fim do pipeline.
+
+        Returns:
+            Estatísticas por etapa (itens processados, descartados, erros, tempo ocupado e
+            tempo até o primeiro item concluído)
+        """
+        self.inicio = time.perf_counter()
+        threads = []
+        for indice, etapa in enumerate(self.etapas):
+            seguinte = self.etapas[indice + 1] if indice + 1 < len(self.etapas) else None
+            etapa._ativos = etapa.workers
+            for n in range(etapa.workers):
+                thread = threading.Thread(
+                    target=self._worker, args=(etapa, seguinte),
+                    name=f"pipeline-{etapa.nome}-{n + 1}", daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        primeira = self.etapas[0]
+        for item in itens:
+            primeira.fila.put(item)
+        for _ in range(primeira.workers):
+            primeira.fila.put(_FIM)
+
+        # join com timeout mantém a thread principal responsiva a Ctrl+C
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(timeout=0.5)
+
+        estatisticas = {etapa.nome: etapa.estatisticas(self.inicio) for etapa in self.etapas}
+        logger.info(f"Pipeline concluído em {time.perf_counter() - self.inicio:.1f}s: {estatisticas}")
+        return estatisticas
+
+    def _worker(self, etapa: Etapa, seguinte: Optional[Etapa]) -> None:
+        try:
+            terminou = False
+            while not terminou:
+                item = etapa.fila.get()
+                if item is _FIM:
+                    break
+                lote = [item]
+                # Junta no lote os itens que já estão na fila, sem esperar por novos
+                while len(lote) < etapa.tamanho_lote:
+                    try:
+                        proximo = etapa.fila.get_nowait()
+                    except queue.Empty:
+                        break
+                    if proximo is _FIM:
+                        terminou = True
+                        break
+                    lote.append(proximo)
+                for resultado in self._processar(etapa, lote):
+                    if resultado is not None and seguinte is not None:
+                        seguinte.fila.put(resultado)
+        finally:
+            # O último worker da etapa a terminar avisa os workers da etapa seguinte
+            with etapa._lock:
+                etapa._ativos -= 1
+                ultimo = etapa._ativos == 0
+            if ultimo and seguinte is not None:
+                for _ in range(seguinte.workers):
+                    seguinte.fila.put(_FIM)
+
+    def _processar(self, etapa: Etapa, lote: List[Any]) -> List[Any]:
+        inicio = time.perf_counter()
+        erro = False
+        try:
+            if etapa.tamanho_lote > 1:
+                resultados = list(etapa.funcao(lote))
+            else:
+                resultados = [etapa.funcao(lote[0])]
+        except Exception as e:
+            logger.error(f"Erro na etapa '{etapa.nome}' ({len(lote)} item(ns) descartado(s)): {e}")
+            resultados = [None] * len(lote)
+            erro = True
+        agora = time.perf_counter()
+        with etapa._lock:
+            etapa.tempo_ocupado += agora - inicio
+            if erro:
+                etapa.erros += len(lote)
+                return resultados
+            for resultado in resultados:
+                if resultado is None:
+                    etapa.descartados += 1
+                else:
+                    etapa.processados += 1
+                    if etapa.primeiro_concluido is None:
+                        etapa.primeiro_concluido = agora
+        return resultados
@@ -1,25 +1,66 @@
+from __future__ import annotations
+
 import logging
+import threading
 import time
-from typing import Dict, List, Optional, Tuple
-import pandas as pd
-from src.config import config
+from itertools import islice
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from src.config import (
+    config, GEMINI_MAX_WORKERS, GEMINI_TITULOS_POR_LOTE, USD_TO_BRL_RATE,
+    PIPELINE_ATIVO, PIPELINE_WORKERS_TITULOS, PIPELINE_WORKERS_DOCS, PIPELINE_FILA_MAX
+)
 from src.sheets_handler import SheetsHandler
-from src.gemini_handler import GeminiHandler
+from src.gemini_handler import GeminiHandler, montar_registro_titulo
 from src.docs_handler import DocsHandler
 from src.utils import substituir_links_markdown
+from src.run_journal import RunJournal, novo_run_id, SELECAO, TITULO_GERADO, CONTEUDO_GERADO, DOCUMENTO_CRIADO, FIM
+from src.spool import ConteudoSpool
+from src.pipeline import Etapa, Pipeline
+from src.orcamento import obter_governador, OrcamentoExcedido
 import re
-from src.db_handler import DBHandler
 from tqdm import tqdm
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 logger = logging.getLogger('seo_linkbuilder.processor')
 
+# Políticas para a criação dos documentos ao fim da geração de conteúdos
+POLITICAS_COMMIT = ("perguntar", "auto", "nunca")
+
 class ContentProcessor:
-    def __init__(self, sheets: SheetsHandler, gemini: GeminiHandler, docs: DocsHandler):
+    def __init__(self, sheets: SheetsHandler, gemini: GeminiHandler, docs: DocsHandler,
+                 max_workers: Optional[int] = None, titulos_por_lote: Optional[int] = None,
+                 politica_commit: str = "perguntar", pasta_destino: Optional[str] = None,
+                 usar_pipeline: Optional[bool] = None):
+        if politica_commit not in POLITICAS_COMMIT:
+            raise ValueError(f"Política de commit inválida: {politica_commit} (use {', '.join(POLITICAS_COMMIT)})")
         self.sheets = sheets
         self.gemini = gemini
         self.docs = docs
+        # Número de gerações de conteúdo simultâneas (1 = sequencial)
+        self.max_workers = max(1, max_workers or GEMINI_MAX_WORKERS)
+        # Número de linhas cujos títulos são pedidos numa única requisição (1 = uma requisição por linha)
+        self.titulos_por_lote = max(1, titulos_por_lote or GEMINI_TITULOS_POR_LOTE)
+        # "perguntar" pede confirmação (S/N); "auto" cria os documentos sem perguntar;
+        # "nunca" mantém os conteúdos no spool para uma retomada posterior (--resume)
+        self.politica_commit = politica_commit
+        # Pasta do Drive dos documentos (None = DRIVE_FOLDER_ID)
+        self.pasta_destino = pasta_destino
+        # Pipeline em etapas simultâneas (só com a política "auto", que dispensa a confirmação do lote inteiro)
+        self.usar_pipeline = PIPELINE_ATIVO if usar_pipeline is None else usar_pipeline
+        self.estatisticas_pipeline: Optional[Dict] = None
+        # Limite de custo do Gemini: esgotado, a execução para sem finalizar o diário (retomada com --resume)
+        self.orcamento = obter_governador()
+        self.previsao_custo: Dict[str, Dict] = {}
         self.titulos_gerados = []
         self.linhas_processadas = 0
+        # Diário da execução atual (checkpoint por linha e etapa), definido em processar_linhas
+        self.journal: Optional[RunJournal] = None
+        # Spool em disco dos artigos gerados (em memória ficam apenas as chaves)
+        self.spool: Optional[ConteudoSpool] = None
         self.logger = logging.getLogger('seo_linkbuilder.processor')
         # Métricas acumuladas
         self.total_tokens_entrada = 0
@@ -27,14 +68,25 @@ class ContentProcessor:
         self.total_custo = 0
         self.total_palavras = 0
         self.total_caracteres = 0
+        # Contadores do resumo da execução
+        self.titulos_novos = 0
+        self.titulos_falhos = 0
+        self.conteudos_gerados = 0
+        self.conteudos_recuperados = 0
+        self.conteudos_falhos = 0
+        self.documentos_criados = 0
+        self.situacao_lote: Optional[str] = None
+        # Protege métricas, contadores e a lista de títulos quando várias threads os atualizam
+        self._lock = threading.RLock()
 
     def _atualizar_metricas(self, metricas: Dict):
         """Atualiza as métricas acumuladas e mostra o progresso"""
-        self.total_tokens_entrada += metricas.get('input_token_count', 0)
-        self.total_tokens_saida += metricas.get('output_token_count', 0)
-        self.total_custo += metricas.get('cost_usd', 0)
-        self.total_palavras += metricas.get('num_palavras', 0)
-        self.total_caracteres += metricas.get('num_caracteres', 0)
+        with self._lock:
+            self.total_tokens_entrada += metricas.get('input_token_count', 0)
+            self.total_tokens_saida += metricas.get('output_token_count', 0)
+            self.total_custo += metricas.get('cost_usd', 0)
+            self.total_palavras += metricas.get('num_palavras', 0)
+            self.total_caracteres += metricas.get('num_caracteres', 0)
 
     def _mostrar_metricas_atuais(self):
         """Mostra as métricas acumuladas até o momento"""
@@ -48,26 +100,132 @@ class ContentProcessor:
     def processar_linhas(self, df: pd.DataFrame, dynamic_column_map: Dict, 
                         modo_teste: bool = False, limite_linhas: Optional[int] = None,
                         modo_processamento: str = "3", id_inicial: Optional[str] = None,
-                        spreadsheet_id: Optional[str] = None, sheet_name: Optional[str] = None):
-        """Processa as linhas selecionadas de acordo com o modo escolhido"""
+                        spreadsheet_id: Optional[str] = None, sheet_name: Optional[str] = None,
+                        journal: Optional[RunJournal] = None):
+        """
+        Processa as linhas selecionadas de acordo com o modo escolhido.
+
+        Com `journal`, cada etapa concluída por linha é registrada no diário da execução; ao retomar
+        uma execução, as linhas já processadas reaproveitam o que está no diário (sem novas chamadas
+        ao Gemini) e as gravações na planilha que não foram concluídas são refeitas.
+        """
+        self.journal = journal
+        if journal:
+            self.sheets.ouvintes_escrita.append(journal.registrar_escrita_planilha)
         try:
+            if journal:
+                self._reaplicar_escritas_pendentes(spreadsheet_id, sheet_name)
+
             # Filtra o DataFrame se houver ID inicial
             if id_inicial:
                 df = self._filtrar_por_id_inicial(df, id_inicial, dynamic_column_map)
                 if df is None:
-                    return
+                    return self.resumo()
+
+            if self.usar_pipeline and self.politica_commit == "auto" and modo_processamento in ["2", "3"]:
+                # Títulos, conteúdos, documentos e planilha processados ao mesmo tempo, linha a linha
+                self._processar_em_pipeline(df, dynamic_column_map, modo_processamento, limite_linhas, spreadsheet_id, sheet_name)
+            else:
+                # Primeira etapa: Geração de títulos
+                if modo_processamento in ["1", "3"]:
+                    self._processar_titulos(df, dynamic_column_map, limite_linhas, spreadsheet_id, sheet_name)
+
+                # Segunda etapa: Geração de conteúdos
+                if modo_processamento in ["2", "3"] and not self.orcamento.excedido:
+                    self._processar_conteudos(df, dynamic_column_map, limite_linhas, spreadsheet_id, sheet_name)
 
-            # Primeira etapa: Geração de títulos
-            if modo_processamento in ["1", "3"]:
-                self._processar_titulos(df, dynamic_column_map, limite_linhas, spreadsheet_id, sheet_name)
+            if self.orcamento.excedido:
+                # Sem o evento de fim, o --resume continua das linhas que ficaram pendentes
+                logger.warning("Execução interrompida: orçamento do Gemini esgotado")
+                print(f"\nOrçamento de US$ {self.orcamento.limite_usd:.4f} esgotado: execução interrompida com o que já foi concluído salvo.")
+                if journal:
+                    print(f"Para continuar: python main_duas_etapas.py --resume {journal.run_id}")
+            elif journal:
+                journal.registrar(FIM)
+                # Com a execução concluída, os artigos do spool não serão mais necessários para retomá-la
+                # (exceto os adiados pela política "nunca", que serão usados pelo --resume)
+                if self.spool and self.situacao_lote != "adiado":
+                    self.spool.limpar()
 
-            # Segunda etapa: Geração de conteúdos
-            if modo_processamento in ["2", "3"]:
-                self._processar_conteudos(df, dynamic_column_map, limite_linhas, spreadsheet_id, sheet_name)
+            return self.resumo()
 
         except Exception as e:
             logger.error(f"Erro durante o processamento: {e}")
             raise
+        finally:
+            self.orcamento.salvar_historico(self.gemini.db)
+            if journal and journal.registrar_escrita_planilha in self.sheets.ouvintes_escrita:
+                self.sheets.ouvintes_escrita.remove(journal.registrar_escrita_planilha)
+
+    def resumo(self) -> Dict:
+        """Resumo da execução em formato serializável (usado pelo modo não interativo)"""
+        return {
+            'run_id': self.journal.run_id if self.journal else None,
+            'titulos_gerados': self.titulos_novos,
+            'titulos_falhos': self.titulos_falhos,
+            'conteudos_gerados': self.conteudos_gerados,
+            'conteudos_recuperados': self.conteudos_recuperados,
+            'conteudos_falhos': self.conteudos_falhos,
+            'documentos_criados': self.documentos_criados,
+            'lote': self.situacao_lote,
+            'tokens_entrada': self.total_tokens_entrada,
+            'tokens_saida': self.total_tokens_saida,
+            'custo_usd': round(self.total_custo, 6),
+            'custo_brl': round(self.total_custo * USD_TO_BRL_RATE, 4),
+            'etapas': self.estatisticas_pipeline,
+            'previsao_custo': self.previsao_custo,
+            'orcamento': self.orcamento.resumo(),
+        }
+
+    @staticmethod
+    def _linha_planilha(row: pd.Series) -> int:
+        """Número da linha na planilha (sheet_row_num)"""
+        return int(row['sheet_row_num'] if 'sheet_row_num' in row else row.name + 2)
+
+    def _prever_custo(self, etapa: str, linhas: int, tipos: List[str]) -> None:
+        """Mostra a previsão de custo da etapa, calculada com o histórico de consumo por linha"""
+        if not linhas:
+            return
+        previsao = self.orcamento.prever(self.gemini.db, linhas, tipos)
+        self.previsao_custo[etapa] = previsao
+        if previsao['custo_esperado_usd'] is None:
+            logger.info(f"Sem histórico de consumo suficiente para prever o custo da etapa '{etapa}'")
+            return
+        print(f"Custo previsto para {linhas} linha(s): US$ {previsao['custo_esperado_usd']:.4f} "
+              f"(R$ {previsao['custo_esperado_brl']:.2f}; até US$ {previsao['custo_p90_usd']:.4f} no pior caso)")
+        if previsao['linhas_no_orcamento'] is not None and previsao['linhas_no_orcamento'] < linhas:
+            logger.warning(f"O orçamento restante deve cobrir cerca de {previsao['linhas_no_orcamento']} de {linhas} linha(s); "
+                           f"a execução será interrompida quando ele acabar")
+
+    def _reaplicar_escritas_pendentes(self, spreadsheet_id: Optional[str], sheet_name: Optional[str]) -> None:
+        """Regrava na planilha os títulos e links do diário que não chegaram a ser gravados"""
+        pendentes = self.journal.escritas_pendentes()
+        if not pendentes:
+            return
+        logger.info(f"Regravando {len(pendentes)} atualização(ões) pendente(s) da execução {self.journal.run_id}")
+        for linha, campo, valor in pendentes:
+            self.sheets.atualizar_celula(linha, campo, valor, spreadsheet_id, sheet_name)
+        self.sheets.descarregar_escritas()
+
+    def _selecionar_linhas_retomada(self, df: pd.DataFrame, etapa: str, coluna: str) -> Optional[List[pd.Series]]:
+        """
+        Ao retomar uma execução, retorna as linhas selecionadas para a etapa na execução original
+        que ainda não têm valor em `coluna` (None se não há diário ou a etapa ainda não tinha começado).
+        """
+        selecao = self.journal.selecao(etapa) if self.journal else None
+        if selecao is None:
+            return None
+        linhas = []
+        for idx, row in df.iterrows():
+            valor_atual = row.get(coluna)
+            if self._linha_planilha(row) in selecao and not (valor_atual and str(valor_atual).strip()):
+                linhas.append(row)
+        logger.info(f"Retomando a etapa '{etapa}': {len(linhas)} de {len(selecao)} linha(s) da seleção original")
+        return linhas
+
+    def _registrar_selecao(self, etapa: str, linhas: List[pd.Series]) -> None:
+        if self.journal:
+            self.journal.registrar(SELECAO, etapa=etapa, linhas=[self._linha_planilha(row) for row in linhas])
 
     def _filtrar_por_id_inicial(self, df: pd.DataFrame, id_inicial: str, 
                               dynamic_column_map: Dict) -> Optional[pd.DataFrame]:
@@ -98,28 +256,94 @@ class ContentProcessor:
             
         logger.info(f"Encontradas {linhas_sem_titulo} linhas sem título para processar")
         
+        # Ao retomar uma execução, processa a seleção registrada no diário; numa execução nova, as
+        # linhas são tomadas aos lotes, só as que cabem no limite, e as que falharem são repostas
+        # pelas seguintes, de modo que o limite conta títulos gerados (e não linhas tentadas)
+        retomada = self._selecionar_linhas_retomada(df, 'titulos', col_titulo)
+        if retomada is not None:
+            candidatas = iter(retomada)
+            total = len(retomada)
+        else:
+            candidatas = (row for idx, row in df.iterrows() if not self._deve_pular_linha(row, col_titulo, limite_linhas))
+            total = min(linhas_sem_titulo, limite_linhas) if limite_linhas else linhas_sem_titulo
+        self._prever_custo('titulos', total, ['titulo'])
+
         # Cria barra de progresso
-        with tqdm(total=linhas_sem_titulo if not limite_linhas else min(linhas_sem_titulo, limite_linhas),
-                 desc="Gerando títulos", unit="título") as pbar:
-            
-            for idx, row in df.iterrows():
-                if self._deve_pular_linha(row, col_titulo, limite_linhas):
-                    continue
+        with tqdm(total=total, desc="Gerando títulos", unit="título") as pbar:
+            while not self.orcamento.excedido:
+                vagas = self.titulos_por_lote
+                if limite_linhas:
+                    vagas = min(vagas, limite_linhas - self.linhas_processadas)
+                lote = list(islice(candidatas, max(vagas, 0)))
+                if not lote:
+                    break
+                if retomada is None:
+                    self._registrar_selecao('titulos', lote)
+                lista_dados = [self.sheets.extrair_dados_linha(row, dynamic_column_map) for row in lote]
 
-                dados = self.sheets.extrair_dados_linha(row, dynamic_column_map)
-                titulo_escolhido = self._gerar_titulo(dados)
-                
-                if titulo_escolhido:
-                    self._salvar_titulo(titulo_escolhido, row, col_titulo, spreadsheet_id, sheet_name)
-                    self.titulos_gerados.append(titulo_escolhido)
+                titulos = self._resolver_titulos([self._linha_planilha(row) for row in lote], lista_dados, spreadsheet_id, sheet_name)
+                pbar.update(sum(1 for titulo in titulos if titulo))
+
+        # Grava na planilha os títulos que ainda estão no buffer de escrita
+        self.sheets.descarregar_escritas()
+
+        if limite_linhas and self.linhas_processadas >= limite_linhas:
+            logger.info(f"Limite de {limite_linhas} linhas atingido. Parando processamento.")
+
+    def _resolver_titulos(self, linhas: List[int], lista_dados: List[Dict],
+                          spreadsheet_id: Optional[str] = None, sheet_name: Optional[str] = None) -> List[Optional[str]]:
+        """
+        Obtém os títulos de um lote de linhas (do diário ou gerados com uma única requisição ao
+        Gemini, com o modo individual para as que falharem), registra os novos no banco de
+        aprendizado e no diário e os envia para a planilha.
+
+        Returns:
+            Título de cada linha (None se não foi possível gerar um título único)
+        """
+        # Títulos já gerados numa execução retomada vêm do diário, sem nova chamada ao Gemini
+        titulos_escolhidos = [self.journal.titulo(linha) if self.journal else None for linha in linhas]
+        with self._lock:
+            self.titulos_gerados.extend(t for t in titulos_escolhidos if t)
+        a_gerar = [i for i, titulo in enumerate(titulos_escolhidos) if not titulo]
+
+        registros_lote = []
+        # O consumo do lote (com as novas tentativas individuais) é dividido entre as linhas no histórico
+        with self.orcamento.consumo_linha('titulo', linhas=len(a_gerar)):
+            # Um único pedido ao Gemini para o lote inteiro; linhas que falharem caem no modo individual
+            if len(a_gerar) > 1:
+                titulos_lote = self.gemini.gerar_titulos_lote([lista_dados[i] for i in a_gerar])
+            else:
+                titulos_lote = [None] * len(a_gerar)
+
+            for i, titulo in zip(a_gerar, titulos_lote):
+                dados = lista_dados[i]
+                if titulo and titulo not in self.titulos_gerados:
+                    self.gemini.registrar_titulo_aceito(titulo)
+                    registros_lote.append(montar_registro_titulo(titulo, dados.get('palavra_ancora', '')))
+                    titulo_escolhido = titulo
+                else:
+                    titulo_escolhido = self._gerar_titulo(dados)
+                with self._lock:
+                    if titulo_escolhido:
+                        self.titulos_gerados.append(titulo_escolhido)
+                        self.titulos_novos += 1
+                    elif not self.orcamento.excedido:
+                        # Linhas sem título por falta de orçamento ficam para a retomada, não são falhas
+                        self.titulos_falhos += 1
+                if titulo_escolhido and self.journal:
+                    self.journal.registrar(TITULO_GERADO, linhas[i], titulo=titulo_escolhido)
+                titulos_escolhidos[i] = titulo_escolhido
+
+        # Os títulos do lote entram no banco numa única transação, antes de salvar na planilha
+        self._registrar_titulos_db(registros_lote)
+
+        for linha, dados, titulo_escolhido in zip(linhas, lista_dados, titulos_escolhidos):
+            if titulo_escolhido:
+                if not (self.journal and self.journal.gravado(linha, 'titulo', titulo_escolhido)):
+                    self._salvar_titulo(titulo_escolhido, linha, dados, spreadsheet_id, sheet_name)
+                with self._lock:
                     self.linhas_processadas += 1
-                    pbar.update(1)
-                    time.sleep(config.DELAY_ENTRE_CHAMADAS_GEMINI)
-                    
-                # Verifica se atingiu o limite de linhas
-                if limite_linhas and self.linhas_processadas >= limite_linhas:
-                    logger.info(f"Limite de {limite_linhas} linhas atingido. Parando processamento.")
-                    break
+        return titulos_escolhidos
 
     def _processar_conteudos(self, df: pd.DataFrame, dynamic_column_map: Dict, 
                            limite_linhas: Optional[int] = None, spreadsheet_id: Optional[str] = None, sheet_name: Optional[str] = None):
@@ -128,105 +352,344 @@ class ContentProcessor:
         col_conteudo = dynamic_column_map['url_documento']['name'] if isinstance(dynamic_column_map['url_documento'], dict) else dynamic_column_map['url_documento']
         col_titulo = dynamic_column_map['titulo']['name'] if isinstance(dynamic_column_map['titulo'], dict) else dynamic_column_map['titulo']
         
-        # Conta quantas linhas precisam de conteúdo
-        linhas_para_processar = 0
-        for idx, row in df.iterrows():
-            if not self._deve_pular_linha(row, col_conteudo, limite_linhas) and row.get(col_titulo):
-                linhas_para_processar += 1
-                
-        if linhas_para_processar == 0:
-            logger.info("Nenhuma linha precisa de conteúdo. Nada a processar.")
-            return
-            
-        logger.info(f"Encontradas {linhas_para_processar} linhas para gerar conteúdo")
-        
-        conteudos_lote = []
-        linhas_processadas_lote = 0
-        
-        # Cria barra de progresso
-        with tqdm(total=linhas_para_processar if not limite_linhas else min(linhas_para_processar, limite_linhas),
-                 desc="Gerando conteúdos", unit="artigo") as pbar:
-            
+        # Seleciona as linhas que precisam de conteúdo, respeitando o limite
+        # (ao retomar uma execução, usa a seleção registrada no diário)
+        linhas_selecionadas = self._selecionar_linhas_retomada(df, 'conteudos', col_conteudo)
+        if linhas_selecionadas is None:
+            linhas_selecionadas = []
             for idx, row in df.iterrows():
                 if self._deve_pular_linha(row, col_conteudo, limite_linhas):
                     continue
-                if not row.get(col_titulo):
+                if not self._titulo_da_linha(row, col_titulo):
                     logger.warning(f"Linha {idx} não tem título. Pulando geração de conteúdo.")
                     continue
-                    
-                dados = self.sheets.extrair_dados_linha(row, dynamic_column_map)
-                conteudo, metricas, info_link = self.gemini.gerar_conteudo_por_titulo(dados, dados.get('titulo', ''))
-                
-                if not conteudo:
-                    print(f"Falha ao gerar conteúdo para ID {dados.get('id', '')}")
-                    continue
-                    
-                # Atualiza métricas e progresso
-                self._atualizar_metricas(metricas)
-                pbar.set_postfix(custo_usd=f"${self.total_custo:.4f}")
-                pbar.update(1)
-                
-                conteudos_lote.append({
-                    'dados': dados,
-                    'conteudo': conteudo,
-                    'metricas': metricas,
-                    'row': row
-                })
-                linhas_processadas_lote += 1
-                
-                if limite_linhas and linhas_processadas_lote >= limite_linhas:
+                linhas_selecionadas.append(row)
+                if limite_linhas and len(linhas_selecionadas) >= limite_linhas:
                     break
-                    
-                # Mostra métricas a cada 5 artigos
-                if linhas_processadas_lote % 5 == 0:
-                    self._mostrar_metricas_atuais()
-        
+            self._registrar_selecao('conteudos', linhas_selecionadas)
+
+        # Documentos já criados numa execução retomada só precisavam do link na planilha (já regravado)
+        if self.journal:
+            linhas_selecionadas = [row for row in linhas_selecionadas if not self.journal.documento(self._linha_planilha(row))]
+
+        if not linhas_selecionadas:
+            logger.info("Nenhuma linha precisa de conteúdo. Nada a processar.")
+            return
+
+        logger.info(f"Encontradas {len(linhas_selecionadas)} linhas para gerar conteúdo ({self.max_workers} geração(ões) simultânea(s))")
+        self._prever_custo('conteudos', len(linhas_selecionadas), ['conteudo'])
+
+        # Os artigos vão para o spool em disco assim que ficam prontos; em memória ficam só as referências
+        if self.spool is None:
+            self.spool = ConteudoSpool(self.journal.run_id if self.journal else novo_run_id())
+
+        # Referências indexadas pela posição da linha, para preservar a ordem da planilha
+        resultados: List[Optional[Dict]] = [None] * len(linhas_selecionadas)
+        linhas_processadas_lote = 0
+        recuperados = 0
+
+        # Cria barra de progresso
+        with tqdm(total=len(linhas_selecionadas), desc="Gerando conteúdos", unit="artigo") as pbar:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futuros = {}
+                for posicao, row in enumerate(linhas_selecionadas):
+                    dados = self.sheets.extrair_dados_linha(row, dynamic_column_map)
+                    dados['titulo'] = dados.get('titulo') or self._titulo_da_linha(row, col_titulo)
+                    linha = self._linha_planilha(row)
+                    # Conteúdo já gerado numa execução retomada vem do spool, sem nova chamada ao Gemini
+                    chave = self.journal.conteudo(linha) if self.journal else None
+                    if chave and self.spool.existe(chave):
+                        resultados[posicao] = self._referencia_conteudo(chave, linha, dados)
+                        recuperados += 1
+                        self.conteudos_recuperados += 1
+                        pbar.update(1)
+                        continue
+                    futuro = executor.submit(self._gerar_conteudo_linha, dados)
+                    futuros[futuro] = (posicao, linha, dados)
+                if recuperados:
+                    logger.info(f"{recuperados} conteúdo(s) recuperado(s) do spool da execução {self.spool.run_id}")
+
+                # Métricas, spool e barra de progresso são atualizados apenas nesta thread
+                for futuro in as_completed(futuros):
+                    posicao, linha, dados = futuros.pop(futuro)
+                    conteudo, metricas, info_link = futuro.result()
+
+                    if not conteudo:
+                        if not self.orcamento.excedido:
+                            print(f"Falha ao gerar conteúdo para ID {dados.get('id', '')}")
+                            self.conteudos_falhos += 1
+                        pbar.update(1)
+                        continue
+
+                    resultados[posicao] = self._guardar_conteudo(linha, dados, conteudo, metricas)
+
+                    # Atualiza progresso
+                    pbar.set_postfix(custo_usd=f"${self.total_custo:.4f}")
+                    pbar.update(1)
+                    linhas_processadas_lote += 1
+
+                    # Mostra métricas a cada 5 artigos
+                    if linhas_processadas_lote % 5 == 0:
+                        self._mostrar_metricas_atuais()
+
+        conteudos_lote = [c for c in resultados if c is not None]
+
         # Mostra resumo final
         print("\nResumo do lote de conteúdos gerados:")
         for c in conteudos_lote:
-            dados = c['dados']
-            print(f"ID: {dados.get('id', '')} | Título: {dados.get('titulo', '')} | Palavra-âncora: {dados.get('palavra_ancora', '')} | Site: {dados.get('site', '')}")
+            print(f"ID: {c['id']} | Título: {c['titulo']} | Palavra-âncora: {c['palavra_ancora']} | Site: {c['site']}")
         
         self._mostrar_metricas_atuais()
         
-        confirm = input("\nDeseja salvar os conteúdos e atualizar a planilha para este lote? (S/N): ").strip().upper()
-        if confirm != 'S':
-            print("Lote descartado pelo usuário. Nenhum documento será criado.")
+        if not conteudos_lote:
+            if not self.journal:
+                self.spool.limpar()
             return
 
-        # Salvar todos os conteúdos
+        if self.politica_commit == "nunca":
+            self.situacao_lote = "adiado"
+            print(f"Política de commit 'nunca': {len(conteudos_lote)} conteúdo(s) mantido(s) no spool {self.spool.diretorio}. Nenhum documento será criado.")
+            return
+        if self.politica_commit == "auto":
+            logger.info(f"Política de commit 'auto': criando {len(conteudos_lote)} documento(s) sem confirmação")
+        else:
+            confirm = input("\nDeseja salvar os conteúdos e atualizar a planilha para este lote? (S/N): ").strip().upper()
+            if confirm != 'S':
+                self.situacao_lote = "descartado"
+                print("Lote descartado pelo usuário. Nenhum documento será criado.")
+                if not self.journal:
+                    self.spool.limpar()
+                return
+        self.situacao_lote = "criado"
+
+        # Salvar todos os conteúdos, lendo do spool um artigo de cada vez
         for c in conteudos_lote:
-            dados = c['dados']
-            conteudo = c['conteudo']
-            row = c['row']
-            # Remover todos os '**' do texto antes de criar o documento
-            conteudo_sem_asteriscos = conteudo.replace('**', '')
-            # Remover qualquer ocorrência da URL crua do texto
-            url_ancora = dados.get('url_ancora', '')
-            if url_ancora:
-                conteudo_sem_asteriscos = conteudo_sem_asteriscos.replace(url_ancora, '')
-            # Remover links Markdown ([palavra]() ou [palavra](url))
-            conteudo_sem_asteriscos = re.sub(r'\[([^\]]+)\]\([^\)]*\)', r'\1', conteudo_sem_asteriscos)
-            # Aplicar hyperlink na palavra-âncora
-            texto_final, info_link = substituir_links_markdown(conteudo_sem_asteriscos, dados.get('palavra_ancora', ''), url_ancora)
-            sheet_row_num = row['sheet_row_num'] if 'sheet_row_num' in row else row.name + 2
-            nome_arquivo = f"{dados.get('id', '')} - {dados.get('site', '')} - {dados.get('palavra_ancora', '')}"
-            doc_id, doc_url = self.docs.criar_documento(
-                dados.get('titulo', ''),
-                texto_final,
-                nome_arquivo,
-                info_link=info_link,
-                target_folder_id=dados.get('drive_folder_id', None)
-            )
-            self.sheets.atualizar_url_documento(
-                sheet_row_num,
-                doc_url,
-                spreadsheet_id=spreadsheet_id,
-                sheet_name=sheet_name
+            item = self.spool.ler(c['chave'])
+            if item is None:
+                logger.error(f"Conteúdo da linha {c['linha']} (ID {c['id']}) não encontrado no spool. Pulando.")
+                continue
+            dados = item['dados']
+            conteudo = item['conteudo']
+            texto_final, info_link = self._preparar_texto_documento(conteudo, dados)
+            self._criar_documento_linha(c, dados, texto_final, info_link)
+            self._gravar_link_documento(c, spreadsheet_id, sheet_name)
+            time.sleep(config.DELAY_ENTRE_CHAMADAS_GEMINI)
+
+        # Grava na planilha os links que ainda estão no buffer de escrita
+        self.sheets.descarregar_escritas()
+        if not self.journal:
+            self.spool.limpar()
+
+    def _processar_em_pipeline(self, df: pd.DataFrame, dynamic_column_map: Dict, modo_processamento: str,
+                               limite_linhas: Optional[int] = None, spreadsheet_id: Optional[str] = None,
+                               sheet_name: Optional[str] = None):
+        """
+        Processa as linhas num pipeline de etapas com filas limitadas entre elas:
+        títulos -> conteúdos -> pós-processamento -> documentos -> planilha.
+
+        Cada etapa tem seus próprios workers, então Gemini, Docs/Drive e Sheets são usados ao
+        mesmo tempo e cada linha fica pronta assim que passa por todas as etapas.
+        """
+        logger.info("Iniciando processamento em pipeline (títulos, conteúdos, documentos e planilha ao mesmo tempo)")
+        col_conteudo = dynamic_column_map['url_documento']['name'] if isinstance(dynamic_column_map['url_documento'], dict) else dynamic_column_map['url_documento']
+        col_titulo = dynamic_column_map['titulo']['name'] if isinstance(dynamic_column_map['titulo'], dict) else dynamic_column_map['titulo']
+        gerar_titulos = modo_processamento == "3"
+
+        # Seleciona as linhas sem documento, respeitando o limite
+        # (ao retomar uma execução, usa a seleção registrada no diário)
+        linhas_selecionadas = self._selecionar_linhas_retomada(df, 'pipeline', col_conteudo)
+        if linhas_selecionadas is None:
+            # Conteúdos adiados por uma execução anterior com a política "nunca"
+            linhas_selecionadas = self._selecionar_linhas_retomada(df, 'conteudos', col_conteudo)
+        if linhas_selecionadas is None:
+            linhas_selecionadas = []
+            for idx, row in df.iterrows():
+                if self._deve_pular_linha(row, col_conteudo, None):
+                    continue
+                if not gerar_titulos and not self._titulo_da_linha(row, col_titulo):
+                    logger.warning(f"Linha {idx} não tem título. Pulando geração de conteúdo.")
+                    continue
+                linhas_selecionadas.append(row)
+                if limite_linhas and len(linhas_selecionadas) >= limite_linhas:
+                    break
+            self._registrar_selecao('pipeline', linhas_selecionadas)
+
+        # Documentos já criados numa execução retomada só precisavam do link na planilha (já regravado)
+        if self.journal:
+            linhas_selecionadas = [row for row in linhas_selecionadas if not self.journal.documento(self._linha_planilha(row))]
+
+        if not linhas_selecionadas:
+            logger.info("Nenhuma linha precisa de conteúdo. Nada a processar.")
+            return
+
+        self._prever_custo('pipeline', len(linhas_selecionadas), ['titulo', 'conteudo'] if gerar_titulos else ['conteudo'])
+
+        if self.spool is None:
+            self.spool = ConteudoSpool(self.journal.run_id if self.journal else novo_run_id())
+
+        def itens():
+            for row in linhas_selecionadas:
+                # Com o orçamento esgotado, as linhas restantes ficam para a retomada
+                if self.orcamento.excedido:
+                    break
+                dados = self.sheets.extrair_dados_linha(row, dynamic_column_map)
+                dados['titulo'] = dados.get('titulo') or self._titulo_da_linha(row, col_titulo)
+                yield {'linha': self._linha_planilha(row), 'dados': dados}
+
+        with tqdm(total=len(linhas_selecionadas), desc="Pipeline", unit="artigo") as pbar:
+            def gravar_planilha(c: Dict) -> Dict:
+                c = self._gravar_link_documento(c, spreadsheet_id, sheet_name)
+                pbar.set_postfix(custo_usd=f"${self.total_custo:.4f}")
+                pbar.update(1)
+                return c
+
+            etapas = [
+                Etapa('titulos', partial(self._etapa_titulos, spreadsheet_id=spreadsheet_id, sheet_name=sheet_name),
+                      workers=PIPELINE_WORKERS_TITULOS, tamanho_fila=PIPELINE_FILA_MAX, tamanho_lote=self.titulos_por_lote),
+                Etapa('conteudos', self._etapa_conteudo, workers=self.max_workers, tamanho_fila=PIPELINE_FILA_MAX),
+                Etapa('pos_processamento', self._etapa_pos_processamento, workers=1, tamanho_fila=PIPELINE_FILA_MAX),
+                Etapa('documentos', self._etapa_documento, workers=PIPELINE_WORKERS_DOCS, tamanho_fila=PIPELINE_FILA_MAX),
+                Etapa('planilha', gravar_planilha, workers=1, tamanho_fila=PIPELINE_FILA_MAX),
+            ]
+            self.estatisticas_pipeline = Pipeline(etapas).executar(itens())
+
+        # Grava na planilha os títulos e links que ainda estão no buffer de escrita
+        self.sheets.descarregar_escritas()
+        self.situacao_lote = "criado"
+        if not self.journal:
+            self.spool.limpar()
+        self._mostrar_metricas_atuais()
+
+    def _etapa_titulos(self, itens: List[Dict], spreadsheet_id: Optional[str] = None,
+                       sheet_name: Optional[str] = None) -> List[Optional[Dict]]:
+        """Etapa de títulos do pipeline: gera, num único pedido, os títulos que faltam no lote"""
+        sem_titulo = [item for item in itens if not item['dados'].get('titulo')]
+        if sem_titulo and not self.orcamento.excedido:
+            titulos = self._resolver_titulos(
+                [item['linha'] for item in sem_titulo], [item['dados'] for item in sem_titulo],
+                spreadsheet_id, sheet_name
             )
-            print(f"Documento criado e link salvo para ID {dados.get('id', '')}: {doc_url}")
+            for item, titulo in zip(sem_titulo, titulos):
+                item['dados']['titulo'] = titulo or ''
+        return [item if item['dados'].get('titulo') else None for item in itens]
+
+    def _etapa_conteudo(self, item: Dict) -> Optional[Dict]:
+        """Etapa de conteúdo do pipeline: gera o artigo (ou o recupera do spool) e o grava no spool"""
+        linha, dados = item['linha'], item['dados']
+        chave = self.journal.conteudo(linha) if self.journal else None
+        if chave and self.spool.existe(chave):
+            with self._lock:
+                self.conteudos_recuperados += 1
+            return self._referencia_conteudo(chave, linha, dados)
+        conteudo, metricas, _ = self._gerar_conteudo_linha(dados)
+        if not conteudo:
+            if not self.orcamento.excedido:
+                print(f"Falha ao gerar conteúdo para ID {dados.get('id', '')}")
+                with self._lock:
+                    self.conteudos_falhos += 1
+            return None
+        return self._guardar_conteudo(linha, dados, conteudo, metricas)
+
+    def _etapa_pos_processamento(self, c: Dict) -> Optional[Dict]:
+        """Etapa de pós-processamento do pipeline: lê o artigo do spool e prepara o texto do documento"""
+        item = self.spool.ler(c['chave'])
+        if item is None:
+            logger.error(f"Conteúdo da linha {c['linha']} (ID {c['id']}) não encontrado no spool. Pulando.")
+            return None
+        c['dados'] = item['dados']
+        c['texto'], c['info_link'] = self._preparar_texto_documento(item['conteudo'], item['dados'])
+        return c
+
+    def _etapa_documento(self, c: Dict) -> Dict:
+        """Etapa de documentos do pipeline: cria o documento no Docs/Drive"""
+        return self._criar_documento_linha(c, c.pop('dados'), c.pop('texto'), c.pop('info_link'))
+
+    def _guardar_conteudo(self, linha: int, dados: Dict, conteudo: str, metricas: Dict) -> Dict:
+        """Grava um artigo gerado no spool e no diário e retorna a referência leve a ele"""
+        chave = self.spool.gravar(str(linha), {'dados': dados, 'conteudo': conteudo, 'metricas': metricas})
+        if self.journal:
+            self.journal.registrar(CONTEUDO_GERADO, linha, titulo=dados.get('titulo', ''), spool=chave)
+        self._atualizar_metricas(metricas)
+        with self._lock:
+            self.conteudos_gerados += 1
+        return self._referencia_conteudo(chave, linha, dados)
+
+    @staticmethod
+    def _preparar_texto_documento(conteudo: str, dados: Dict) -> Tuple[str, Optional[Dict]]:
+        """Limpa o texto gerado e aplica o hyperlink na palavra-âncora"""
+        # Remover todos os '**' do texto antes de criar o documento
+        conteudo_sem_asteriscos = conteudo.replace('**', '')
+        # Remover qualquer ocorrência da URL crua do texto
+        url_ancora = dados.get('url_ancora', '')
+        if url_ancora:
+            conteudo_sem_asteriscos = conteudo_sem_asteriscos.replace(url_ancora, '')
+        # Remover links Markdown ([palavra]() ou [palavra](url))
+        conteudo_sem_asteriscos = re.sub(r'\[([^\]]+)\]\([^\)]*\)', r'\1', conteudo_sem_asteriscos)
+        # Aplicar hyperlink na palavra-âncora
+        return substituir_links_markdown(conteudo_sem_asteriscos, dados.get('palavra_ancora', ''), url_ancora)
+
+    def _criar_documento_linha(self, c: Dict, dados: Dict, texto_final: str, info_link: Optional[Dict]) -> Dict:
+        """Cria o documento de uma linha e o registra no diário; o artigo deixa de ser necessário no spool"""
+        nome_arquivo = f"{dados.get('id', '')} - {dados.get('site', '')} - {dados.get('palavra_ancora', '')}"
+        doc_id, doc_url = self.docs.criar_documento(
+            dados.get('titulo', ''),
+            texto_final,
+            nome_arquivo,
+            info_link=info_link,
+            target_folder_id=dados.get('drive_folder_id') or self.pasta_destino
+        )
+        if self.journal:
+            self.journal.registrar(DOCUMENTO_CRIADO, c['linha'], doc_id=doc_id, doc_url=doc_url)
+        self.spool.remover(c['chave'])
+        c['doc_url'] = doc_url
+        return c
+
+    def _gravar_link_documento(self, c: Dict, spreadsheet_id: Optional[str] = None, sheet_name: Optional[str] = None) -> Dict:
+        """Envia o link do documento para a planilha (buffer de escrita)"""
+        self.sheets.atualizar_url_documento(
+            c['linha'],
+            c['doc_url'],
+            spreadsheet_id=spreadsheet_id,
+            sheet_name=sheet_name
+        )
+        print(f"Documento criado e link salvo para ID {c['id']}: {c['doc_url']}")
+        with self._lock:
+            self.documentos_criados += 1
             self.linhas_processadas += 1
-            time.sleep(config.DELAY_ENTRE_CHAMADAS_GEMINI)
+        return c
+
+    @staticmethod
+    def _referencia_conteudo(chave: str, linha: int, dados: Dict) -> Dict:
+        """Referência leve a um artigo do spool, com os campos usados no resumo do lote"""
+        return {
+            'chave': chave,
+            'linha': linha,
+            'id': dados.get('id', ''),
+            'titulo': dados.get('titulo', ''),
+            'palavra_ancora': dados.get('palavra_ancora', ''),
+            'site': dados.get('site', '')
+        }
+
+    def _titulo_da_linha(self, row: pd.Series, col_titulo: str) -> str:
+        """Título da linha na planilha ou, se ainda não foi gravado, o gerado nesta execução"""
+        titulo = row.get(col_titulo)
+        if not titulo and self.journal:
+            titulo = self.journal.titulo(self._linha_planilha(row))
+        return titulo or ''
+
+    def _gerar_conteudo_linha(self, dados: Dict) -> Tuple[str, Dict, Optional[Dict]]:
+        """Gera o conteúdo de uma linha (executado nas threads de trabalho)"""
+        if self.orcamento.excedido:
+            return "", {}, None
+        try:
+            with self.orcamento.consumo_linha('conteudo'):
+                return self.gemini.gerar_conteudo_por_titulo(dados, dados.get('titulo', ''))
+        except OrcamentoExcedido:
+            logger.warning(f"Conteúdo do ID {dados.get('id', '')} não gerado: orçamento esgotado")
+            return "", {}, None
+        except Exception as e:
+            logger.error(f"Erro ao gerar conteúdo para ID {dados.get('id', '')}: {e}")
+            return "", {}, None
 
     def _deve_pular_linha(self, row: pd.Series, coluna: str, limite_linhas: Optional[int]) -> bool:
         """Verifica se deve pular a linha atual"""
@@ -242,40 +705,42 @@ class ContentProcessor:
     def _gerar_titulo(self, dados: Dict) -> Optional[str]:
         """Gera título usando Gemini"""
         tentativas = 0
-        temperatura_original = getattr(self.gemini, 'temperatura_atual', 0.7)
         
-        while tentativas < 3:
+        # Perto do limite do orçamento, uma única tentativa
+        while tentativas < (1 if self.orcamento.em_economia else 3):
+            if self.orcamento.excedido:
+                return None
             tentativas += 1
-            if hasattr(self.gemini, 'temperatura_atual'):
-                self.gemini.temperatura_atual = min(1.0, temperatura_original + 0.1 * tentativas)
                 
-            titulos = self.gemini.gerar_titulos(dados, quantidade=3)
+            try:
+                # Cada nova tentativa usa uma temperatura mais alta, só nesta chamada
+                titulos = self.gemini.gerar_titulos(dados, quantidade=3, aumento_temperatura=0.1 * (tentativas - 1))
+            except OrcamentoExcedido:
+                logger.warning(f"Título da palavra-âncora '{dados.get('palavra_ancora', '')}' não gerado: orçamento esgotado")
+                return None
             for titulo in titulos:
                 if titulo not in self.titulos_gerados:
-                    # Extrair informações para o banco de dados
-                    main_theme = self.gemini._extrair_tema_principal(titulo)
-                    structure_type = self.gemini._extrair_estrutura(titulo)
-                    themes = self.gemini._extrair_temas_secundarios(titulo)
-                    
-                    # Adicionar ao banco de dados
-                    try:
-                        db = DBHandler()
-                        title_id = db.add_title(
-                            title=titulo,
-                            anchor_word=dados.get('palavra_ancora', ''),
-                            main_theme=main_theme,
-                            structure_type=structure_type,
-                            themes=themes
-                        )
-                        logger.info(f"Título salvo no banco de dados com ID {title_id}")
-                    except Exception as e:
-                        logger.error(f"Erro ao salvar título no banco de dados: {e}")
-                    
+                    self._registrar_titulo_db(titulo, dados)
                     return titulo
                     
         logger.warning(f"Não foi possível gerar um título único após {tentativas} tentativas")
         return None
 
+    def _registrar_titulo_db(self, titulo: str, dados: Dict) -> None:
+        """Registra o título escolhido no banco de aprendizado e no índice de similaridade"""
+        self.gemini.registrar_titulo_aceito(titulo)
+        self._registrar_titulos_db([montar_registro_titulo(titulo, dados.get('palavra_ancora', ''))])
+
+    def _registrar_titulos_db(self, registros: List[Dict]) -> None:
+        """Adiciona os títulos ao banco de aprendizado numa única transação"""
+        if not registros:
+            return
+        try:
+            title_ids = self.gemini.db.add_titles_bulk(registros)
+            logger.info(f"{len(title_ids)} título(s) salvo(s) no banco de dados (IDs {title_ids[0]}-{title_ids[-1]})")
+        except Exception as e:
+            logger.error(f"Erro ao salvar títulos no banco de dados: {e}")
+
     def _gerar_conteudo(self, dados: Dict) -> Optional[str]:
         """Gera conteúdo usando Gemini"""
         try:
@@ -352,15 +817,13 @@ class ContentProcessor:
         # Garante que a pontuação não ultrapasse 1.0
         return min(1.0, pontuacao)
 
-    def _salvar_titulo(self, titulo: str, row: pd.Series, col_titulo: str, spreadsheet_id: Optional[str] = None, sheet_name: Optional[str] = None):
+    def _salvar_titulo(self, titulo: str, sheet_row_num: int, dados: Dict, spreadsheet_id: Optional[str] = None, sheet_name: Optional[str] = None):
         """Salva título na planilha"""
         try:
-            sheet_row_num = row['sheet_row_num'] if 'sheet_row_num' in row else row.name + 2
             self.sheets.atualizar_titulo_documento(sheet_row_num, titulo, spreadsheet_id, sheet_name)
             
             # Calcula e atualiza o desempenho do título no banco de dados
             try:
-                dados = self.sheets.extrair_dados_linha(row, self.sheets.dynamic_column_map)
                 performance_score = self._calcular_pontuacao_titulo(titulo, dados)
                 self.gemini.atualizar_desempenho_titulo(titulo, performance_score)
                 logger.info(f"Desempenho do título atualizado no banco de dados (pontuação: {performance_score:.2f})")
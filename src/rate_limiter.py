@@ -0,0 +1,114 @@
+# Módulo de controle de taxa (rate limit) para as chamadas à API do Gemini
+import logging
+import threading
+import time
+from typing import Optional
+
+from src.config import GEMINI_RPM_LIMIT, GEMINI_TPM_LIMIT
+
+logger = logging.getLogger('seo_linkbuilder.rate_limiter')
+
+
+class TokenBucket:
+    """
+    Balde de fichas (token bucket) thread-safe.
+
+    O balde começa cheio com `capacidade` fichas e é reabastecido continuamente
+    à taxa de `capacidade` fichas por minuto.
+    """
+
+    def __init__(self, capacidade: float, nome: str = ""):
+        self.capacidade = float(capacidade)
+        self.taxa_por_segundo = self.capacidade / 60.0
+        self.nome = nome
+        self._fichas = self.capacidade
+        self._ultimo_abastecimento = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reabastecer(self) -> None:
+        agora = time.monotonic()
+        decorrido = agora - self._ultimo_abastecimento
+        self._ultimo_abastecimento = agora
+        self._fichas = min(self.capacidade, self._fichas + decorrido * self.taxa_por_segundo)
+
+    def tempo_ate_disponivel(self, quantidade: float) -> float:
+        """Retorna quantos segundos faltam para `quantidade` fichas estarem disponíveis (0 se já estão)."""
+        # Pedidos maiores que o balde inteiro são limitados à capacidade para não bloquear para sempre
+        quantidade = min(quantidade, self.capacidade)
+        with self._lock:
+            self._reabastecer()
+            falta = quantidade - self._fichas
+        return max(0.0, falta / self.taxa_por_segundo) if falta > 0 else 0.0
+
+    def consumir(self, quantidade: float) -> None:
+        """Retira `quantidade` fichas do balde (o saldo pode ficar negativo)."""
+        quantidade = min(quantidade, self.capacidade)
+        with self._lock:
+            self._reabastecer()
+            self._fichas -= quantidade
+
+    def esvaziar(self) -> None:
+        """Zera o saldo do balde (usado quando a API sinaliza cota esgotada)."""
+        with self._lock:
+            self._reabastecer()
+            self._fichas = min(self._fichas, 0.0)
+
+
+class RateLimiter:
+    """
+    Limitador de taxa com dois baldes: requisições por minuto (RPM) e tokens por minuto (TPM).
+
+    Toda chamada ao Gemini deve passar por `adquirir()` antes de ser feita. Quando a API
+    responde com erro 429, `pausar()` bloqueia todas as threads pelo tempo indicado.
+    """
+
+    def __init__(self, rpm: int = GEMINI_RPM_LIMIT, tpm: int = GEMINI_TPM_LIMIT):
+        self.balde_requisicoes = TokenBucket(rpm, "requisições/min")
+        self.balde_tokens = TokenBucket(tpm, "tokens/min")
+        self._pausado_ate = 0.0
+        self._lock = threading.Lock()
+
+    def adquirir(self, tokens_estimados: int = 0) -> float:
+        """
+        Bloqueia até que haja cota para uma requisição com `tokens_estimados` tokens.
+
+        Returns:
+            Tempo total de espera em segundos
+        """
+        espera_total = 0.0
+        while True:
+            with self._lock:
+                espera = max(
+                    self._pausado_ate - time.monotonic(),
+                    self.balde_requisicoes.tempo_ate_disponivel(1),
+                    self.balde_tokens.tempo_ate_disponivel(tokens_estimados),
+                )
+                if espera <= 0:
+                    self.balde_requisicoes.consumir(1)
+                    self.balde_tokens.consumir(tokens_estimados)
+                    if espera_total > 0:
+                        logger.debug(f"Cota do Gemini liberada após {espera_total:.1f}s de espera")
+                    return espera_total
+            time.sleep(espera)
+            espera_total += espera
+
+    def pausar(self, segundos: float) -> None:
+        """Suspende novas requisições por `segundos` e esvazia os baldes (após um erro 429)."""
+        with self._lock:
+            self._pausado_ate = max(self._pausado_ate, time.monotonic() + segundos)
+            self.balde_requisicoes.esvaziar()
+            self.balde_tokens.esvaziar()
+
+
+_rate_limiter_global: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def obter_rate_limiter() -> RateLimiter:
+    """Retorna o limitador de taxa compartilhado por todas as instâncias do GeminiHandler."""
+    global _rate_limiter_global
+    with _rate_limiter_lock:
+        if _rate_limiter_global is None:
+            _rate_limiter_global = RateLimiter()
+            logger.info(f"Rate limiter do Gemini: {GEMINI_RPM_LIMIT} requisições/min, {GEMINI_TPM_LIMIT} tokens/min")
+        return _rate_limiter_global
@@ -0,0 +1,140 @@
+# Módulo de cache persistente das respostas do Gemini
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+from src.config import GEMINI_CACHE_PATH, GEMINI_CACHE_TTL_HORAS, GEMINI_CACHE_MAX_MB
+
+
+class RespostaCache:
+    """Resposta recuperada do cache, com a mesma interface usada de `GenerateContentResponse`."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.prompt_feedback = None
+        self.do_cache = True
+
+
+class ResponseCache:
+    """
+    Cache em disco (SQLite) das respostas do Gemini.
+
+    A chave é o hash SHA-256 do prompt completo, do modelo e da configuração de geração
+    (temperatura, max_output_tokens etc.). O texto da resposta é armazenado comprimido com zlib.
+    Entradas expiram após `ttl_horas` e, quando o cache passa de `max_mb`, as entradas
+    acessadas há mais tempo são removidas (LRU).
+    """
+
+    def __init__(self, db_path: str = GEMINI_CACHE_PATH, ttl_horas: float = GEMINI_CACHE_TTL_HORAS,
+                 max_mb: float = GEMINI_CACHE_MAX_MB):
+        self.db_path = db_path
+        self.ttl_segundos = ttl_horas * 3600
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.logger = logging.getLogger('seo_linkbuilder.cache')
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self._init_db()
+
+    def _init_db(self):
+        """Cria a tabela do cache se não existir."""
+        diretorio = os.path.dirname(self.db_path)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS respostas (
+                    chave TEXT PRIMARY KEY,
+                    modelo TEXT NOT NULL,
+                    resposta BLOB NOT NULL,
+                    tamanho INTEGER NOT NULL,
+                    criado_em REAL NOT NULL,
+                    acessado_em REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_respostas_acessado_em ON respostas (acessado_em)")
+            conn.commit()
+
+    @staticmethod
+    def gerar_chave(prompt: str, modelo: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        """Gera a chave do cache a partir do prompt, do modelo e da configuração de geração."""
+        material = json.dumps(
+            {"modelo": modelo, "config": generation_config or {}, "prompt": prompt},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def obter(self, chave: str) -> Optional[str]:
+        """Retorna o texto armazenado para a chave, ou None se não existir ou tiver expirado."""
+        agora = time.time()
+        try:
+            with self._lock, sqlite3.connect(self.db_path) as conn:
+                row = conn.execute(
+                    "SELECT resposta, criado_em FROM respostas WHERE chave = ?", (chave,)
+                ).fetchone()
+                if not row:
+                    self.falhas += 1
+                    return None
+                if self.ttl_segundos and agora - row[1] > self.ttl_segundos:
+                    conn.execute("DELETE FROM respostas WHERE chave = ?", (chave,))
+                    conn.commit()
+                    self.falhas += 1
+                    return None
+                conn.execute("UPDATE respostas SET acessado_em = ? WHERE chave = ?", (agora, chave))
+                conn.commit()
+                self.acertos += 1
+                return zlib.decompress(row[0]).decode("utf-8")
+        except Exception as e:
+            self.logger.warning(f"Erro ao ler o cache de respostas: {e}")
+            return None
+
+    def salvar(self, chave: str, modelo: str, texto: str) -> None:
+        """Armazena o texto de uma resposta e aplica a política de tamanho máximo."""
+        if not texto:
+            return
+        agora = time.time()
+        comprimido = zlib.compress(texto.encode("utf-8"))
+        try:
+            with self._lock, sqlite3.connect(self.db_path) as conn:
+                conn.execute("""
+                    INSERT OR REPLACE INTO respostas (chave, modelo, resposta, tamanho, criado_em, acessado_em)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (chave, modelo, comprimido, len(comprimido), agora, agora))
+                self._aplicar_limites(conn, agora)
+                conn.commit()
+        except Exception as e:
+            self.logger.warning(f"Erro ao gravar no cache de respostas: {e}")
+
+    def _aplicar_limites(self, conn: sqlite3.Connection, agora: float) -> None:
+        """Remove entradas expiradas e, se necessário, as menos usadas recentemente."""
+        if self.ttl_segundos:
+            conn.execute("DELETE FROM respostas WHERE criado_em < ?", (agora - self.ttl_segundos,))
+        if not self.max_bytes:
+            return
+        total = conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM respostas").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excesso = total - self.max_bytes
+        removidas = 0
+        for chave, tamanho in conn.execute(
+            "SELECT chave, tamanho FROM respostas ORDER BY acessado_em ASC"
+        ).fetchall():
+            if excesso <= 0:
+                break
+            conn.execute("DELETE FROM respostas WHERE chave = ?", (chave,))
+            excesso -= tamanho
+            removidas += 1
+        self.logger.info(f"Cache de respostas acima de {self.max_bytes // (1024 * 1024)} MB: {removidas} entrada(s) removida(s) (LRU)")
+
+    def limpar(self) -> None:
+        """Remove todas as entradas do cache."""
+        with self._lock, sqlite3.connect(self.db_path) as conn:
+            conn.execute("DELETE FROM respostas")
+            conn.commit()
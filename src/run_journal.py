@@ -0,0 +1,148 @@
+# Módulo do diário de execução (checkpoint) do processamento em duas etapas
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from src.config import RUNS_DIR
+
+logger = logging.getLogger('seo_linkbuilder.run_journal')
+
+# Eventos registrados no diário
+INICIO = "inicio"
+SELECAO = "selecao"
+TITULO_GERADO = "titulo_gerado"
+CONTEUDO_GERADO = "conteudo_gerado"
+DOCUMENTO_CRIADO = "documento_criado"
+PLANILHA_ATUALIZADA = "planilha_atualizada"
+FIM = "fim"
+
+
+def novo_run_id() -> str:
+    """ID de execução: data e hora, mais um sufixo aleatório para execuções no mesmo segundo."""
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(2)}"
+
+
+class RunJournal:
+    """
+    Diário append-only (JSONL) de uma execução, em `RUNS_DIR/<run_id>.jsonl`.
+
+    Cada linha é um evento com a linha da planilha (`linha` = sheet_row_num) e o resultado
+    daquela transição de etapa: título gerado, conteúdo gerado (a chave do item no spool, onde
+    ficam o texto e as métricas), documento criado e célula da planilha gravada. Cada evento é
+    gravado e sincronizado com o disco antes de a execução seguir, então, depois de uma queda,
+    `RunJournal.abrir(run_id)` reconstrói o estado e o processamento pode pular o que já foi
+    feito e regravar na planilha o que faltou.
+    """
+
+    def __init__(self, run_id: Optional[str] = None, diretorio: str = RUNS_DIR):
+        self.run_id = run_id or novo_run_id()
+        self.caminho = os.path.join(diretorio, f"{self.run_id}.jsonl")
+        self._lock = threading.Lock()
+        self.parametros: Dict[str, Any] = {}
+        self.finalizado = False
+        self._selecoes: Dict[str, List[int]] = {}
+        self._titulos: Dict[int, str] = {}
+        self._conteudos: Dict[int, str] = {}
+        self._documentos: Dict[int, Dict[str, str]] = {}
+        # (linha, campo) -> último valor gravado com sucesso na planilha
+        self._gravados: Dict[Tuple[int, str], Any] = {}
+        if os.path.exists(self.caminho):
+            self._carregar()
+        else:
+            os.makedirs(diretorio, exist_ok=True)
+
+    @classmethod
+    def abrir(cls, run_id: str, diretorio: str = RUNS_DIR) -> 'RunJournal':
+        """Abre o diário de uma execução anterior para retomá-la."""
+        if not os.path.exists(os.path.join(diretorio, f"{run_id}.jsonl")):
+            raise FileNotFoundError(f"Execução '{run_id}' não encontrada em {diretorio}")
+        return cls(run_id, diretorio)
+
+    def _carregar(self) -> None:
+        with open(self.caminho, "r", encoding="utf-8") as f:
+            for numero, linha in enumerate(f, 1):
+                if not linha.strip():
+                    continue
+                try:
+                    self._aplicar(json.loads(linha))
+                except json.JSONDecodeError:
+                    # Uma queda durante a gravação pode deixar a última linha incompleta
+                    logger.warning(f"Linha {numero} do diário {self.caminho} ignorada (incompleta)")
+        logger.info(
+            f"Diário {self.run_id} carregado: {len(self._titulos)} título(s), {len(self._conteudos)} conteúdo(s), "
+            f"{len(self._documentos)} documento(s)"
+        )
+
+    def _aplicar(self, evento: Dict[str, Any]) -> None:
+        """Atualiza o estado em memória com um evento."""
+        tipo = evento.get("evento")
+        linha = evento.get("linha")
+        if tipo == INICIO:
+            self.parametros = evento.get("parametros", {})
+        elif tipo == SELECAO:
+            # A seleção pode ser registrada aos lotes (ex.: títulos com reposição das linhas que falharam)
+            self._selecoes.setdefault(evento["etapa"], []).extend(evento["linhas"])
+        elif tipo == TITULO_GERADO:
+            self._titulos[linha] = evento["titulo"]
+        elif tipo == CONTEUDO_GERADO:
+            self._conteudos[linha] = evento["spool"]
+        elif tipo == DOCUMENTO_CRIADO:
+            self._documentos[linha] = {"doc_id": evento["doc_id"], "doc_url": evento["doc_url"]}
+        elif tipo == PLANILHA_ATUALIZADA:
+            self._gravados[(linha, evento["campo"])] = evento["valor"]
+        elif tipo == FIM:
+            self.finalizado = True
+
+    def registrar(self, tipo: str, linha: Optional[int] = None, **dados: Any) -> None:
+        """Acrescenta um evento ao diário e o sincroniza com o disco."""
+        evento = {"ts": time.time(), "evento": tipo}
+        if linha is not None:
+            evento["linha"] = int(linha)
+        evento.update(dados)
+        texto = json.dumps(evento, ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.caminho, "a", encoding="utf-8") as f:
+                f.write(texto + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._aplicar(evento)
+
+    def registrar_escrita_planilha(self, linha: int, campo: str, valor: Any, sucesso: bool) -> None:
+        """Ouvinte de `SheetsHandler.descarregar_escritas`: registra as células gravadas com sucesso."""
+        if sucesso and self._gravados.get((linha, campo)) != valor:
+            self.registrar(PLANILHA_ATUALIZADA, linha, campo=campo, valor=valor)
+
+    def selecao(self, etapa: str) -> Optional[Set[int]]:
+        """Linhas selecionadas para a etapa na execução original (None se a etapa ainda não começou)."""
+        linhas = self._selecoes.get(etapa)
+        return set(linhas) if linhas is not None else None
+
+    def titulo(self, linha: int) -> Optional[str]:
+        return self._titulos.get(linha)
+
+    def conteudo(self, linha: int) -> Optional[str]:
+        """Chave no spool do conteúdo gerado para a linha."""
+        return self._conteudos.get(linha)
+
+    def documento(self, linha: int) -> Optional[Dict[str, str]]:
+        return self._documentos.get(linha)
+
+    def gravado(self, linha: int, campo: str, valor: Any) -> bool:
+        """Indica se `valor` já foi gravado com sucesso na célula (linha, campo)."""
+        return self._gravados.get((linha, campo)) == valor
+
+    def escritas_pendentes(self) -> List[Tuple[int, str, Any]]:
+        """Retorna (linha, campo, valor) dos títulos e links gerados que não chegaram à planilha."""
+        pendentes = []
+        for linha, titulo in sorted(self._titulos.items()):
+            if not self.gravado(linha, 'titulo', titulo):
+                pendentes.append((linha, 'titulo', titulo))
+        for linha, documento in sorted(self._documentos.items()):
+            if not self.gravado(linha, 'url_documento', documento['doc_url']):
+                pendentes.append((linha, 'url_documento', documento['doc_url']))
+        return pendentes
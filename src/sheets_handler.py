@@ -1,31 +1,86 @@
 # Módulo para interagir com a API do Google Sheets
+from __future__ import annotations
+
+import atexit
 import logging
-import pandas as pd
-from typing import List, Dict, Any, Optional, Tuple
+import threading
+import time
+import weakref
+from typing import TYPE_CHECKING, Callable, List, Dict, Any, Optional, Tuple
 
 from src.config import (
     SPREADSHEET_ID, 
     SHEET_NAME, 
-    COLUNAS_MAPEAMENTO_NOMES
+    COLUNAS_MAPEAMENTO_NOMES,
+    SHEETS_BUFFER_LINHAS,
+    SHEETS_BUFFER_SEGUNDOS
 )
-from src.auth_handler import obter_credenciais, criar_servico_sheets, criar_servico_drive
+from src.auth_handler import obter_registro_servicos
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Handlers existentes, descarregados por um único gancho na saída do programa (a referência
+# fraca não impede que um handler descartado seja coletado)
+_handlers_ativos: "weakref.WeakSet[SheetsHandler]" = weakref.WeakSet()
+
+
+@atexit.register
+def _descarregar_handlers_ativos() -> None:
+    """Grava na saída do programa as atualizações que ainda estão nos buffers."""
+    for handler in list(_handlers_ativos):
+        handler.descarregar_escritas()
+
 
 class SheetsHandler:
-    def __init__(self):
+    def __init__(self, service=None, service_drive=None):
         # Inicializa o logger
         self.logger = logging.getLogger('seo_linkbuilder.sheets')
         
-        # Obtém credenciais e inicializa os serviços
+        # Os serviços vêm do registro compartilhado (um cliente por API no processo) no primeiro
+        # uso; serviços injetados, como os de src/fakes.py, dispensam a autenticação
+        self._service = service
+        self._service_drive = service_drive
+        self.sheet_metadata_cache: Dict[Tuple[str, str], Optional[Tuple[int, List[str], Dict[str, Dict[str, Any]]]]] = {}
+
+        # Buffer de escrita: {spreadsheet_id: {range: valor}}, enviado com values().batchUpdate
+        self._buffer_escrita: Dict[str, Dict[str, Any]] = {}
+        self._linhas_pendentes: set = set()
+        self._buffer_desde: Optional[float] = None
+        self._buffer_lock = threading.RLock()
+        # Serializa as descargas: cada uma troca o buffer e o envia antes de a próxima começar,
+        # para que um valor mais antigo de uma célula nunca seja gravado depois de um mais novo
+        self._envio_lock = threading.Lock()
+        # Descarrega o buffer SHEETS_BUFFER_SEGUNDOS depois da primeira atualização pendente
+        self._temporizador: Optional[threading.Timer] = None
+        # (spreadsheet_id, range) -> (sheet_row_num, internal_key) das atualizações no buffer
+        self._origem_escrita: Dict[Tuple[str, str], Tuple[int, str]] = {}
+        # Funções chamadas com (sheet_row_num, internal_key, valor, sucesso) para cada célula descarregada
+        self.ouvintes_escrita: List[Callable[[int, str, Any, bool], None]] = []
+        _handlers_ativos.add(self)
+    
+    def _obter_servico(self, api: str, versao: str):
+        """Serviço do registro compartilhado (criado, com a autenticação, no primeiro pedido)."""
         try:
-            self.credenciais = obter_credenciais()
-            self.service = criar_servico_sheets(self.credenciais)
-            self.service_drive = criar_servico_drive(self.credenciais)
-            self.logger.info("Serviços do Google Sheets e Drive inicializados com sucesso para SheetsHandler")
-            self.sheet_metadata_cache: Dict[Tuple[str, str], Optional[Tuple[int, List[str], Dict[str, Dict[str, Any]]]]] = {}
+            return obter_registro_servicos().obter(api, versao)
         except Exception as e:
             self.logger.error(f"Erro ao inicializar serviços para SheetsHandler: {e}")
             raise
-    
+
+    @property
+    def service(self):
+        """Serviço do Google Sheets, obtido no primeiro uso."""
+        if self._service is None:
+            self._service = self._obter_servico('sheets', 'v4')
+        return self._service
+
+    @property
+    def service_drive(self):
+        """Serviço do Google Drive, obtido no primeiro uso."""
+        if self._service_drive is None:
+            self._service_drive = self._obter_servico('drive', 'v3')
+        return self._service_drive
+
     def get_column_letter(self, column_index: int) -> str:
         """
         Converte um índice de coluna (0-based) para a letra da coluna do Google Sheets (A, B, ..., Z, AA, AB, ...).
@@ -142,6 +197,8 @@ class SheetsHandler:
         Returns:
             DataFrame com os dados da planilha e a coluna 'sheet_row_num'.
         """
+        import pandas as pd  # importado só aqui para não atrasar a abertura do programa
+
         self.logger.debug(f"Iniciando leitura da planilha. Limite: {limite_linhas}, Linha Inicial: {linha_inicial}, Apenas Dados: {apenas_dados}, Filtrar Processados: {filtrar_processados}")
 
         current_spreadsheet_id = spreadsheet_id if spreadsheet_id else SPREADSHEET_ID
@@ -280,7 +337,7 @@ class SheetsHandler:
         
         except Exception as e:
             self.logger.error(f"Erro ao extrair dados da linha com mapeamento dinâmico: {e}")
-            self.logger.error(f"Linha fornecida (índices): {linha_df.index.tolist() if isinstance(linha_df, pd.Series) else 'Não é Series'}")
+            self.logger.error(f"Linha fornecida (índices): {linha_df.index.tolist() if hasattr(linha_df, 'index') else 'Não é Series'}")
             self.logger.error(f"Mapeamento dinâmico: {dynamic_column_map}")
             # Retorna um dict parcialmente preenchido ou vazio para evitar quebrar o fluxo, mas loga o erro.
             # É importante que as chaves internas existam, mesmo que com valor vazio.
@@ -443,61 +500,140 @@ class SheetsHandler:
             self.logger.error(f"Erro ao converter índice de coluna para letra para '{internal_key}': {e}")
             return None
 
-    def atualizar_url_documento(self, sheet_row_num: int, url_documento: str, spreadsheet_id: Optional[str] = None, sheet_name: Optional[str] = None) -> bool:
-        current_spreadsheet_id = spreadsheet_id or SPREADSHEET_ID
-        current_sheet_name = sheet_name or SHEET_NAME
+    def atualizar_celula(self, sheet_row_num: int, internal_key: str, valor: Any, spreadsheet_id: Optional[str] = None, sheet_name: Optional[str] = None) -> bool:
+        """
+        Enfileira a atualização de uma célula no buffer de escrita.
 
-        if not current_spreadsheet_id or not current_sheet_name:
-            self.logger.error("ID da planilha ou nome da aba não especificados para atualizar_url_documento.")
-            return False
+        A gravação é feita por `descarregar_escritas`, automaticamente ao acumular SHEETS_BUFFER_LINHAS
+        linhas, por um temporizador SHEETS_BUFFER_SEGUNDOS segundos depois da primeira atualização
+        pendente, ao fim de cada etapa e na saída do programa.
 
-        col_letter = self._get_column_letter_for_internal_key('url_documento', current_spreadsheet_id, current_sheet_name)
-        if not col_letter:
-            self.logger.error(f"Não foi possível determinar a coluna para 'url_documento' em {current_spreadsheet_id}/{current_sheet_name}.")
-            return False
-            
-        range_atualizacao = f"{current_sheet_name}!{col_letter}{sheet_row_num}"
-        self.logger.info(f"Preparando para atualizar URL na Planilha: {current_spreadsheet_id}, Aba: '{current_sheet_name}', Célula: {col_letter}{sheet_row_num}, URL: '{url_documento}'")
-        try:
-            self.service.spreadsheets().values().update(
-                spreadsheetId=current_spreadsheet_id,
-                range=range_atualizacao,
-                valueInputOption="USER_ENTERED",
-                body={"values": [[url_documento]]}
-            ).execute()
-            self.logger.info(f"✓ URL atualizada com sucesso em {range_atualizacao}.")
-            return True
-        except Exception as e:
-            self.logger.error(f"Erro ao atualizar URL na linha {sheet_row_num} (Range: {range_atualizacao}): {e}")
-            return False
+        Args:
+            sheet_row_num: Número da linha na planilha
+            internal_key: Chave interna da coluna (ex.: 'titulo', 'url_documento')
+            valor: Valor a ser gravado
+            spreadsheet_id: ID da planilha (usa SPREADSHEET_ID se omitido)
+            sheet_name: Nome da aba (usa SHEET_NAME se omitido)
 
-    def atualizar_titulo_documento(self, sheet_row_num: int, titulo: str, spreadsheet_id: Optional[str] = None, sheet_name: Optional[str] = None) -> bool:
+        Returns:
+            True se a atualização foi enfileirada (ou gravada, quando o buffer foi descarregado)
+        """
         current_spreadsheet_id = spreadsheet_id or SPREADSHEET_ID
         current_sheet_name = sheet_name or SHEET_NAME
 
         if not current_spreadsheet_id or not current_sheet_name:
-            self.logger.error("ID da planilha ou nome da aba não especificados para atualizar_titulo_documento.")
+            self.logger.error(f"ID da planilha ou nome da aba não especificados para atualizar '{internal_key}'.")
             return False
 
-        col_letter = self._get_column_letter_for_internal_key('titulo', current_spreadsheet_id, current_sheet_name)
+        col_letter = self._get_column_letter_for_internal_key(internal_key, current_spreadsheet_id, current_sheet_name)
         if not col_letter:
-            self.logger.error(f"Não foi possível determinar a coluna para 'titulo' em {current_spreadsheet_id}/{current_sheet_name}.")
+            self.logger.error(f"Não foi possível determinar a coluna para '{internal_key}' em {current_spreadsheet_id}/{current_sheet_name}.")
             return False
 
         range_atualizacao = f"{current_sheet_name}!{col_letter}{sheet_row_num}"
-        self.logger.info(f"Preparando para atualizar Título na Planilha: {current_spreadsheet_id}, Aba: '{current_sheet_name}', Célula: {col_letter}{sheet_row_num}, Título: '{titulo}'")
-        try:
-            self.service.spreadsheets().values().update(
-                spreadsheetId=current_spreadsheet_id,
-                range=range_atualizacao,
-                valueInputOption="USER_ENTERED",
-                body={"values": [[titulo]]}
-            ).execute()
-            self.logger.info(f"✓ Título atualizado com sucesso em {range_atualizacao}.")
-            return True
-        except Exception as e:
-            self.logger.error(f"Erro ao atualizar título na linha {sheet_row_num} (Range: {range_atualizacao}): {e}")
-            return False
+        self.logger.info(f"Atualização enfileirada na Planilha: {current_spreadsheet_id}, Aba: '{current_sheet_name}', Célula: {col_letter}{sheet_row_num}, {internal_key}: '{valor}'")
+        with self._buffer_lock:
+            # Uma nova atualização da mesma célula substitui a anterior
+            self._buffer_escrita.setdefault(current_spreadsheet_id, {})[range_atualizacao] = valor
+            self._origem_escrita[(current_spreadsheet_id, range_atualizacao)] = (sheet_row_num, internal_key)
+            self._linhas_pendentes.add((current_spreadsheet_id, current_sheet_name, sheet_row_num))
+            if self._buffer_desde is None:
+                self._buffer_desde = time.monotonic()
+                self._agendar_descarga()
+
+            descarregar = len(self._linhas_pendentes) >= SHEETS_BUFFER_LINHAS
+
+        # O envio é feito fora do lock do buffer, para não bloquear quem está enfileirando
+        if descarregar:
+            resultados = self.descarregar_escritas()
+            # Se outra descarga já levou esta atualização, o resultado dela vai para os ouvintes
+            return resultados.get(range_atualizacao, True)
+        return True
+
+    def _agendar_descarga(self) -> None:
+        """Agenda a descarga do buffer, numa thread, para daqui a SHEETS_BUFFER_SEGUNDOS segundos."""
+        temporizador = threading.Timer(SHEETS_BUFFER_SEGUNDOS, self.descarregar_escritas)
+        temporizador.name = "descarga-planilha"
+        temporizador.daemon = True
+        self._temporizador = temporizador
+        temporizador.start()
+
+    def descarregar_escritas(self) -> Dict[str, bool]:
+        """
+        Grava todas as atualizações pendentes com um values().batchUpdate por planilha.
+
+        Se o batchUpdate falhar, cada range é regravado individualmente para identificar
+        quais células falharam.
+
+        Returns:
+            Dicionário {range: sucesso} das atualizações gravadas
+        """
+        with self._envio_lock:
+            with self._buffer_lock:
+                buffer = self._buffer_escrita
+                origem = self._origem_escrita
+                self._buffer_escrita = {}
+                self._origem_escrita = {}
+                self._linhas_pendentes = set()
+                self._buffer_desde = None
+                # O buffer foi esvaziado: a descarga agendada, se ainda não começou, não é mais necessária
+                temporizador, self._temporizador = self._temporizador, None
+                if temporizador is not None and temporizador is not threading.current_thread():
+                    temporizador.cancel()
+
+            resultados: Dict[str, bool] = {}
+            for spreadsheet_id, atualizacoes in buffer.items():
+                if not atualizacoes:
+                    continue
+                dados = [{"range": r, "values": [[v]]} for r, v in atualizacoes.items()]
+                try:
+                    resposta = self.service.spreadsheets().values().batchUpdate(
+                        spreadsheetId=spreadsheet_id,
+                        body={"valueInputOption": "USER_ENTERED", "data": dados}
+                    ).execute()
+                    self.logger.info(f"✓ {resposta.get('totalUpdatedCells', len(dados))} célula(s) atualizada(s) em uma requisição na planilha {spreadsheet_id}.")
+                    resultados.update({r: True for r in atualizacoes})
+                except Exception as e:
+                    self.logger.error(f"Erro no batchUpdate da planilha {spreadsheet_id} ({len(dados)} células): {e}. Gravando cada célula individualmente.")
+                    resultados.update(self._gravar_individualmente(spreadsheet_id, atualizacoes))
+                self._notificar_ouvintes(spreadsheet_id, atualizacoes, resultados, origem)
+            return resultados
+
+    def _notificar_ouvintes(self, spreadsheet_id: str, atualizacoes: Dict[str, Any],
+                            resultados: Dict[str, bool], origem: Dict[Tuple[str, str], Tuple[int, str]]) -> None:
+        """Informa aos ouvintes o resultado de cada célula descarregada."""
+        for ouvinte in self.ouvintes_escrita:
+            for range_atualizacao, valor in atualizacoes.items():
+                sheet_row_num, internal_key = origem.get((spreadsheet_id, range_atualizacao), (None, None))
+                if sheet_row_num is None:
+                    continue
+                try:
+                    ouvinte(sheet_row_num, internal_key, valor, resultados.get(range_atualizacao, False))
+                except Exception as e:
+                    self.logger.error(f"Erro no ouvinte de escrita para {range_atualizacao}: {e}")
+
+    def _gravar_individualmente(self, spreadsheet_id: str, atualizacoes: Dict[str, Any]) -> Dict[str, bool]:
+        """Grava cada range com values().update, registrando o erro de cada um que falhar."""
+        resultados = {}
+        for range_atualizacao, valor in atualizacoes.items():
+            try:
+                self.service.spreadsheets().values().update(
+                    spreadsheetId=spreadsheet_id,
+                    range=range_atualizacao,
+                    valueInputOption="USER_ENTERED",
+                    body={"values": [[valor]]}
+                ).execute()
+                resultados[range_atualizacao] = True
+            except Exception as e:
+                self.logger.error(f"Erro ao atualizar {range_atualizacao} na planilha {spreadsheet_id}: {e}")
+                resultados[range_atualizacao] = False
+        return resultados
+
+    def atualizar_url_documento(self, sheet_row_num: int, url_documento: str, spreadsheet_id: Optional[str] = None, sheet_name: Optional[str] = None) -> bool:
+        return self.atualizar_celula(sheet_row_num, 'url_documento', url_documento, spreadsheet_id, sheet_name)
+
+    def atualizar_titulo_documento(self, sheet_row_num: int, titulo: str, spreadsheet_id: Optional[str] = None, sheet_name: Optional[str] = None) -> bool:
+        return self.atualizar_celula(sheet_row_num, 'titulo', titulo, spreadsheet_id, sheet_name)
 
     def carregar_dados_planilha(self, spreadsheet_id: str, sheet_name: str) -> Optional[pd.DataFrame]:
         """
@@ -510,6 +646,8 @@ class SheetsHandler:
         Returns:
             DataFrame com os dados da planilha ou None em caso de erro
         """
+        import pandas as pd
+
         try:
             # Obtém os dados da planilha
             result = self.service.spreadsheets().values().get(
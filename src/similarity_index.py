@@ -0,0 +1,126 @@
+# Módulo de índice de similaridade de títulos (detecção de quase-duplicatas)
+import logging
+import math
+import threading
+from array import array
+from collections import defaultdict
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.utils import normalizar_texto
+
+logger = logging.getLogger('seo_linkbuilder.similarity_index')
+
+
+@lru_cache(maxsize=None)
+def _numpy():
+    """Importa o numpy no primeiro uso do índice (fica fora da abertura do programa)."""
+    import numpy
+    return numpy
+
+
+def _ngramas(texto_norm: str, n: int) -> Set[str]:
+    """Retorna o conjunto de n-gramas de caracteres de um texto já normalizado."""
+    texto = f" {' '.join(texto_norm.split())} "
+    if len(texto) <= n:
+        return {texto}
+    return {texto[i:i + n] for i in range(len(texto) - n + 1)}
+
+
+class SimilarityIndex:
+    """
+    Índice invertido de n-gramas de caracteres sobre títulos pré-normalizados.
+
+    Em vez de comparar um título candidato com todos os títulos existentes, o índice
+    retorna apenas os títulos cujo coeficiente de Dice sobre os n-gramas
+    (2 * comuns / (n-gramas do candidato + n-gramas do indexado)) chega a `limiar_candidato`;
+    somente esses são reavaliados com a métrica exata (Levenshtein, estrutura e temas).
+    O Dice, ao contrário da fração dos n-gramas do candidato, descarta também os títulos
+    bem mais longos que só o contêm em parte.
+
+    As listas invertidas são arrays de inteiros, somadas com numpy a cada consulta: com dezenas
+    de milhares de títulos, uma consulta percorre centenas de milhares de posições.
+    """
+
+    def __init__(self, titulos: Optional[Iterable[str]] = None, n: int = 3, limiar_candidato: float = 0.6):
+        self.n = n
+        self.limiar_candidato = limiar_candidato
+        self.titulos: List[str] = []
+        # Quantidade de n-gramas de cada título indexado (mesma posição de self.titulos)
+        self._tamanhos = array('i')
+        self._normalizados: Set[str] = set()
+        self._postings: Dict[str, array] = defaultdict(lambda: array('i'))
+        self._lock = threading.Lock()
+        if titulos:
+            self.adicionar_varios(titulos)
+
+    def __len__(self) -> int:
+        return len(self.titulos)
+
+    def __contains__(self, titulo: str) -> bool:
+        return normalizar_texto(titulo) in self._normalizados
+
+    def adicionar(self, titulo: str) -> None:
+        """Insere um título no índice (títulos idênticos após normalização são ignorados)."""
+        if not titulo:
+            return
+        titulo_norm = normalizar_texto(titulo)
+        with self._lock:
+            if titulo_norm in self._normalizados:
+                return
+            indice = len(self.titulos)
+            gramas = _ngramas(titulo_norm, self.n)
+            self.titulos.append(titulo)
+            self._tamanhos.append(len(gramas))
+            self._normalizados.add(titulo_norm)
+            for grama in gramas:
+                self._postings[grama].append(indice)
+
+    def adicionar_varios(self, titulos: Iterable[str]) -> None:
+        for titulo in titulos:
+            self.adicionar(titulo)
+
+    def candidatos(self, titulo: str) -> List[str]:
+        """Retorna os títulos indexados com coeficiente de Dice dos n-gramas acima do limiar, do maior para o menor."""
+        gramas = _ngramas(normalizar_texto(titulo), self.n)
+        total = len(gramas)
+        # Dice >= limiar exige pelo menos limiar * total / (2 - limiar) n-gramas em comum
+        minimo = max(1, math.ceil(self.limiar_candidato * total / (2 - self.limiar_candidato) - 1e-9))
+        np = _numpy()
+        with self._lock:
+            listas = [self._postings[grama] for grama in gramas if grama in self._postings]
+            if not listas:
+                return []
+            # Conta quantos n-gramas cada título indexado compartilha com o candidato
+            # (as visões do numpy sobre os arrays são descartadas antes de soltar o lock,
+            # já que um array com visão exportada não pode crescer)
+            contagem = np.bincount(np.concatenate([np.frombuffer(lista, dtype=np.intc) for lista in listas]))
+            indices = np.flatnonzero(contagem >= minimo)
+            dice = 2 * contagem[indices] / (total + np.frombuffer(self._tamanhos, dtype=np.intc)[indices])
+            aprovados = dice >= self.limiar_candidato
+            indices, dice = indices[aprovados], dice[aprovados]
+            # Os de maior Dice vêm primeiro (são os mais prováveis quase-duplicados)
+            return [self.titulos[i] for i in indices[np.argsort(-dice, kind='stable')]]
+
+    def buscar_similares(self, titulo: str, funcao_similaridade: Callable[[str, str], float],
+                         limiar: float) -> List[Tuple[str, float]]:
+        """
+        Retorna os títulos indexados cuja similaridade exata com `titulo` passa de `limiar`,
+        do mais para o menos similar.
+        """
+        similares = []
+        for existente in self.candidatos(titulo):
+            similaridade = funcao_similaridade(titulo, existente)
+            if similaridade > limiar:
+                similares.append((existente, similaridade))
+        similares.sort(key=lambda s: s[1], reverse=True)
+        return similares
+
+    def mais_similar(self, titulo: str, funcao_similaridade: Callable[[str, str], float],
+                     limiar: float) -> Optional[Tuple[str, float]]:
+        """Retorna o primeiro título indexado com similaridade acima de `limiar`, ou None."""
+        for existente in self.candidatos(titulo):
+            similaridade = funcao_similaridade(titulo, existente)
+            if similaridade > limiar:
+                return existente, similaridade
+        return None
@@ -0,0 +1,63 @@
+# Módulo de armazenamento temporário em disco (spool) dos conteúdos gerados
+import gzip
+import json
+import logging
+import os
+import shutil
+from typing import Any, Dict, Optional
+
+from src.config import SPOOL_DIR
+
+logger = logging.getLogger('seo_linkbuilder.spool')
+
+
+class ConteudoSpool:
+    """
+    Spool em disco dos artigos gerados numa execução, em `SPOOL_DIR/<run_id>/<chave>.json.gz`.
+
+    Cada item (dados da linha, texto gerado e métricas) é gravado comprimido assim que fica
+    pronto, e o processamento guarda em memória apenas a chave. Na etapa de criação dos
+    documentos os itens são lidos de volta um de cada vez. A gravação é atômica (arquivo
+    temporário + os.replace), então um item existente nunca está pela metade.
+    """
+
+    def __init__(self, run_id: str, diretorio: str = SPOOL_DIR):
+        self.run_id = run_id
+        self.diretorio = os.path.join(diretorio, run_id)
+        os.makedirs(self.diretorio, exist_ok=True)
+
+    def _caminho(self, chave: str) -> str:
+        return os.path.join(self.diretorio, f"{chave}.json.gz")
+
+    def gravar(self, chave: str, item: Dict[str, Any]) -> str:
+        """Grava o item no disco e retorna a chave."""
+        caminho = self._caminho(chave)
+        temporario = caminho + ".tmp"
+        with gzip.open(temporario, "wt", encoding="utf-8", compresslevel=6) as f:
+            json.dump(item, f, ensure_ascii=False, default=str)
+        os.replace(temporario, caminho)
+        return chave
+
+    def ler(self, chave: str) -> Optional[Dict[str, Any]]:
+        """Lê um item do spool (None se não existir ou estiver corrompido)."""
+        try:
+            with gzip.open(self._caminho(chave), "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, json.JSONDecodeError) as e:
+            logger.warning(f"Item '{chave}' do spool {self.run_id} ilegível: {e}")
+            return None
+
+    def existe(self, chave: str) -> bool:
+        return os.path.exists(self._caminho(chave))
+
+    def remover(self, chave: str) -> None:
+        try:
+            os.remove(self._caminho(chave))
+        except FileNotFoundError:
+            pass
+
+    def limpar(self) -> None:
+        """Remove o spool inteiro da execução."""
+        shutil.rmtree(self.diretorio, ignore_errors=True)
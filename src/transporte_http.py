@@ -0,0 +1,106 @@
+# Módulo do transporte HTTP dos serviços do Google (Sheets, Docs e Drive) usados por várias threads
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.config import GOOGLE_HTTP_CONEXOES, GOOGLE_HTTP_TIMEOUT
+
+logger = logging.getLogger('seo_linkbuilder.transporte')
+
+
+class PoolHttp:
+    """
+    Pool de objetos httplib2 autorizados, usado como o `http` dos serviços do googleapiclient.
+
+    O httplib2 não é seguro entre threads: cada requisição toma um objeto do pool só para ela e o
+    devolve ao terminar, e as conexões que ele mantém abertas (keep-alive, uma por host) são
+    reaproveitadas pelas requisições seguintes. O pool cria no máximo `tamanho` objetos; com todos
+    em uso, a requisição espera um ser devolvido, o que limita as conexões simultâneas com cada host.
+
+    Tem a mesma interface de `httplib2.Http.request`, então um único pool pode servir a todos os
+    serviços (e threads) do processo.
+    """
+
+    def __init__(self, credenciais=None, tamanho: int = GOOGLE_HTTP_CONEXOES,
+                 timeout: Optional[float] = GOOGLE_HTTP_TIMEOUT):
+        # Lido pelo googleapiclient com este nome (ex.: nas requisições em lote)
+        self.credentials = credenciais
+        self.tamanho = max(1, tamanho)
+        self.timeout = timeout
+        self._condicao = threading.Condition()
+        # Pilha: o objeto devolvido por último é o que tem as conexões abertas mais recentes
+        self._livres: List[Any] = []
+        self._criados = 0
+        self.requisicoes = 0
+        self.esperas = 0
+        self.tempo_espera = 0.0
+
+    def _novo_http(self):
+        """Cria um httplib2.Http com os ajustes do googleapiclient, autorizado com as credenciais."""
+        from googleapiclient.http import build_http
+
+        http = build_http()
+        if self.timeout:
+            http.timeout = self.timeout
+        if self.credentials is None:
+            return http
+        import google_auth_httplib2
+        return google_auth_httplib2.AuthorizedHttp(self.credentials, http=http)
+
+    @contextmanager
+    def emprestar(self) -> Iterator[Any]:
+        """Empresta um objeto HTTP do pool (criando-o se ainda couber, ou esperando um ser devolvido)."""
+        espera_desde = None
+        with self._condicao:
+            while not self._livres and self._criados >= self.tamanho:
+                if espera_desde is None:
+                    espera_desde = time.perf_counter()
+                    self.esperas += 1
+                self._condicao.wait()
+            if espera_desde is not None:
+                self.tempo_espera += time.perf_counter() - espera_desde
+            self.requisicoes += 1
+            http = self._livres.pop() if self._livres else None
+            if http is None:
+                self._criados += 1
+        if http is None:
+            try:
+                http = self._novo_http()
+                logger.debug(f"Objeto HTTP {self._criados}/{self.tamanho} do pool criado")
+            except Exception:
+                with self._condicao:
+                    self._criados -= 1
+                    self._condicao.notify()
+                raise
+        try:
+            yield http
+        finally:
+            with self._condicao:
+                self._livres.append(http)
+                self._condicao.notify()
+
+    def request(self, *args, **kwargs):
+        """Mesma interface de `httplib2.Http.request`, executada com um objeto emprestado do pool."""
+        with self.emprestar() as http:
+            return http.request(*args, **kwargs)
+
+    def close(self) -> None:
+        """Fecha as conexões dos objetos livres e os descarta (os que estão em uso voltam ao pool normalmente)."""
+        with self._condicao:
+            for http in self._livres:
+                http.close()
+            self._criados -= len(self._livres)
+            self._livres.clear()
+            self._condicao.notify_all()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._condicao:
+            return {
+                'tamanho': self.tamanho,
+                'objetos_http': self._criados,
+                'requisicoes': self.requisicoes,
+                'esperas': self.esperas,
+                'tempo_espera_s': round(self.tempo_espera, 3),
+            }
@@ -1,13 +1,15 @@
 # Módulo para funções utilitárias (logging, formatação, etc.)
+import hashlib
 import logging
 import os
 import re
 import sys
+import threading
 from datetime import datetime
-import tiktoken
-from collections import Counter
+from functools import lru_cache
+from typing import List, Optional
+from collections import Counter, OrderedDict
 import unicodedata # Para normalização de acentos
-import pandas as pd
 
 # Configura o logger para este módulo
 logger = logging.getLogger(__name__)
@@ -83,10 +85,11 @@ def limpar_markdown_links(texto):
     texto = re.sub(r'<a [^>]*href=["\\\']([^"\\\']+)["\\\'][^>]*>(.*?)</a>', r'\2', texto, flags=re.IGNORECASE)
     return texto
 
-def converter_markdown_para_docs(texto, info_link=None):
+def converter_markdown_para_docs(texto, info_link=None, tamanho_titulo=13):
     """
     Converte texto com estrutura natural para o formato usado pela API do Google Docs.
     Identifica título, subtítulos, parágrafos e listas.
+    O título principal (H1) recebe a fonte `tamanho_titulo` (pt) em negrito.
     """
     requests = []
     # Limpa links markdown e HTML antes de processar
@@ -116,7 +119,7 @@ def converter_markdown_para_docs(texto, info_link=None):
             'fields': 'namedStyleType'
         }
     })
-    # Aplica estilo ao título (tamanho 13pt, negrito)
+    # Aplica estilo ao título (tamanho configurado, negrito)
     requests.append({
         'updateTextStyle': {
             'range': {
@@ -125,7 +128,7 @@ def converter_markdown_para_docs(texto, info_link=None):
             },
             'textStyle': {
                 'fontSize': {
-                    'magnitude': 13,
+                    'magnitude': tamanho_titulo,
                     'unit': 'PT'
                 },
                 'bold': True
@@ -344,21 +347,128 @@ def converter_markdown_para_docs(texto, info_link=None):
     return requests
 
 # Contador de tokens
-def contar_tokens(texto, modelo="gpt-3.5-turbo"):
+@lru_cache(maxsize=None)
+def _obter_codificador(modelo: str) -> Optional["tiktoken.Encoding"]:
+    """
+    Carrega o codificador do tiktoken uma única vez por modelo.
+    Se o carregamento falhar (ex.: sem acesso à rede), a falha também fica em cache
+    e o aviso é registrado apenas uma vez.
+    """
+    try:
+        import tiktoken  # importado no primeiro uso, junto com o codificador
+        return tiktoken.encoding_for_model(modelo)
+    except Exception as e:
+        logger.warning(f"Erro ao carregar codificador do tiktoken para '{modelo}': {e}. Usando estimativa por palavras.")
+        return None
+
+def preparar_codificador(modelo: str = "gpt-3.5-turbo") -> threading.Thread:
+    """
+    Importa o tiktoken e carrega o codificador em segundo plano, para que a primeira
+    contagem de tokens não pague por isso (o carregamento fica fora da abertura do programa).
+    """
+    thread = threading.Thread(target=_obter_codificador, args=(modelo,), name="preparar-codificador", daemon=True)
+    thread.start()
+    return thread
+
+def _estimar_tokens_por_palavras(texto: str) -> int:
+    # Aproximação: ~0.75 tokens por palavra para inglês, ~0.6 para português
+    return int(len(texto.split()) * 0.6)
+
+def estimar_tokens(texto: str) -> int:
+    """
+    Estimativa rápida de tokens (~4 caracteres por token), sem tokenizar o texto.
+    Adequada para prévias de custo, onde a precisão exata não é necessária.
+    """
+    return (len(texto) + 3) // 4
+
+# Contagens exatas já feitas, das mais antigas às usadas mais recentemente (compartilhadas por
+# contar_tokens e contar_tokens_lote). A chave leva um resumo do texto, e não o texto: prompts e
+# artigos inteiros guardados como chave ocupariam dezenas de MB
+_MEMO_TOKENS_MAX = 2048
+_memo_tokens: "OrderedDict[tuple, int]" = OrderedDict()
+_memo_tokens_lock = threading.Lock()
+
+def _chave_memo_tokens(texto: str, modelo: str) -> tuple:
+    return modelo, len(texto), hashlib.blake2b(texto.encode('utf-8'), digest_size=16).digest()
+
+def _memo_tokens_obter(texto: str, modelo: str) -> Optional[int]:
+    chave = _chave_memo_tokens(texto, modelo)
+    with _memo_tokens_lock:
+        contagem = _memo_tokens.get(chave)
+        if contagem is not None:
+            _memo_tokens.move_to_end(chave)
+        return contagem
+
+def _memo_tokens_guardar(contagens: dict, modelo: str) -> None:
+    chaves = [(_chave_memo_tokens(texto, modelo), contagem) for texto, contagem in contagens.items()]
+    with _memo_tokens_lock:
+        for chave, contagem in chaves:
+            _memo_tokens[chave] = contagem
+            _memo_tokens.move_to_end(chave)
+        while len(_memo_tokens) > _MEMO_TOKENS_MAX:
+            _memo_tokens.popitem(last=False)
+
+def _contar_tokens_exato(texto: str, modelo: str) -> int:
+    contagem = _memo_tokens_obter(texto, modelo)
+    if contagem is not None:
+        return contagem
+    codificador = _obter_codificador(modelo)
+    if codificador is None:
+        return _estimar_tokens_por_palavras(texto)
+    try:
+        contagem = len(codificador.encode(texto, disallowed_special=()))
+    except Exception as e:
+        logger.warning(f"Erro ao contar tokens com tiktoken: {e}")
+        return _estimar_tokens_por_palavras(texto)
+    _memo_tokens_guardar({texto: contagem}, modelo)
+    return contagem
+
+def contar_tokens(texto, modelo="gpt-3.5-turbo", aproximado=False):
     """
     Conta os tokens em um texto com base no modelo especificado.
     Útil para estimar custos antes de enviar para a API.
+
+    O codificador é carregado uma única vez por modelo e as contagens de textos
+    idênticos são memorizadas. Com `aproximado=True` usa `estimar_tokens`.
+    """
+    if not texto:
+        return 0
+    if aproximado:
+        return estimar_tokens(texto)
+    return _contar_tokens_exato(texto, modelo)
+
+def contar_tokens_lote(textos: List[str], modelo="gpt-3.5-turbo", aproximado=False) -> List[int]:
+    """
+    Conta os tokens de vários textos de uma vez, na mesma ordem da entrada.
+    Os textos ainda não contados são codificados juntos com `encode_batch` do tiktoken, e as
+    contagens novas ficam memorizadas para as próximas chamadas (desta função e de `contar_tokens`).
     """
+    if aproximado:
+        return [estimar_tokens(t) if t else 0 for t in textos]
+
+    codificador = _obter_codificador(modelo)
+    if codificador is None:
+        return [_estimar_tokens_por_palavras(t) if t else 0 for t in textos]
+
+    contagens = {"": 0}
+    pendentes = []
+    for t in {t for t in textos if t}:
+        contagem = _memo_tokens_obter(t, modelo)
+        if contagem is None:
+            pendentes.append(t)
+        else:
+            contagens[t] = contagem
+    if not pendentes:
+        return [contagens[t or ""] for t in textos]
     try:
-        # Tenta usar o contador de tokens do tiktoken
-        codificador = tiktoken.encoding_for_model(modelo)
-        return len(codificador.encode(texto))
+        codificados = codificador.encode_batch(pendentes, disallowed_special=())
+        novas = {t: len(c) for t, c in zip(pendentes, codificados)}
+        _memo_tokens_guardar(novas, modelo)
+        contagens.update(novas)
     except Exception as e:
-        # Fallback: estimativa aproximada baseada em palavras
-        logger.warning(f"Erro ao contar tokens com tiktoken: {e}")
-        palavras = texto.split()
-        # Aproximação: ~0.75 tokens por palavra para inglês, ~0.6 para português
-        return int(len(palavras) * 0.6)
+        logger.warning(f"Erro ao contar tokens em lote com tiktoken: {e}")
+        contagens.update({t: contar_tokens(t, modelo) for t in pendentes})
+    return [contagens[t or ""] for t in textos]
 
 def substituir_links_markdown(texto, palavra_ancora, url_ancora):
     """
@@ -594,6 +704,8 @@ def extrair_titulos_por_ancora(df, coluna_titulo, coluna_ancora):
         logger.error(f"Coluna de âncora '{coluna_ancora}' não encontrada no DataFrame.")
         return {}
 
+    import pandas as pd
+
     titulos_por_ancora = {}
     
     for idx, row in df.iterrows():